@@ -3,6 +3,7 @@ from university_app.config import CHARS_DEFAULT
 from random import sample, choice
 from string import ascii_letters
 from django.contrib.auth.models import User
+from django.db import connections
 from django.db.models import Model
 
 
@@ -46,6 +47,23 @@ def set_up(cls_model: Model):
     return new_fields
 
 
+def set_up_university(days: tuple = ('2023-04-07',), student: bool = True) -> dict:
+    """A faculty with a group, a subject and its teacher, the group's lessons on days and its student."""
+    fc = Faculty.objects.create(title='Linguistics')
+    gr = Group.objects.create(title='7.1', faculty=fc)
+    su = Subject.objects.create(title='English')
+    te = Teacher.objects.create(full_name='Dennis Keller', faculty=fc)
+    lessons = []
+    for day in days:
+        le = Lesson.objects.create(day=day, precise_time='09:45:00', subject=su, teacher=te)
+        le.groups.add(gr)
+        lessons.append(le)
+    return {
+        'faculty': fc, 'group': gr, 'subject': su, 'teacher': te, 'lessons': lessons,
+        'student': Student.objects.create(full_name='Steven Wright', group=gr) if student else None,
+    }
+
+
 # normal and failing values for attrs
 normal_title = ''.join(sample(ascii_letters, CHARS_DEFAULT - 1))
 failing_title = ''.join(sample(ascii_letters, CHARS_DEFAULT + 1))
@@ -89,3 +107,12 @@ group_new_attrs = {'title': new_title}
 hometask_attrs = {'task': normal_title}
 hometask_failing_attrs = {}
 hometask_new_attrs = {'task': new_title}
+
+
+def commit(using: str = 'default'):
+    """Run the on_commit callbacks a TestCase transaction holds back."""
+    connection = connections[using]
+    while connection.run_on_commit:
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback, *_ in callbacks:
+            callback()
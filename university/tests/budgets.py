@@ -0,0 +1,90 @@
+"""Queries a GET of each route runs per role with cold caches, added up from its query plan."""
+from university_app.models import Faculty, Group, Teacher, Lesson, Mark, Hometask
+from university_app.prefetch import serializer_plan
+from university_app.roles import SUPERUSER, STUDENT, TEACHER
+from university_app import views
+
+# the session, then request.user
+REQUEST = 2
+# every table version, read once per request for ETags, cached pages and role cache keys
+VERSIONS = 1
+# role links looked up after the versions: a student link first, then a teacher one
+LOOKUPS = {SUPERUSER: 0, STUDENT: 1, TEACHER: 2}
+# non-superusers: whether their scope holds the object
+ACCESS = 1
+# a numbered page counts its rows; uncounted catalogs fetch one row more instead
+COUNT = 1
+# a lesson page's mark form: the lesson's students, then the lesson and subject choices
+MARK_FORM = 3
+
+
+def fetched(plan: tuple) -> int:
+    """Queries loading rows by a (select_related, prefetch_related) plan: the rows, then each prefetched level."""
+    select_related, prefetch_related = plan
+    levels = {'__'.join(path.split('__')[:depth]) for path in prefetch_related
+              for depth in range(1, path.count('__') + 2)}
+    return 1 + len(levels - set(select_related))
+
+
+def plan(own: int = 0, cached: bool = True, scoped: bool = True, **by_role) -> dict:
+    """Queries per role: the request's, the versions if cached or resolving a role, the role lookups
+    if scoped, own and by_role's."""
+    return {role: REQUEST + (VERSIONS if cached or (scoped and lookups) else 0) + (lookups if scoped else 0)
+            + own + by_role.get(role, 0) for role, lookups in LOOKUPS.items()}
+
+
+def entity(cls_model, *lazy: str, **by_role) -> dict:
+    """An entity page: the row with its ENTITY_RELATED, then one query per lazily listed relation."""
+    return plan(fetched(views.ENTITY_RELATED.get(cls_model, ((), ()))) + len(lazy),
+                student=ACCESS + by_role.get(STUDENT, 0), teacher=ACCESS + by_role.get(TEACHER, 0),
+                superuser=by_role.get(SUPERUSER, 0))
+
+
+def rest(viewset) -> dict:
+    """List and detail routes of a viewset planned by serializer_plan; no role scopes them."""
+    basename = viewset.queryset.model._meta.model_name
+    rows = fetched(serializer_plan(viewset.serializer_class))
+    return {f'rest/{basename}-list': plan(COUNT + rows, scoped=False),
+            f'rest/{basename}-detail': plan(rows, scoped=False)}
+
+
+BUDGETS = {
+    'homepage': plan(1, cached=False, scoped=False),  # the dashboard counters
+    'profile': plan(cached=False, scoped=False),
+    'about': plan(cached=False, scoped=False),
+    'contacts': plan(cached=False, scoped=False),
+    # CATALOG: the page's rows joined to what the template shows
+    'faculties': plan(COUNT + 1),
+    'teachers': plan(COUNT + 1),
+    'groups': plan(COUNT + 1),
+    'lessons': plan(1),
+    'marks': plan(1),
+    'hometasks': plan(1),
+    # ENTITIES
+    'faculty': entity(Faculty),
+    'group': entity(Group, 'subjects'),
+    'teacher': entity(Teacher, 'subjects'),
+    'lesson': entity(Lesson, 'marks', superuser=MARK_FORM, teacher=MARK_FORM),
+    'mark': entity(Mark),
+    'hometask': entity(Hometask),
+    # the lesson, then its students for those allowed to grade
+    'grade_lesson': plan(1, cached=False, superuser=1, teacher=1),
+    # the group and subject, then students, lessons and marks; teachers also check they teach the group
+    'gradebook': plan(2, cached=False, superuser=3, teacher=1 + 3),
+    # superusers only: the marks, streamed
+    'export_marks': plan(cached=False, superuser=1),
+    # superusers only: the marks, then their students
+    'attendance': plan(cached=False, superuser=2),
+    # REST
+    **rest(views.FacultyViewSet),
+    **rest(views.TeacherViewSet),
+    **rest(views.LessonViewSet),
+    **rest(views.MarkViewSet),
+    **rest(views.HometaskViewSet),
+    **rest(views.GroupViewSet),
+    # scoped by role; the rollups skip conditional GETs
+    'rest/gradeaggregate-list': plan(COUNT + 1),
+    'rest/gradeaggregate-detail': plan(1),
+    'rest/gradeaggregate-faculties': plan(1, cached=False),
+    'rest/gradeaggregate-groups': plan(1, cached=False),
+}
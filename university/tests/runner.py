@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.test.runner import DiscoverRunner
 from django.db import connections
+from os import getenv
 from types import MethodType
 
 
@@ -7,7 +9,14 @@ def setup_db(self):
     self.connect()
 
 
-class PostgresRunner(DiscoverRunner):
+class NPlusOneRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # N+1 queries fail the tests unless NPLUSONE_MODE is set explicitly
+        settings.NPLUSONE_MODE = getenv('NPLUSONE_MODE', 'raise')
+
+
+class PostgresRunner(NPlusOneRunner):
     def setup_databases(self, **kwargs):
         for conn_name in connections:
             conn = connections[conn_name]
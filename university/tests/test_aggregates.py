@@ -0,0 +1,168 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from university_app.models import Subject, Lesson, Student, Mark, GradeAggregate
+from university_app import aggregates
+from .attrs import commit, set_up_university
+from io import StringIO
+
+COUNTERS = ('count', 'total', 'total_squares', 'absences')
+
+
+def snapshot() -> dict:
+    return {
+        (row.student_id, row.subject_id): tuple(getattr(row, counter) for counter in aggregates.COUNTERS)
+        for row in GradeAggregate.objects.all()
+    }
+
+
+class GradeAggregateTests(APITestCase):
+
+    def setUp(self):
+        university = set_up_university(('2023-04-07', '2023-04-08'))
+        self.group, self.subject, self.teacher = university['group'], university['subject'], university['teacher']
+        self.lessons, self.student = university['lessons'], university['student']
+
+    def aggregate(self):
+        return GradeAggregate.objects.get(student=self.student, subject=self.subject)
+
+    def test_create_update_delete(self):
+        first = Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, mark=3)
+        row = self.aggregate()
+        self.assertEqual((row.count, row.total, row.total_squares, row.count_5), (2, 8, 34, 1))
+        first.mark, first.presence = None, 'Н'
+        first.save()
+        row = self.aggregate()
+        self.assertEqual((row.count, row.total, row.count_5, row.absences), (1, 3, 0, 1))
+        first.delete()
+        row = self.aggregate()
+        self.assertEqual((row.count, row.total, row.absences), (1, 3, 0))
+
+    def test_bulk_create(self):
+        students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(5))
+        Mark.objects.bulk_create(
+            Mark(lesson=self.lessons[0], student=student, mark=4) for student in students)
+        self.assertEqual(GradeAggregate.objects.filter(count=1, total=4, count_4=1).count(), 5)
+
+    def test_rebuild_matches_incremental(self):
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=2)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, presence='Н')
+        incremental = snapshot()
+        GradeAggregate.objects.update(count=42)
+        call_command('rebuild_grade_aggregates', stdout=StringIO())
+        self.assertEqual(snapshot(), incremental)
+
+    def test_cascade_delete(self):
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=2)
+        self.student.delete()
+        self.assertFalse(GradeAggregate.objects.exists())
+
+    def test_lesson_subject_change(self):
+        other = Subject.objects.create(title='History')
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, mark=3)
+        self.lessons[0].subject = other
+        self.lessons[0].save()
+        self.assertEqual((self.aggregate().count, self.aggregate().total), (1, 3))
+        moved = GradeAggregate.objects.get(student=self.student, subject=other)
+        self.assertEqual((moved.count, moved.total, moved.count_5), (1, 5, 1))
+        incremental = snapshot()
+        aggregates.rebuild()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_subject_change_refreshes_conditional_get(self):
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        other = Subject.objects.create(title='History')
+        self.client.force_authenticate(User.objects.create_user(username='admin', is_superuser=True))
+        commit()
+        etag = self.client.get('/rest/grades/')['ETag']
+        self.assertEqual(self.client.get('/rest/grades/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.lessons[0].subject = other
+        self.lessons[0].save()
+        commit()
+        response = self.client.get('/rest/grades/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['subject'], row['count']) for row in response.data['results']], [(other.id, 1)])
+
+    def test_lesson_delete_in_constant_queries(self):
+        students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(10))
+        for lesson, graded in zip(self.lessons, (students[:1], students)):
+            Mark.objects.bulk_create(Mark(lesson=lesson, student=student, mark=4) for student in graded)
+        counts = []
+        for lesson in self.lessons:
+            with CaptureQueriesContext(connection) as context:
+                lesson.delete()
+            table = GradeAggregate._meta.db_table
+            counts.append(sum(table in query['sql'] for query in context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(GradeAggregate.objects.exists())
+
+    def test_failed_delete_keeps_counting(self):
+        mark = Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, mark=3)
+
+        def fail(**kwargs):
+            raise RuntimeError
+        post_delete.connect(fail, sender=Lesson)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.lessons[0].delete()
+        finally:
+            post_delete.disconnect(fail, sender=Lesson)
+        mark.delete()
+        self.assertEqual((self.aggregate().count, self.aggregate().total), (1, 3))
+
+    def test_queryset_updates(self):
+        other = Subject.objects.create(title='History')
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, mark=4)
+        Mark.objects.filter(mark=5).update(mark=2)
+        row = self.aggregate()
+        self.assertEqual((row.count, row.total, row.count_2, row.count_5), (2, 6, 1, 0))
+        Lesson.objects.filter(pk=self.lessons[0].pk).update(subject=other)
+        Mark.objects.filter(lesson=self.lessons[1]).update(presence='Н')
+        incremental = snapshot()
+        aggregates.rebuild()
+        self.assertEqual(snapshot(), incremental)
+        self.assertEqual(self.aggregate().absences, 1)
+
+    def test_moved_out_rows_are_deleted(self):
+        other = Subject.objects.create(title='History')
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        self.lessons[0].subject = other
+        self.lessons[0].save()
+        self.assertEqual(list(GradeAggregate.objects.values_list('subject_id', 'count')), [(other.id, 1)])
+
+    def test_summary(self):
+        stats = aggregates.summary({'count': 2, 'total': 8, 'total_squares': 34, 'absences': 1,
+                                    **dict.fromkeys(aggregates.HISTOGRAM, 0)})
+        self.assertEqual((stats['mean'], stats['deviation']), (4, 1))
+
+    def test_rest(self):
+        Mark.objects.create(lesson=self.lessons[0], student=self.student, mark=5)
+        Mark.objects.create(lesson=self.lessons[1], student=self.student, mark=3)
+        other = Student.objects.create(full_name='Other', group=self.group)
+        Mark.objects.create(lesson=self.lessons[0], student=other, mark=4)
+        user = User.objects.create_user(username='grades', password='grades')
+        self.student.user = user
+        self.student.save()
+        self.client.force_authenticate(user)
+        response = self.client.get('/rest/grades/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['mean'], 4)
+        admin = User.objects.create_user(username='admin', password='admin', is_superuser=True)
+        self.client.force_authenticate(admin)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/rest/grades/groups/?subject={self.subject.id}')
+        self.assertEqual(response.data, [{
+            'group': self.group.id, 'subject': self.subject.id, 'count': 3, 'mean': 4,
+            'deviation': response.data[0]['deviation'], 'histogram': [0, 0, 1, 1, 1], 'absences': 0,
+        }])
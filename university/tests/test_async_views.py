@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from university_app.models import Faculty
+from university_app.pagecache import get_cache
+from university_app import async_views, counters, views
+from .attrs import commit, set_up_university
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_cache().clear()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user(username='async', password='async', is_superuser=True)
+        university = set_up_university()
+        self.faculty, self.teacher = university['faculty'], university['teacher']
+        self.lesson, = university['lessons']
+        for number in range(25):
+            Faculty.objects.create(title=f'Faculty {number:02}')
+        commit()
+
+    def request(self, path, user=None, **params):
+        request = self.factory.get(path, params)
+        request.user = user or self.user
+        return request
+
+    async def test_catalog_matches_sync_view(self):
+        for page in ('1', '2', '9', 'x'):
+            expected = await sync_to_async(views.FacultyListView.as_view())(self.request('/faculties/', page=page))
+            await sync_to_async(get_cache().clear)()
+            response = await async_views.faculties_view(self.request('/faculties/', page=page))
+            self.assertEqual(response.content, expected.content)
+
+    async def test_uncounted_catalog(self):
+        response = await async_views.lessons_view(self.request('/lessons/'))
+        self.assertContains(response, 'English')
+
+    async def test_entity_page(self):
+        response = await async_views.faculty_view(self.request('/faculty/', id=str(self.faculty.id)))
+        self.assertContains(response, 'Linguistics')
+        cached = await async_views.faculty_view(self.request('/faculty/', id=str(self.faculty.id)))
+        self.assertEqual(cached.content, response.content)
+        request = self.request('/faculty/', id=str(self.faculty.id))
+        request.META['HTTP_IF_NONE_MATCH'] = response['ETag']
+        self.assertEqual((await async_views.faculty_view(request)).status_code, 304)
+
+    async def test_lesson_page_for_students(self):
+        response = await async_views.lesson_view(
+            self.request('/lesson/', user=AnonymousUser(), id=str(self.lesson.id)))
+        self.assertContains(response, 'English')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    async def test_lesson_form_goes_to_sync_view(self):
+        response = await async_views.lesson_view(self.request('/lesson/', id=str(self.lesson.id)))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    async def test_counts(self):
+        await cache.aclear()
+        self.assertEqual(await counters.aget_counts(), await sync_to_async(counters.get_counts)())
+        self.assertEqual((await counters.areconcile())['faculties'], 26)
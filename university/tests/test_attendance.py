@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from university_app.models import Faculty, Group, Student, Mark
+from university_app import attendance
+from .attrs import set_up_university
+from io import StringIO
+import json
+
+DAYS = ('2023-04-03', '2023-04-05', '2023-04-10', '2023-04-12')
+
+
+class AttendanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='dean', password='dean', is_staff=True)
+        self.client.force_login(self.user)
+        university = set_up_university(DAYS, student=False)
+        self.faculty, self.group = university['faculty'], university['group']
+        other_group = Group.objects.create(title='8.1', faculty=Faculty.objects.create(title='History'))
+        self.truant = Student.objects.create(full_name='Truant', group=self.group)
+        self.regular = Student.objects.create(full_name='Regular', group=self.group)
+        outsider = Student.objects.create(full_name='Outsider', group=other_group)
+        for number, lesson in enumerate(university['lessons']):
+            lesson.groups.add(other_group)
+            # the truant misses three of four lessons, the regular student the last one
+            Mark.objects.create(lesson=lesson, student=self.truant,
+                                presence='Н' if number else None, mark=None if number else 4)
+            Mark.objects.create(lesson=lesson, student=self.regular,
+                                presence='Н' if number == 3 else None, mark=None if number == 3 else 5)
+            Mark.objects.create(lesson=lesson, student=outsider, presence='Н')
+
+    def test_by_student(self):
+        rows = {row['full_name']: row for row in attendance.report({'faculty': str(self.faculty.id)})}
+        self.assertEqual(set(rows), {'Truant', 'Regular'})
+        self.assertEqual((rows['Truant']['lessons'], rows['Truant']['absences']), (4, 3))
+        self.assertEqual(rows['Regular']['rate'], 0.25)
+
+    def test_by_group_and_week(self):
+        [group] = attendance.report({'faculty': str(self.faculty.id)}, 'group')
+        self.assertEqual((group['title'], group['lessons'], group['absences']), ('7.1', 8, 4))
+        weeks = attendance.report({'group': str(self.group.id)}, 'week')
+        self.assertEqual([str(row['week']) for row in weeks], ['2023-04-03', '2023-04-10'])
+        self.assertEqual([row['absences'] for row in weeks], [1, 3])
+
+    def test_above_threshold(self):
+        rows = attendance.report({}, above=0.5)
+        self.assertEqual([row['full_name'] for row in rows], ['Outsider', 'Truant'])
+
+    def test_view(self):
+        response = self.client.get(reverse('attendance'), {'faculty': self.faculty.id, 'above': '0.5'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['full_name'] for row in response.json()['results']], ['Truant'])
+        self.assertEqual(self.client.get(reverse('attendance'), {'by': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('attendance'), {'above': 'x'}).status_code, 400)
+
+    def test_forbidden_for_regular_users(self):
+        User.objects.create_user(username='plain', password='plain')
+        self.client.login(username='plain', password='plain')
+        self.assertEqual(self.client.get(reverse('attendance')).status_code, 403)
+
+    def test_command_and_benchmark(self):
+        out = StringIO()
+        call_command('attendance_report', '--by', 'group', stdout=out)
+        self.assertEqual(len([json.loads(line) for line in out.getvalue().splitlines()]), 2)
+        out = StringIO()
+        call_command('attendance_report', '--benchmark', stdout=out)
+        self.assertIn('marks: 12, students: 3', out.getvalue())
@@ -0,0 +1,38 @@
+import logging
+from django.test import TestCase
+from university_app import benchmark
+from university_app.roles import SUPERUSER
+
+SIZES = {
+    'faculties': 1, 'groups_per_faculty': 2, 'students_per_group': 3, 'subjects': 4,
+    'subjects_per_group': 2, 'teachers_per_faculty': 2, 'weeks': 1,
+}
+
+
+class BenchmarkTests(TestCase):
+
+    def setUp(self):
+        logger = logging.getLogger('django.request')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.ERROR)
+
+    def test_every_route_for_every_role(self):
+        results = benchmark.run('tiny', SIZES, repeat=2)
+        routes = {result['route'] for result in results}
+        self.assertEqual(len(results), len(routes) * len(benchmark.ROLES))
+        self.assertTrue({'marks', 'lesson', 'gradebook', 'rest/mark-list', 'rest/mark-detail',
+                         'rest/gradeaggregate-groups'} <= routes)
+        for result in results:
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            if result['role'] == SUPERUSER:
+                self.assertEqual(result['status'], 200, result['route'])
+        self.assertTrue(any(result['rows'] for result in results))
+
+    def test_compare(self):
+        before = {'scale': 'small', 'role': SUPERUSER, 'route': 'marks', 'status': 200,
+                  'p50_ms': 10, 'p95_ms': 12, 'queries': 5, 'rows': 40}
+        self.assertEqual(benchmark.compare([dict(before, p95_ms=13, rows=30)], [before]), [])
+        regressions = benchmark.compare([dict(before, p95_ms=20, queries=25)], [before])
+        self.assertEqual(regressions, ['small superuser marks: queries 5 -> 25',
+                                       'small superuser marks: p95_ms 12 -> 20'])
@@ -0,0 +1,146 @@
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from university_app.models import Faculty, Lesson, TableVersion, BulkSignalQuerySet
+from university_app import versions
+from .attrs import commit, set_up_university
+
+
+class ConditionalRestTests(APITestCase):
+    url = '/rest/lesson/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='poller', password='poller')
+        self.client.force_authenticate(self.user)
+        # a lesson of no group yet: the tests link it
+        university = set_up_university((), student=False)
+        self.group, self.subject, self.teacher = university['group'], university['subject'], university['teacher']
+        self.lesson = Lesson.objects.create(
+            day='2023-04-07', precise_time='09:45:00', subject=self.subject, teacher=self.teacher)
+        commit()
+
+    def etag(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_not_modified_costs_one_query(self):
+        etag = self.etag()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_retrieve(self):
+        url = f'{self.url}{self.lesson.id}/'
+        etag = self.etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_writes_change_etag(self):
+        etag = self.etag()
+        self.lesson.groups.add(self.group)
+        commit()
+        etag_after_m2m = self.etag()
+        self.assertNotEqual(etag, etag_after_m2m)
+        self.subject.title = 'English B2'
+        self.subject.save()
+        commit()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag_after_m2m).status_code, 200)
+
+    def test_unrelated_write_keeps_etag(self):
+        etag = self.etag('/rest/faculty/')
+        self.lesson.delete()
+        commit()
+        self.assertEqual(self.client.get('/rest/faculty/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_depends_on_representation_and_user(self):
+        etag = self.etag()
+        self.assertNotEqual(etag, self.etag(HTTP_ACCEPT='text/html'))
+        self.assertNotEqual(etag, self.etag(f'{self.url}?day=2023-04-07'))
+        self.client.force_authenticate(User.objects.create_user(username='other', password='other'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_bulk_create_bumps(self):
+        before = TableVersion.objects.get(table='faculty').version
+        Faculty.objects.bulk_create(Faculty(title=f'Faculty {number}') for number in range(3))
+        commit()
+        self.assertEqual(TableVersion.objects.get(table='faculty').version, before + 1)
+
+    def test_bulk_writes_bump_every_tracked_model(self):
+        for cls_model in versions.TRACKED_MODELS:
+            self.assertIs(type(cls_model.objects.all()), BulkSignalQuerySet, cls_model)
+        before = TableVersion.objects.get(table='lesson').version
+        Lesson.objects.bulk_create([Lesson(day='2023-04-08', precise_time='09:45:00',
+                                           subject=self.subject, teacher=self.teacher)])
+        commit()
+        Lesson.objects.filter(day='2023-04-08').update(precise_time='10:00:00')
+        commit()
+        self.assertEqual(TableVersion.objects.get(table='lesson').version, before + 2)
+
+    def test_m2m_remove_bumps(self):
+        self.lesson.groups.add(self.group)
+        commit()
+        before = TableVersion.objects.get(table='lesson_to_class').version
+        self.lesson.groups.remove(self.group)
+        commit()
+        self.assertEqual(TableVersion.objects.get(table='lesson_to_class').version, before + 1)
+
+    def test_missing_row_bumped(self):
+        TableVersion.objects.filter(table='faculty').delete()
+        versions.bump(Faculty)
+        commit()
+        versions.bump(Faculty)
+        commit()
+        self.assertEqual(TableVersion.objects.get(table='faculty').version, 2)
+
+    def test_cascade_bumps_once(self):
+        Lesson.objects.bulk_create(Lesson(day='2023-04-08', precise_time='09:45:00', subject=self.subject,
+                                          teacher=self.teacher) for _ in range(3))
+        commit()
+        before = TableVersion.objects.get(table='lesson').version
+        with CaptureQueriesContext(connection) as context:
+            self.teacher.delete()
+            commit()
+        bumps = [query for query in context if query['sql'].startswith(f'UPDATE "{TableVersion._meta.db_table}"')]
+        self.assertEqual(len(bumps), 1)
+        self.assertEqual(TableVersion.objects.get(table='lesson').version, before + 1)
+
+    def test_rolled_back_write_keeps_version(self):
+        before = TableVersion.objects.get(table='faculty').version
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Faculty.objects.create(title='History')
+            raise RuntimeError
+        commit()
+        self.assertEqual(TableVersion.objects.get(table='faculty').version, before)
+
+    def test_plan_models(self):
+        self.assertEqual(versions.tables(versions.plan_models(Lesson, ((), ('groups',)))),
+                         ('class', 'lesson', 'lesson_to_class'))
+
+
+class ConditionalEntityTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='reader', password='reader')
+        self.client.force_login(user)
+        self.faculty = Faculty.objects.create(title='Linguistics')
+        commit()
+
+    def test_entity_page(self):
+        url = f'/faculty/?id={self.faculty.id}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.faculty.description = 'Languages'
+        self.faculty.save()
+        commit()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
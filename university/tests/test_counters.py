@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from university_app.models import Student, Dashboard
+from university_app import counters
+from io import StringIO
+from .attrs import commit, set_up_university
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        counters.reconcile()
+        university = set_up_university((), student=False)
+        self.faculty, self.group = university['faculty'], university['group']
+        commit()
+
+    def test_incremental_updates(self):
+        Student.objects.create(full_name='Steven Wright', group=self.group)
+        commit()
+        self.assertEqual(counters.get_counts(), {
+            'faculties': 1, 'groups': 1, 'teachers': 1, 'students': 1})
+
+    def test_bulk_create(self):
+        Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(5))
+        commit()
+        self.assertEqual(counters.get_counts()['students'], 5)
+
+    def test_bulk_create_ignoring_conflicts(self):
+        students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(3))
+        Student.objects.bulk_create(students, ignore_conflicts=True)
+        commit()
+        self.assertEqual(counters.get_counts()['students'], 3)
+
+    def test_invalidated_on_commit(self):
+        self.assertEqual(counters.get_counts()['students'], 0)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Student.objects.create(full_name='Steven Wright', group=self.group)
+            # the cached counts stay until the write commits
+            self.assertEqual(counters.get_counts()['students'], 0)
+        self.assertTrue(callbacks)
+        self.assertEqual(counters.get_counts()['students'], 1)
+
+    def test_cascade_delete(self):
+        Student.objects.create(full_name='Steven Wright', group=self.group)
+        self.faculty.delete()
+        commit()
+        self.assertEqual(counters.get_counts(), {
+            'faculties': 0, 'groups': 0, 'teachers': 0, 'students': 0})
+
+    def test_transaction_updates_dashboard_once(self):
+        Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(5))
+        commit()
+        with CaptureQueriesContext(connection) as context:
+            Student.objects.create(full_name='Steven Wright', group=self.group)
+            self.faculty.delete()
+            commit()
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith(f'UPDATE "{Dashboard._meta.db_table}"')]
+        self.assertEqual(len(updates), 1, updates)
+        self.assertEqual(counters.get_counts(), {
+            'faculties': 0, 'groups': 0, 'teachers': 0, 'students': 0})
+
+    def test_rolled_back_writes_leave_counts(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Student.objects.create(full_name='Steven Wright', group=self.group)
+            raise RuntimeError
+        commit()
+        self.assertEqual(counters.get_counts()['students'], 0)
+
+    def test_reconcile_command(self):
+        Dashboard.objects.update(students=42)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(counters.get_counts()['students'], 0)
+
+    def test_homepage_reads_one_row(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('homepage'))
+        self.assertEqual(resp.context['groups'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('homepage'))
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from university_app.models import Faculty, Group, Lesson, Student, Mark
+from io import StringIO
+import csv
+import json
+from .attrs import set_up_university
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='export', password='export', is_superuser=True)
+        self.client.force_login(self.user)
+        university = set_up_university(('2023-04-03', '2023-04-10'), student=False)
+        self.faculty, self.group = university['faculty'], university['group']
+        other_group = Group.objects.create(title='8.1', faculty=Faculty.objects.create(title='History'))
+        other_lesson = Lesson.objects.create(day='2023-04-03', precise_time='09:45:00',
+                                             subject=university['subject'], teacher=university['teacher'])
+        other_lesson.groups.add(other_group)
+        lessons = [(lesson, self.group) for lesson in university['lessons']] + [(other_lesson, other_group)]
+        for lesson, group in lessons:
+            student = Student.objects.create(full_name=f'Student {lesson.day}', group=group)
+            Mark.objects.create(mark=4, presence='Н', student=student, lesson=lesson)
+
+    def get_content(self, params):
+        response = self.client.get(reverse('export_marks'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_filtered_by_faculty(self):
+        rows = list(csv.DictReader(StringIO(self.get_content({'faculty': self.faculty.id}))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['faculty'] for row in rows}, {'Linguistics'})
+        self.assertEqual(rows[0]['presence'], 'Н')
+
+    def test_ndjson_date_window(self):
+        content = self.get_content({'format': 'ndjson', 'group': self.group.id,
+                                    'day__gte': '2023-04-05'})
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['day'] for row in rows], ['2023-04-10'])
+
+    def test_empty_csv_has_header(self):
+        content = self.get_content({'day__gte': '2030-01-01'})
+        self.assertEqual(content.splitlines(), [','.join(
+            ('id', 'student_id', 'student', 'group', 'faculty', 'subject', 'teacher',
+             'day', 'time', 'mark', 'presence', 'created', 'modified'))])
+
+    def test_bad_filter(self):
+        response = self.client.get(reverse('export_marks'), {'group': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_forbidden_for_regular_users(self):
+        User.objects.create_user(username='plain', password='plain')
+        self.client.login(username='plain', password='plain')
+        response = self.client.get(reverse('export_marks'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_marks', '--format', 'ndjson', '--to', '2023-04-05', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework import status
+from university_app.models import Group, Mark
+from .attrs import set_up_university
+
+
+class FilterTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='filters', password='filters', is_superuser=True)
+        self.client.force_authenticate(self.user)
+        university = set_up_university(('2023-04-03', '2023-04-05', '2023-04-07'))
+        self.group, self.teacher = university['group'], university['teacher']
+        self.lessons, self.student = university['lessons'], university['student']
+        self.other_group = Group.objects.create(title='7.2', faculty=university['faculty'])
+        for lesson in self.lessons:
+            lesson.groups.add(self.other_group)
+        for mark, lesson in zip((3, 4, 5), self.lessons):
+            Mark.objects.create(mark=mark, student=self.student, lesson=lesson)
+
+    def get_results(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()['results']
+
+    def test_range(self):
+        lessons = self.get_results(
+            '/rest/lesson/', {'day__gte': '2023-04-04', 'day__lte': '2023-04-06'})
+        self.assertEqual([lesson['day'] for lesson in lessons], ['2023-04-05'])
+        marks = self.get_results('/rest/mark/', {'mark__gte': 4})
+        self.assertEqual(sorted(mark['mark'] for mark in marks), [4, 5])
+
+    def test_related_range(self):
+        marks = self.get_results('/rest/mark/', {'lesson__day__lt': '2023-04-05'})
+        self.assertEqual([mark['mark'] for mark in marks], [3])
+
+    def test_in(self):
+        ids = f'{self.lessons[0].id},{self.lessons[2].id}'
+        marks = self.get_results('/rest/mark/', {'lesson__in': ids})
+        self.assertEqual(sorted(mark['mark'] for mark in marks), [3, 5])
+
+    def test_many_to_many_in_is_distinct(self):
+        groups = f'{self.group.id},{self.other_group.id}'
+        lessons = self.get_results('/rest/lesson/', {'groups__in': groups})
+        self.assertEqual(len(lessons), 3)
+
+    def test_exact_serializer_field(self):
+        teachers = self.get_results('/rest/teacher/', {'full_name': 'Dennis Keller'})
+        self.assertEqual(len(teachers), 1)
+
+    def test_invalid_value(self):
+        response = self.client.get('/rest/lesson/', {'day__gte': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('day__gte', response.json())
+        response = self.client.get('/rest/mark/', {'student': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_params_are_ignored(self):
+        self.assertEqual(len(self.get_results('/rest/mark/', {'unknown': 1})), 3)
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from university_app.models import Subject, Lesson, Student, Mark
+from university_app.gradebook import Gradebook
+from .attrs import set_up_university
+
+STUDENTS = 40
+LESSONS = 60
+START = date(2023, 2, 1)
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='journal', password='journal', is_superuser=True)
+        self.client.force_login(self.user)
+        university = set_up_university(
+            [START + timedelta(days=number) for number in range(LESSONS)], student=False)
+        self.group, self.subject, self.lessons = university['group'], university['subject'], university['lessons']
+        teacher = university['teacher']
+        other_subject = Subject.objects.create(title='History')
+        self.group.subjects.add(self.subject, other_subject)
+        teacher.subjects.add(self.subject, other_subject)
+        self.students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number:02}', group=self.group) for number in range(STUDENTS))
+        other = Lesson.objects.create(day=START, precise_time='11:30:00',
+                                      subject=other_subject, teacher=teacher)
+        other.groups.add(self.group)
+        marks = [Mark(lesson=lesson, student=student, mark=(row + column) % 5 + 1)
+                 for row, student in enumerate(self.students)
+                 for column, lesson in enumerate(self.lessons) if column % 3]
+        marks.append(Mark(lesson=self.lessons[0], student=self.students[1], presence='Н'))
+        marks.append(Mark(lesson=other, student=self.students[0], mark=2))
+        Mark.objects.bulk_create(marks)
+
+    def params(self, **extra):
+        return {'group': self.group.id, 'subject': self.subject.id,
+                'start': START.isoformat(), 'days': LESSONS, **extra}
+
+    def test_matrix(self):
+        with self.assertNumQueries(3):
+            book = Gradebook.build(self.group.id, self.subject.id, START, LESSONS)
+        self.assertEqual(book.marks.shape, (STUDENTS, LESSONS))
+        self.assertEqual(book.marks[2, 4], (2 + 4) % 5 + 1)
+        self.assertEqual(book.marks[2, 3], 0)
+        labels = book.labels()
+        self.assertEqual((labels[1][0], labels[0][0]), ('Н', ''))
+
+    def test_date_window(self):
+        book = Gradebook.build(self.group.id, self.subject.id, START + timedelta(days=10), 7)
+        self.assertEqual([day for _, day, _ in book.lessons],
+                         [START + timedelta(days=number) for number in range(10, 17)])
+        self.assertEqual((book.previous_start(), book.next_start()),
+                         (START + timedelta(days=3), START + timedelta(days=17)))
+
+    def test_page(self):
+        response = self.client.get(reverse('gradebook'), self.params())
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td>Student 39</td>')
+
+    def test_json(self):
+        response = self.client.get(reverse('gradebook'), self.params(format='json'))
+        data = response.json()
+        self.assertEqual((len(data['students']), len(data['lessons'])), (STUDENTS, LESSONS))
+        self.assertTrue(data['absent'][1][0])
+
+    def test_bad_params(self):
+        response = self.client.get(reverse('gradebook'), {'group': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_forbidden_for_students(self):
+        user = User.objects.create_user(username='student', password='student')
+        self.students[0].user = user
+        self.students[0].save()
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('gradebook'), self.params()).status_code, 403)
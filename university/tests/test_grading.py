@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from university_app.forms import GradeLessonForm
+from university_app.models import Group, Student, Mark
+import json
+from uuid import uuid4
+from .attrs import set_up_university
+
+STUDENTS = 30
+
+
+class GradingTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='grading', password='grading', is_superuser=True)
+        self.client.force_authenticate(self.user)
+        university = set_up_university(student=False)
+        group, (self.lesson,) = university['group'], university['lessons']
+        other_group = Group.objects.create(title='7.2', faculty=university['faculty'])
+        self.students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number:02}', group=group) for number in range(STUDENTS))
+        self.outsider = Student.objects.create(full_name='Outsider', group=other_group)
+        self.url = f'/rest/lesson/{self.lesson.id}/grade/'
+
+    def post(self, entries):
+        return self.client.post(self.url, data=json.dumps(entries), content_type='application/json')
+
+    def test_rest_grades_whole_lesson(self):
+        entries = [{'student': str(student.id), 'mark': 5} for student in self.students]
+        entries[0] = {'student': str(self.students[0].id), 'presence': 'Н'}
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(entries)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Mark.objects.filter(lesson=self.lesson).count(), STUDENTS)
+        # constant in the number of students, grade aggregate upkeep and the
+        # already-marked check under the lesson lock included
+        self.assertLess(len(context), 16)
+
+    def test_rest_rejects_outsider(self):
+        entries = [{'student': str(self.students[0].id), 'mark': 5},
+                   {'student': str(self.outsider.id), 'mark': 4}]
+        response = self.post(entries)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Mark.objects.exists())
+
+    def test_rest_rejects_unknown_student(self):
+        student_id = uuid4()
+        response = self.post([{'student': str(student_id), 'mark': 4}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), [f'The student {student_id} does not exist'])
+
+    def test_form_rejects_removed_student(self):
+        # the form lists the lesson's students when it is built
+        student_id = self.students[0].id
+        form = GradeLessonForm(self.lesson, data={f'mark_{student_id}': '4'})
+        self.students[0].delete()
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [f'The student {student_id} does not exist'])
+
+    def test_rest_rejects_empty_entry(self):
+        response = self.post([{'student': str(self.students[0].id)}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_form(self):
+        data = {f'mark_{student.id}': '4' for student in self.students[:10]}
+        data[f'presence_{self.students[10].id}'] = 'Н'
+        form = GradeLessonForm(self.lesson, data=data)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(len(form.save()), 11)
+        self.assertEqual(Mark.objects.filter(presence='Н').count(), 1)
+
+    def test_form_resubmitted(self):
+        self.client.force_login(self.user)
+        url = f'/lesson/grade/?id={self.lesson.id}'
+        data = {f'mark_{student.id}': '4' for student in self.students[:3]}
+        self.assertEqual(self.client.post(url, data).status_code, status.HTTP_302_FOUND)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(f'The student {self.students[0].full_name} is already marked for this lesson',
+                      response.context['form_errors'])
+        self.assertEqual(Mark.objects.filter(lesson=self.lesson).count(), 3)
+
+    def test_rest_resubmitted(self):
+        entries = [{'student': str(student.id), 'mark': 5} for student in self.students[:2]]
+        self.assertEqual(self.post(entries).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post(entries).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Mark.objects.filter(lesson=self.lesson).count(), 2)
+
+    def test_form_saved_meanwhile(self):
+        # both forms pass validation; the second save finds the marks already there
+        data = {f'mark_{self.students[0].id}': '4'}
+        first, second = GradeLessonForm(self.lesson, data=data), GradeLessonForm(self.lesson, data=data)
+        self.assertTrue(first.is_valid() and second.is_valid())
+        first.save()
+        with self.assertRaises(ValidationError):
+            second.save()
+        self.assertEqual(Mark.objects.filter(lesson=self.lesson).count(), 1)
+
+    def test_view(self):
+        self.client.force_login(self.user)
+        url = f'/lesson/grade/?id={self.lesson.id}'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.post(url, {f'mark_{self.students[0].id}': '3'})
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(Mark.objects.get().mark, 3)
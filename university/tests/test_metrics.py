@@ -0,0 +1,148 @@
+from tempfile import TemporaryDirectory
+from os import getpid, listdir, path
+import json
+import threading
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from university_app.metrics import CACHE_LOOKUPS, CONTENT_TYPE, DURATION, QUERIES, REQUESTS, Registry, registry
+from university_app.models import Faculty
+from university_app import pagecache
+from .attrs import commit
+
+
+def total(name: str, labels: tuple, index: int = 0) -> float:
+    values = registry.collect().get((name, labels))
+    return values[index] if values else 0
+
+
+def requests(route: str, status: int = 200, method: str = 'GET') -> float:
+    return total(REQUESTS, (('route', route), ('method', method), ('status', str(status))))
+
+
+class RegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+        self.registry.counter('hits_total', 'Hits.')
+        self.registry.histogram('latency_seconds', 'Latency.', (0.1, 1))
+
+    def test_render(self):
+        self.registry.inc('hits_total', (('route', 'a"b'),), 2)
+        for value in (0.05, 0.1, 0.5, 3):
+            self.registry.observe('latency_seconds', value)
+        self.assertEqual(self.registry.render(self.registry.collect()), '\n'.join((
+            '# HELP hits_total Hits.',
+            '# TYPE hits_total counter',
+            'hits_total{route="a\\"b"} 2',
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 3.65',
+            'latency_seconds_count 4',
+        )) + '\n')
+
+    def test_threads(self):
+        def work():
+            for _ in range(1000):
+                self.registry.inc('hits_total')
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        self.registry.inc('hits_total')
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.registry.collect()[('hits_total', ())], [4001])
+        # finished threads are folded in and dropped
+        self.assertEqual(len(self.registry.shards), 1)
+        self.assertEqual(self.registry.collect()[('hits_total', ())], [4001])
+
+    def test_processes(self):
+        self.registry.inc('hits_total', (('route', 'a'),))
+        with TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            with open(path.join(directory, f'{getpid() + 1}.json'), 'w') as file:
+                json.dump([['hits_total', [['route', 'a']], [2]], ['latency_seconds', [], [1, 0, 0, 0.05]]], file)
+            totals = self.registry.gather()
+            self.assertTrue(path.exists(path.join(directory, f'{getpid()}.json')))
+        self.assertEqual(totals[('hits_total', (('route', 'a'),))], [3])
+        self.assertEqual(totals[('latency_seconds', ())], [1, 0, 0, 0.05])
+
+    def test_concurrent_flushes(self):
+        self.registry.inc('hits_total')
+        errors = []
+        with TemporaryDirectory() as directory:
+            def work():
+                for _ in range(100):
+                    try:
+                        self.registry.flush(directory)
+                    except OSError as error:
+                        errors.append(error)
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            with self.assertNoLogs('university_app.metrics'):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(listdir(directory), [f'{getpid()}.json'])
+
+    def test_unwritable_directory_is_logged(self):
+        with TemporaryDirectory() as directory:
+            missing = path.join(directory, 'missing')
+            with self.assertLogs('university_app.metrics', 'WARNING'):
+                self.registry.flush(missing)
+
+
+class MetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        Faculty.objects.create(title='Faculty of Metrics')
+        pagecache.get_cache().clear()
+        user = User.objects.create_superuser('metered', 'metered@example.com', None)
+        self.client.force_login(user)
+        self.async_client.force_login(user)
+        commit()
+
+    def test_routes(self):
+        before = requests('faculties'), requests('rest/mark-list'), requests('unmatched', 404)
+        queries = total(QUERIES, (('route', 'faculties'),), -1)
+        self.client.get('/faculties/')
+        self.client.get('/rest/mark/')
+        self.client.get('/missing/')
+        self.assertEqual((requests('faculties'), requests('rest/mark-list'), requests('unmatched', 404)),
+                         tuple(count + 1 for count in before))
+        self.assertGreater(total(QUERIES, (('route', 'faculties'),), -1), queries)
+
+    def test_page_cache_hits(self):
+        labels = (('cache', 'pages'), ('result', 'hit'))
+        hits = total(CACHE_LOOKUPS, labels)
+        self.client.get('/faculties/')
+        self.client.get('/faculties/')
+        self.assertEqual(total(CACHE_LOOKUPS, labels), hits + 1)
+
+    async def test_async_request(self):
+        queries = total(QUERIES, (('route', 'faculties'),), -1)
+        response = await self.async_client.get('/faculties/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(total(QUERIES, (('route', 'faculties'),), -1), queries)
+
+    def test_endpoint(self):
+        self.client.get('/faculties/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn(f'# TYPE {DURATION} histogram', text)
+        self.assertIn(f'{REQUESTS}{{route="faculties",method="GET",status="200"}}', text)
+        self.assertIn(f'{DURATION}_bucket{{route="faculties",le="+Inf"}}', text)
+
+    def test_flush_errors_do_not_fail_requests(self):
+        registry.next_flush = 0
+        with TemporaryDirectory() as directory, override_settings(METRICS_DIR=path.join(directory, 'missing')):
+            with self.assertLogs('university_app.metrics', 'WARNING'):
+                self.assertEqual(self.client.get('/faculties/').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
@@ -0,0 +1,91 @@
+from unittest import mock
+import os
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.runner import DiscoverRunner
+from university_app.models import Group, Lesson, Mark
+from university_app.nplusone import Detector, NPlusOneDetected
+from university_app import pagecache, seeding, views
+from .runner import NPlusOneRunner
+
+SIZES = {'faculties': 1, 'groups_per_faculty': 2, 'students_per_group': 3, 'subjects': 2,
+         'subjects_per_group': 2, 'teachers_per_faculty': 1, 'subjects_per_teacher': 2,
+         'weeks': 1, 'lessons_per_week': 1}
+RATES = {'absence': 0, 'grade': 1, 'hometask': 0}
+
+
+@override_settings(NPLUSONE_MODE='raise', NPLUSONE_THRESHOLD=3)
+class NPlusOneTests(TestCase):
+
+    def setUp(self):
+        seeding.seed(SIZES, RATES)
+        cache.clear()
+        pagecache.get_cache().clear()
+        self.client.force_login(User.objects.create_superuser('detected', 'detected@example.com', None))
+
+    def test_lazy_relations_raise(self):
+        with mock.patch.dict(views.CATALOG_RELATED, {Mark: ()}):
+            with self.assertRaises(NPlusOneDetected) as raised:
+                self.client.get('/marks/')
+        message = str(raised.exception)
+        self.assertTrue(message.startswith('GET /marks/'))
+        self.assertIn("Mark.student is loaded per row: select_related('student') on the Mark queryset", message)
+        self.assertIn("Lesson.subject is loaded per row: select_related('lesson__subject') on the Mark queryset",
+                      message)
+        self.assertIn('catalog/marks.html:13', message)
+        self.assertIn('university_app/models.py:', message)
+
+    @override_settings(NPLUSONE_MODE='log')
+    def test_log_mode(self):
+        with mock.patch.dict(views.CATALOG_RELATED, {Mark: ()}):
+            with self.assertLogs('university_app.nplusone', 'WARNING') as logs:
+                response = self.client.get('/marks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("select_related('lesson__subject')", '\n'.join(logs.output))
+
+    def test_related_catalog_passes(self):
+        with self.assertNoLogs('university_app.nplusone'):
+            self.assertEqual(self.client.get('/marks/').status_code, 200)
+
+    def test_lesson_page_groups(self):
+        lesson = Lesson.objects.first()
+        faculty = Group.objects.first().faculty
+        Group.objects.bulk_create(Group(title=f'9.{number}', faculty=faculty) for number in range(3))
+        lesson.groups.set(Group.objects.all())
+        url = f'/lesson/?id={lesson.id}'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with mock.patch.dict(views.ENTITY_RELATED, {Lesson: ((), ())}):
+            with self.assertRaises(NPlusOneDetected) as raised:
+                self.client.get(url)
+        self.assertIn('Group.faculty is loaded per row', str(raised.exception))
+
+    @override_settings(NPLUSONE_MODE='off')
+    def test_off(self):
+        with mock.patch.dict(views.CATALOG_RELATED, {Mark: ()}):
+            self.assertEqual(self.client.get('/marks/').status_code, 200)
+
+    def test_python_call_site(self):
+        with Detector(2) as detecting:
+            for group in Group.objects.all():
+                list(group.student_set.all())
+        detection, = detecting.detections()
+        self.assertEqual(detection.count, Group.objects.count())
+        self.assertTrue(detection.site.startswith('tests/test_nplusone.py:'))
+        self.assertIsNone(detection.template)
+        self.assertEqual(detection.suggestion([detection]),
+                         "Group.student_set is loaded per row: prefetch_related('student_set') on the Group queryset")
+
+
+class RunnerTests(SimpleTestCase):
+
+    def test_runner_raises(self):
+        with override_settings(NPLUSONE_MODE='log'), mock.patch.dict(os.environ), \
+                mock.patch.object(DiscoverRunner, 'setup_test_environment'):
+            os.environ.pop('NPLUSONE_MODE', None)
+            NPlusOneRunner().setup_test_environment()
+            self.assertEqual(settings.NPLUSONE_MODE, 'raise')
+            os.environ['NPLUSONE_MODE'] = 'off'
+            NPlusOneRunner().setup_test_environment()
+            self.assertEqual(settings.NPLUSONE_MODE, 'off')
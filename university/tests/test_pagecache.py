@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from university_app.models import Faculty, Group, Student
+from university_app.pagecache import get_cache
+from .attrs import commit, set_up_university
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_cache().clear()
+        university = set_up_university()
+        self.faculty, self.group, self.subject = university['faculty'], university['group'], university['subject']
+        self.teacher, self.student = university['teacher'], university['student']
+        self.lesson, = university['lessons']
+        self.user = User.objects.create_user(username='reader', password='reader')
+        self.student.user = self.user
+        self.student.save()
+        self.client.force_login(self.user)
+        commit()
+
+    def test_hit_skips_rendering_queries(self):
+        url = f'/group/?id={self.group.id}'
+        first = self.client.get(url)
+        # session, user and the version read
+        with self.assertNumQueries(3):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_m2m_write_refreshes_page(self):
+        url = f'/group/?id={self.group.id}'
+        self.assertNotContains(self.client.get(url), 'English')
+        self.group.subjects.add(self.subject)
+        commit()
+        self.assertContains(self.client.get(url), 'English')
+
+    def test_catalog_sees_new_rows(self):
+        self.assertContains(self.client.get('/faculties/'), 'Linguistics')
+        Faculty.objects.create(title='History')
+        commit()
+        self.assertContains(self.client.get('/faculties/'), 'History')
+
+    def test_roles_do_not_share_pages(self):
+        self.assertContains(self.client.get('/lessons/'), 'English')
+        other = User.objects.create_user(username='other', password='other')
+        Student.objects.create(full_name='Elsewhere', group=Group.objects.create(
+            title='8.1', faculty=self.faculty), user=other)
+        commit()
+        self.client.force_login(other)
+        self.assertNotContains(self.client.get('/lessons/'), 'English')
+
+    def test_pages_with_forms_are_not_cached(self):
+        teacher_user = User.objects.create_user(username='teacher', password='teacher')
+        self.teacher.user = teacher_user
+        self.teacher.save()
+        commit()
+        self.client.force_login(teacher_user)
+        url = f'/lesson/?id={self.lesson.id}'
+        self.assertContains(self.client.get(url), 'csrfmiddlewaretoken')
+        with CaptureQueriesContext(connection) as context:
+            self.assertContains(self.client.get(url), 'csrfmiddlewaretoken')
+        self.assertGreater(len(context), 3)
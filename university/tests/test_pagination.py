@@ -0,0 +1,74 @@
+from base64 import urlsafe_b64encode
+import json
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from university_app.models import Lesson
+from .attrs import set_up_university
+
+
+class KeysetPaginationTests(APITestCase):
+    url = '/rest/lesson/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pages', password='pages', is_superuser=True)
+        self.client.force_authenticate(self.user)
+        university = set_up_university((), student=False)
+        subject, teacher = university['subject'], university['teacher']
+        # several lessons share a day, so the id part of the key matters
+        self.lessons = Lesson.objects.bulk_create(
+            Lesson(day=f'2023-04-{number // 3 + 1:02}', precise_time='09:45:00',
+                   subject=subject, teacher=teacher)
+            for number in range(25)
+        )
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_offset_mode_is_default(self):
+        page = self.get(self.url)
+        self.assertEqual(page['count'], 25)
+
+    def test_walk_forward_and_back(self):
+        page = self.get(self.url, {'cursor': '', 'limit': 10})
+        self.assertNotIn('count', page)
+        self.assertIsNone(page['previous'])
+        pages = [page]
+        while page['next']:
+            page = self.get(page['next'])
+            pages.append(page)
+        ids = [lesson['id'] for page in pages for lesson in page['results']]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(set(ids), {str(lesson.id) for lesson in self.lessons})
+        days = [lesson['day'] for page in pages for lesson in page['results']]
+        self.assertEqual(days, sorted(days))
+        back = self.get(pages[-1]['previous'])
+        self.assertEqual(back['results'], pages[1]['results'])
+        back = self.get(back['previous'])
+        self.assertEqual(back['results'], pages[0]['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_no_count_query(self):
+        page = self.get(self.url, {'cursor': '', 'limit': 10})
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(page['next'])
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in context.captured_queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_malformed_cursor_values(self):
+        lesson = self.lessons[0]
+        for position in (['2023-04-01', 'not-a-uuid', 0], ['not-a-date', str(lesson.id), 0],
+                         ['2023-04-01', str(lesson.id), 2], {'day': 1, 'id': 2, 'reverse': 3}):
+            cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
@@ -0,0 +1,56 @@
+import json
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from university_app.models import Faculty
+
+
+@override_settings(PROFILER_SAMPLE_RATE=1)
+class ProfilerTests(TestCase):
+
+    def setUp(self):
+        for number in range(3):
+            Faculty.objects.create(title=f'Faculty {number:02}')
+        self.user = User.objects.create_superuser('profiled', 'profiled@example.com', 'profiled')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def profile(self, path: str) -> tuple:
+        with self.assertLogs('university_app.profiler', 'INFO') as logs:
+            response = self.client.get(path)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_catalog(self):
+        response, summary = self.profile('/faculties/')
+        self.assertEqual((summary['route'], summary['status']), ('faculties', 200))
+        self.assertGreater(summary['queries'], 0)
+        self.assertGreater(summary['template_ms'], 0)
+        self.assertEqual(summary['serializer_ms'], 0)
+        timing = response['Server-Timing']
+        self.assertIn(f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertIn(f'total;dur={summary["total_ms"]}', timing)
+
+    def test_viewset(self):
+        response, summary = self.profile('/rest/faculty/')
+        self.assertEqual(summary['route'], 'faculty-list')
+        self.assertGreater(summary['serializer_ms'], 0)
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+
+    async def test_async_request(self):
+        with self.assertLogs('university_app.profiler', 'INFO') as logs:
+            response = await self.async_client.get('/faculties/')
+        summary = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((response.status_code, summary['status']), (200, 200))
+        self.assertGreater(summary['queries'], 0)
+
+    @override_settings(PROFILER_SAMPLE_RATE=0)
+    def test_unsampled(self):
+        with self.assertNoLogs('university_app.profiler'):
+            response = self.client.get('/faculties/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(PROFILER_SERVER_TIMING=False)
+    def test_log_only(self):
+        response, summary = self.profile('/about/')
+        self.assertEqual(summary['route'], 'about')
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,30 @@
+from django.test import TestCase
+from university_app.models import Faculty
+from university_app.queries import QueryLog
+
+
+class QueryLogTests(TestCase):
+
+    def setUp(self):
+        Faculty.objects.bulk_create(Faculty(title=f'Faculty {number}') for number in range(5))
+
+    def test_counts_queries_and_rows(self):
+        with QueryLog(rows=True) as log:
+            list(Faculty.objects.all())
+            Faculty.objects.filter(title='Faculty 1').first()
+            list(Faculty.objects.values_list('title', flat=True).iterator(chunk_size=2))
+        self.assertEqual(len(log), 3)
+        self.assertEqual([query.rows for query in log], [5, 1, 5])
+        self.assertEqual(log.rows, 11)
+        self.assertGreater(log.duration, 0)
+
+    def test_nested_logs(self):
+        with QueryLog(rows=True) as outer:
+            with QueryLog(rows=True) as inner:
+                list(Faculty.objects.all())
+            list(Faculty.objects.all())
+        self.assertEqual((len(inner), inner.rows), (1, 5))
+        self.assertEqual((len(outer), outer.rows), (2, 10))
+        with QueryLog() as plain:
+            list(Faculty.objects.all())
+        self.assertEqual((len(plain), plain.rows), (1, 0))
@@ -0,0 +1,93 @@
+import logging
+from django.core.cache import cache
+from django.test import Client, TestCase
+from university_app.models import Faculty, Group, Teacher, Mark
+from university_app.queries import QueryBudgetExceeded, query_budget, report, shape
+from university_app import benchmark, pagecache, views
+from .attrs import commit
+from .budgets import BUDGETS
+
+SIZES = {
+    'small': {'faculties': 1, 'groups_per_faculty': 2, 'students_per_group': 2, 'subjects': 3,
+              'subjects_per_group': 2, 'teachers_per_faculty': 2, 'subjects_per_teacher': 2,
+              'weeks': 1, 'lessons_per_week': 1},
+    'large': {'faculties': 2, 'groups_per_faculty': 4, 'students_per_group': 8, 'subjects': 6,
+              'subjects_per_group': 3, 'teachers_per_faculty': 3, 'subjects_per_teacher': 2,
+              'weeks': 3, 'lessons_per_week': 2},
+}
+# every present student is marked and every lesson sets a hometask
+RATES = {'absence': 0.2, 'grade': 1, 'hometask': 1}
+# groups attending the sample lesson, so per-group relations grow with the data
+LESSON_GROUPS = {'small': 1, 'large': 3}
+
+
+class QueryBudgetTests(TestCase):
+
+    def setUp(self):
+        logger = logging.getLogger('django.request')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.ERROR)
+
+    def measure(self, size: str, failures: list) -> dict:
+        """Query logs of every route per role, failures for routes over budget."""
+        sample, logins = benchmark.prepare(SIZES[size], rates=RATES)
+        sample['lesson'].groups.add(*Group.objects.exclude(lesson=sample['lesson'])[:LESSON_GROUPS[size] - 1])
+        # the seeded versions commit, so pages take the cached path production does
+        commit()
+        logs = {}
+        for role in benchmark.ROLES:
+            client = Client()
+            client.force_login(logins[role])
+            for route, path in benchmark.routes(sample):
+                cache.clear()
+                pagecache.get_cache().clear()
+                budget = query_budget(BUDGETS.get(route, {}).get(role, 0), f'{size} data, {role}, {path}')
+                try:
+                    with budget:
+                        response = client.get(path)
+                        if response.streaming:
+                            b''.join(response.streaming_content)
+                except QueryBudgetExceeded as error:
+                    failures.append(str(error))
+                logs[role, route] = budget.log
+        return logs
+
+    def test_routes_within_budget_and_flat(self):
+        failures = []
+        small = self.measure('small', failures)
+        large = self.measure('large', failures)
+        for (role, route), log in large.items():
+            if route not in BUDGETS:
+                failures.append(f'{route}: no budget in tests/budgets.py')
+            if len(log) != len(small[role, route]):
+                failures.append(f'{role}, {route}: {len(small[role, route])} queries with small data, '
+                                f'{len(log)} with large data\n{report(log)}')
+        if failures:
+            self.fail('\n\n'.join(failures))
+
+    def test_budget_report(self):
+        Faculty.objects.create(title='Linguistics')
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget(2, 'faculties'):
+                for _ in range(3):
+                    Faculty.objects.filter(title='Linguistics').first()
+        message = str(raised.exception)
+        self.assertTrue(message.startswith('faculties: 3 queries, budget 2'))
+        self.assertIn('3 x SELECT', message)
+
+        @query_budget(1)
+        def count():
+            return Faculty.objects.count()
+        self.assertEqual(count(), 1)
+
+    def test_shape(self):
+        self.assertEqual(
+            shape('SELECT "id" FROM "mark" WHERE ("lesson_id" IN (%s, %s, %s) AND "mark" > 3)\n LIMIT 21'),
+            'SELECT "id" FROM "mark" WHERE ("lesson_id" IN (...) AND "mark" > ?) LIMIT ?')
+        self.assertEqual(shape("SELECT 'it''s', \"t2\".\"a\" FROM t2"), 'SELECT ?, "t2"."a" FROM t2')
+
+    def test_catalog_related(self):
+        # select_related() without fields would join every foreign key
+        self.assertNotIn('JOIN', str(views.with_catalog_related(Teacher.objects.all()).query))
+        self.assertEqual(views.with_catalog_related(Mark.objects.all()).query.select_related,
+                         {'student': {}, 'lesson': {'subject': {}}})
@@ -0,0 +1,81 @@
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from university_app.models import Faculty
+from university_app import replicas
+
+ALIASES = {
+    'working_replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    'broken_replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': '/nonexistent/dir/db.sqlite3'},
+}
+
+
+class ReplicaTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        configured = connections.configure_settings({'default': {}, **ALIASES})
+        connections.settings.update((alias, configured[alias]) for alias in ALIASES)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in ALIASES:
+            connections[alias].close()
+            del connections.settings[alias]
+        super().tearDownClass()
+
+    def setUp(self):
+        replicas.down_until.clear()
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+
+    def request(self, method='get'):
+        request = getattr(self.factory, method)('/faculties/')
+        request.session = SessionStore()
+        return request
+
+    def test_router_follows_request_alias(self):
+        self.assertEqual(self.router.db_for_read(Faculty), 'default')
+        token = replicas.read_alias.set('working_replica')
+        try:
+            self.assertEqual(self.router.db_for_read(Faculty), 'working_replica')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+            self.assertEqual(self.router.db_for_write(Faculty), 'default')
+        finally:
+            replicas.read_alias.reset(token)
+
+    @override_settings(REPLICA_DATABASES=['working_replica'])
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('working_replica', 'university_app'))
+        self.assertTrue(self.router.allow_migrate('default', 'university_app'))
+
+    @override_settings(REPLICA_DATABASES=['broken_replica', 'working_replica'])
+    def test_unavailable_replica_is_skipped(self):
+        self.assertEqual({replicas.choose_replica() for _ in range(3)}, {'working_replica'})
+        self.assertIn('broken_replica', replicas.down_until)
+
+    @override_settings(REPLICA_DATABASES=['broken_replica'])
+    def test_falls_back_to_primary(self):
+        self.assertIsNone(replicas.request_alias(self.request()))
+
+    @override_settings(REPLICA_DATABASES=['working_replica'])
+    def test_reads_after_a_write_stay_on_primary(self):
+        request = self.request()
+        self.assertEqual(replicas.request_alias(request), 'working_replica')
+        post = self.request('post')
+        post.session = request.session
+        post.session.save()
+        self.assertIsNone(replicas.request_alias(post))
+        replicas.after_response(post, HttpResponse(status=302))
+        self.assertIsNone(replicas.request_alias(request))
+
+    @override_settings(REPLICA_DATABASES=['working_replica'])
+    def test_middleware_scopes_the_alias_to_the_request(self):
+        seen = []
+        middleware = replicas.replica_middleware(
+            lambda request: seen.append(replicas.read_alias.get()) or HttpResponse())
+        middleware(self.request())
+        self.assertEqual(seen, ['working_replica'])
+        self.assertIsNone(replicas.read_alias.get())
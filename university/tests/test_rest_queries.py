@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from university_app.models import Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask
+
+
+def populate(amount: int):
+    for number in range(amount):
+        faculty = Faculty.objects.create(title=f'Faculty {number}')
+        group = Group.objects.create(title=f'{number}.1', faculty=faculty)
+        subject = Subject.objects.create(title=f'Subject {number}')
+        teacher = Teacher.objects.create(
+            full_name=f'Teacher {number}', faculty=faculty)
+        subject.groups.add(group)
+        subject.teachers.add(teacher)
+        lesson = Lesson.objects.create(
+            day='2023-04-07', precise_time='09:45:00', subject=subject, teacher=teacher)
+        lesson.groups.add(group)
+        student = Student.objects.create(
+            full_name=f'Student {number}', group=group)
+        Mark.objects.create(mark=5, student=student, lesson=lesson)
+        Hometask.objects.create(task=f'Task {number}', lesson=lesson)
+
+
+def create_query_count_tests(url: str):
+    class QueryCountTests(APITestCase):
+
+        def setUp(self):
+            self.user = User.objects.create_user(
+                username='queries', password='queries', is_superuser=True)
+            self.client.force_authenticate(self.user)
+
+        def count_queries(self):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context)
+
+        def test_constant_query_count(self):
+            populate(2)
+            small = self.count_queries()
+            populate(10)
+            self.assertEqual(self.count_queries(), small)
+
+    return QueryCountTests
+
+
+FacultyQueryCountTests = create_query_count_tests('/rest/faculty/')
+GroupQueryCountTests = create_query_count_tests('/rest/group/')
+TeacherQueryCountTests = create_query_count_tests('/rest/teacher/')
+LessonQueryCountTests = create_query_count_tests('/rest/lesson/')
+MarkQueryCountTests = create_query_count_tests('/rest/mark/')
+HometaskQueryCountTests = create_query_count_tests('/rest/hometask/')
@@ -0,0 +1,67 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, RequestFactory
+from university_app.models import Student
+from university_app import roles
+from .attrs import commit, set_up_university
+
+
+class RoleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='role', password='role')
+        university = set_up_university((), student=False)
+        self.group, self.teacher = university['group'], university['teacher']
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return request
+
+    def test_other(self):
+        self.assertEqual(roles.get_role(self.get_request()).name, roles.OTHER)
+
+    def test_superuser_needs_no_queries(self):
+        self.user.is_superuser = True
+        with self.assertNumQueries(0):
+            self.assertTrue(roles.get_role(self.get_request()).is_superuser)
+
+    def test_resolved_once_per_request(self):
+        request = self.get_request()
+        # the student and teacher table versions, then the lookups
+        with self.assertNumQueries(3):
+            roles.get_role(request)
+        with self.assertNumQueries(0):
+            roles.get_role(request)
+
+    def test_cached_across_requests(self):
+        self.teacher.user = self.user
+        self.teacher.save()
+        roles.get_role(self.get_request())
+        # only the versions the cache key carries
+        with self.assertNumQueries(1):
+            role = roles.get_role(self.get_request())
+        self.assertEqual(role.teacher, self.teacher)
+
+    def test_other_processes_see_link_changes(self):
+        roles.get_role(self.get_request())
+        # a write in another process moves the version, no local delete
+        with mock.patch('university_app.signals.invalidate_role'):
+            self.teacher.user = self.user
+            self.teacher.save()
+        self.assertEqual(roles.get_role(self.get_request()).name, roles.OTHER)
+        commit()
+        self.assertEqual(roles.get_role(self.get_request()).teacher, self.teacher)
+
+    def test_invalidated_on_link_and_unlink(self):
+        self.assertEqual(roles.get_role(self.get_request()).name, roles.OTHER)
+        student = Student.objects.create(
+            full_name='Steven Wright', group=self.group, user=self.user)
+        self.assertEqual(roles.get_role(self.get_request()).student, student)
+        student.user = None
+        student.save()
+        self.assertEqual(roles.get_role(self.get_request()).name, roles.OTHER)
+        self.teacher.user = self.user
+        self.teacher.save()
+        self.assertEqual(roles.get_role(self.get_request()).teacher, self.teacher)
+        self.teacher.delete()
+        self.assertEqual(roles.get_role(self.get_request()).name, roles.OTHER)
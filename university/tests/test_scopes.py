@@ -0,0 +1,152 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from university_app.models import Group, Subject, Teacher, Lesson, Student, Mark, Hometask
+from university_app.views import student_objects, teacher_objects
+from university_app.scopes import can_view
+from university_app.roles import resolve_role
+from .attrs import set_up_university
+
+
+def create_lessons(group: Group, subject: Subject, teacher: Teacher, amount: int):
+    lessons = Lesson.objects.bulk_create(
+        Lesson(day='2023-04-07', precise_time='09:45:00',
+               subject=subject, teacher=teacher)
+        for _ in range(amount)
+    )
+    for lesson in lessons:
+        lesson.groups.add(group)
+    return lessons
+
+
+class StudentScopeTests(TestCase):
+    def setUp(self):
+        university = set_up_university(('2023-04-07',) * 3)
+        self.group, self.subject, self.teacher = university['group'], university['subject'], university['teacher']
+        self.student, self.lessons = university['student'], university['lessons']
+        self.other_group = Group.objects.create(title='7.2', faculty=university['faculty'])
+        create_lessons(self.other_group, self.subject, self.teacher, 2)
+        Hometask.objects.create(task='Read', lesson=self.lessons[0])
+        Mark.objects.create(mark=5, student=self.student, lesson=self.lessons[0])
+
+    def test_lessons(self):
+        lessons = student_objects(self.student, Lesson, 'day')
+        self.assertEqual(set(lessons), set(self.lessons))
+
+    def test_groups(self):
+        groups = student_objects(self.student, Group, 'faculty')
+        self.assertEqual(list(groups), [self.group])
+
+    def test_hometasks(self):
+        hometasks = student_objects(self.student, Hometask, 'lesson')
+        self.assertEqual([ht.lesson for ht in hometasks], [self.lessons[0]])
+
+    def test_marks(self):
+        marks = student_objects(self.student, Mark, 'lesson')
+        self.assertEqual([mark.student for mark in marks], [self.student])
+
+    def test_no_group(self):
+        student = Student.objects.create(full_name='Nobody')
+        self.assertFalse(student_objects(student, Lesson, 'day').exists())
+        self.assertFalse(student_objects(student, Group, 'faculty').exists())
+
+    def test_query_count_is_flat(self):
+        for cls_model, order_field in ((Lesson, 'day'), (Hometask, 'lesson'), (Group, 'faculty')):
+            with self.assertNumQueries(1):
+                list(student_objects(self.student, cls_model, order_field))
+        create_lessons(self.group, self.subject, self.teacher, 50)
+        create_lessons(self.other_group, self.subject, self.teacher, 50)
+        for cls_model, order_field in ((Lesson, 'day'), (Hometask, 'lesson'), (Group, 'faculty')):
+            with self.assertNumQueries(1):
+                list(student_objects(self.student, cls_model, order_field))
+
+
+class TeacherScopeTests(TestCase):
+    def setUp(self):
+        university = set_up_university(())
+        faculty, self.teacher, self.group = university['faculty'], university['teacher'], university['group']
+        self.other_teacher = Teacher.objects.create(
+            full_name='Mary Smith', faculty=faculty)
+        self.other_group = Group.objects.create(title='7.2', faculty=faculty)
+        self.subjects = Subject.objects.bulk_create(
+            Subject(title=f'Subject {number}') for number in range(3))
+        for subject in self.subjects:
+            subject.teachers.add(self.teacher)
+            subject.groups.add(self.group)
+        other_subject = Subject.objects.create(title='History')
+        other_subject.teachers.add(self.other_teacher)
+        other_subject.groups.add(self.other_group)
+        self.lessons = create_lessons(
+            self.group, self.subjects[0], self.teacher, 2)
+        create_lessons(self.other_group, other_subject, self.other_teacher, 2)
+        Mark.objects.create(mark=5, student=university['student'], lesson=self.lessons[0])
+        Hometask.objects.create(task='Read', lesson=self.lessons[1])
+
+    def test_groups_are_distinct(self):
+        groups = teacher_objects(self.teacher, Group, 'faculty')
+        self.assertEqual(list(groups), [self.group])
+
+    def test_lessons(self):
+        lessons = teacher_objects(self.teacher, Lesson, 'day')
+        self.assertEqual(set(lessons), set(self.lessons))
+
+    def test_marks_and_hometasks(self):
+        marks = teacher_objects(self.teacher, Mark, 'lesson')
+        self.assertEqual([mark.lesson for mark in marks], [self.lessons[0]])
+        hometasks = teacher_objects(self.teacher, Hometask, 'lesson')
+        self.assertEqual([ht.lesson for ht in hometasks], [self.lessons[1]])
+        self.assertFalse(teacher_objects(self.other_teacher, Mark, 'lesson').exists())
+
+    def test_query_count_is_flat(self):
+        with self.assertNumQueries(1):
+            list(teacher_objects(self.teacher, Group, 'faculty'))
+        faculty = self.group.faculty
+        for number in range(40):
+            subject = Subject.objects.create(title=f'Extra {number}')
+            subject.teachers.add(self.teacher)
+            subject.groups.add(Group.objects.create(title=f'8.{number}', faculty=faculty))
+        with self.assertNumQueries(1):
+            groups = list(teacher_objects(self.teacher, Group, 'faculty'))
+        self.assertEqual(len(groups), 41)
+        with self.assertNumQueries(1):
+            list(teacher_objects(self.teacher, Group, 'faculty')[:20])
+
+
+class CanViewTests(TestCase):
+    def setUp(self):
+        university = set_up_university()
+        self.group, self.teacher, self.student = university['group'], university['teacher'], university['student']
+        self.lesson, = university['lessons']
+        other_group = Group.objects.create(title='7.2', faculty=university['faculty'])
+        self.teacher_user = User.objects.create_user(username='teacher')
+        self.teacher.user = self.teacher_user
+        self.teacher.save()
+        self.student_user = User.objects.create_user(username='student')
+        self.student.user = self.student_user
+        self.student.save()
+        self.other_lesson = create_lessons(other_group, university['subject'], self.teacher, 1)[0]
+        self.mark = Mark.objects.create(
+            mark=5, student=self.student, lesson=self.lesson)
+        self.anonymous = User.objects.create_user(username='anonymous')
+
+    def test_student(self):
+        self.assertTrue(can_view(self.student_user, self.lesson))
+        self.assertFalse(can_view(self.student_user, self.other_lesson))
+        self.assertTrue(can_view(self.student_user, self.mark))
+        self.assertTrue(can_view(self.student_user, self.teacher))
+
+    def test_teacher(self):
+        self.assertTrue(can_view(self.teacher_user, self.mark))
+        self.assertTrue(can_view(self.teacher_user, self.other_lesson))
+        self.assertFalse(can_view(self.teacher_user, self.group))
+
+    def test_other(self):
+        self.assertTrue(can_view(self.anonymous, self.teacher))
+        self.assertFalse(can_view(self.anonymous, self.lesson))
+
+    def test_single_exists_query(self):
+        role = resolve_role(self.teacher_user)
+        Mark.objects.bulk_create(
+            Mark(mark=4, student=self.student, lesson=self.lesson) for _ in range(50))
+        with self.assertNumQueries(1) as context:
+            can_view(self.teacher_user, self.mark, role)
+        self.assertIn('LIMIT 1', context.captured_queries[0]['sql'])
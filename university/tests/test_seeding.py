@@ -0,0 +1,58 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from university_app.models import Group, Lesson, Student, Mark, Hometask, Dashboard, GradeAggregate, \
+    LessonToGroup, TableVersion
+from university_app.validators import validate_groups, validate_lessons, validate_marks
+from university_app import config, seeding
+
+SIZES = {
+    'faculties': 2, 'groups_per_faculty': 2, 'students_per_group': 5, 'subjects': 6,
+    'subjects_per_group': 3, 'teachers_per_faculty': 2, 'subjects_per_teacher': 2,
+    'weeks': 2, 'lessons_per_week': 2,
+}
+
+
+class SeedTests(TestCase):
+
+    def test_sizes_and_invariants(self):
+        created = seeding.seed(SIZES, start=date(2023, 4, 3), validate=True)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Student.objects.count(), 20)
+        self.assertEqual(Lesson.objects.count(), 4 * 3 * 2 * 2)
+        self.assertEqual(created[Mark], Mark.objects.count())
+        self.assertEqual(created[Hometask], Hometask.objects.count())
+        self.assertFalse(LessonToGroup.objects.exclude(lesson__day__range=('2023-04-03', '2023-04-14')).exists())
+        self.assertFalse(Lesson.objects.filter(day__week_day__in=(1, 7)).exists())
+        validate_lessons(Lesson.objects.all())
+        validate_groups(Group.objects.all())
+        validate_marks(Mark.objects.all())
+
+    def test_totals_are_rebuilt(self):
+        seeding.seed(SIZES, rates={'absence': 0.3, 'grade': 1})
+        self.assertTrue(Mark.objects.filter(presence=config.ABSENT).exists())
+        self.assertFalse(Mark.objects.filter(presence__isnull=True, mark__isnull=True).exists())
+        self.assertEqual(Dashboard.objects.get().students, 20)
+        self.assertEqual(sum(GradeAggregate.objects.values_list('absences', flat=True)),
+                         Mark.objects.filter(presence=config.ABSENT).count())
+        self.assertTrue(TableVersion.objects.filter(table=Mark._meta.db_table).exists())
+
+    def test_same_seed_same_journal(self):
+        journals = []
+        for _ in range(2):
+            seeding.seed(SIZES, start=date(2023, 4, 3), seed=7)
+            journals.append(sorted(Mark.objects.values_list(
+                'student__full_name', 'lesson__day', 'lesson__precise_time', 'mark', 'presence')))
+            Group.objects.all().delete()
+        self.assertEqual(journals[0], journals[1])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('seed_university', '--faculties=1', '--weeks=1', '--students-per-group=3', stdout=out)
+        self.assertIn(f'{Mark._meta.db_table}: {Mark.objects.count()}', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('seed_university', '--lessons-per-week=10', stdout=out)
+        with self.assertRaises(CommandError):
+            call_command('seed_university', '--absence-rate=2', stdout=out)
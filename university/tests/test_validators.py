@@ -0,0 +1,81 @@
+from uuid import uuid4
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from university_app.models import Group, Subject, Lesson, Student, Mark
+from university_app.validators import validate_lessons, validate_groups, validate_marks
+from .attrs import set_up_university
+
+
+class ValidatorTests(TestCase):
+    def setUp(self):
+        university = set_up_university(student=False)
+        self.group, self.subject, self.teacher = university['group'], university['subject'], university['teacher']
+        self.lesson, = university['lessons']
+        self.other_group = Group.objects.create(title='7.2', faculty=university['faculty'])
+        self.other_subject = Subject.objects.create(title='History')
+        self.subject.teachers.add(self.teacher)
+        self.subject.groups.add(self.group)
+        self.students = Student.objects.bulk_create(
+            Student(full_name=f'Student {number}', group=self.group) for number in range(20))
+        self.outsider = Student.objects.create(full_name='Outsider', group=self.other_group)
+
+    def test_marks_batch_in_constant_queries(self):
+        marks = [Mark(mark=5, student_id=student.id, lesson=self.lesson)
+                 for student in self.students]
+        with self.assertNumQueries(2):
+            validate_marks(marks)
+
+    def test_marks_errors(self):
+        marks = [Mark(mark=5, student=self.outsider, lesson=self.lesson),
+                 Mark(student=self.students[0], lesson=self.lesson)]
+        with self.assertRaises(ValidationError) as context:
+            validate_marks(marks)
+        self.assertEqual(len(context.exception.messages), 2)
+        self.assertIn('Mark and presence cannot be both empty', context.exception.messages)
+
+    def test_failing_marks_in_constant_queries(self):
+        marks = [Mark(mark=5, student_id=student.id, lesson_id=self.lesson.id) for student in self.students]
+        Student.objects.filter(id__in=[student.id for student in self.students]).update(group=self.other_group)
+        # students, lesson groups and the lesson labels of the messages
+        with self.assertNumQueries(3), self.assertRaises(ValidationError) as context:
+            validate_marks(marks)
+        self.assertEqual(len(context.exception.messages), len(self.students))
+        self.assertEqual(context.exception.messages[0],
+                         f'The student Student 0 is not in the group that had a lesson on {self.lesson}')
+
+    def test_unknown_student(self):
+        student_id = uuid4()
+        with self.assertRaises(ValidationError) as context:
+            validate_marks([Mark(mark=5, student_id=student_id, lesson=self.lesson)])
+        self.assertEqual(context.exception.messages, [f'The student {student_id} does not exist'])
+
+    def test_mark_clean(self):
+        Mark(mark=4, student=self.students[0], lesson=self.lesson).full_clean()
+        with self.assertRaises(ValidationError):
+            Mark(mark=4, student=self.outsider, lesson=self.lesson).full_clean()
+
+    def test_lessons_batch(self):
+        lessons = [Lesson(day='2023-04-08', precise_time='09:45:00',
+                          subject=self.subject, teacher=self.teacher) for _ in range(10)]
+        with self.assertNumQueries(2):
+            validate_lessons(lessons)
+        lessons.append(Lesson(day='2023-04-08', precise_time='09:45:00',
+                              subject=self.other_subject, teacher=self.teacher))
+        with self.assertRaises(ValidationError):
+            validate_lessons(lessons)
+
+    def test_lesson_groups(self):
+        self.lesson.groups.add(self.other_group)
+        with self.assertRaises(ValidationError) as context:
+            self.lesson.clean()
+        self.assertEqual(context.exception.messages, [
+            f'The group {self.other_group} does not have subject {self.subject}'])
+
+    def test_groups(self):
+        with self.assertNumQueries(2):
+            validate_groups([self.group, self.other_group])
+        history = Lesson.objects.create(
+            day='2023-04-08', precise_time='09:45:00', subject=self.other_subject, teacher=self.teacher)
+        history.groups.add(self.group)
+        with self.assertRaises(ValidationError):
+            self.group.clean()
@@ -1,4 +1,6 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from university_app.models import Faculty, Group, Teacher, Lesson, Mark, Hometask
 from django.urls import reverse
 from rest_framework.status import HTTP_200_OK
@@ -67,3 +69,47 @@ MarkViewTests = create_view_tests(
     '/marks/', 'marks', config.MARKS_CATALOG, Mark, attrs.mark_attrs)
 HometaskViewTests = create_view_tests(
     '/hometasks/', 'hometasks', config.HOMETASKS_CATALOG, Hometask, attrs.hometask_attrs)
+
+
+class CatalogPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='catalog', password='catalog', is_superuser=True)
+        self.client.login(username='catalog', password='catalog')
+        Faculty.objects.bulk_create(
+            Faculty(title=f'Faculty {number}') for number in range(PAGINATE_THRESHOLD + 5))
+        fields = attrs.set_up(Lesson)
+        Lesson.objects.bulk_create(
+            Lesson(day='2023-12-31', precise_time='09:45:00', **fields)
+            for _ in range(PAGINATE_THRESHOLD + 5))
+
+    def get_with_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, HTTP_200_OK)
+        return resp, [query['sql'] for query in context.captured_queries]
+
+    def test_counted_catalog_paginates_once(self):
+        resp, queries = self.get_with_queries(reverse('faculties'), {'page': 2})
+        self.assertEqual(len(resp.context['faculties_list']), 6)
+        self.assertEqual(resp.context['page_obj'].paginator.num_pages, 2)
+        self.assertEqual(
+            len([sql for sql in queries if 'FROM "faculty"' in sql]), 2)
+
+    def test_uncounted_catalog(self):
+        resp, queries = self.get_with_queries(reverse('lessons'))
+        self.assertTrue(resp.context['is_paginated'])
+        self.assertTrue(resp.context['page_obj'].has_next())
+        self.assertEqual(len(resp.context['lessons_list']), PAGINATE_THRESHOLD)
+        lesson_queries = [sql for sql in queries if 'FROM "lesson"' in sql]
+        self.assertEqual(len(lesson_queries), 1)
+        self.assertNotIn('COUNT(', lesson_queries[0])
+        resp, _ = self.get_with_queries(reverse('lessons'), {'page': 2})
+        self.assertEqual(len(resp.context['lessons_list']), 5)
+        self.assertFalse(resp.context['page_obj'].has_next())
+
+    def test_invalid_page_falls_back(self):
+        resp, _ = self.get_with_queries(reverse('lessons'), {'page': 'x'})
+        self.assertEqual(resp.context['page_obj'].number, 1)
@@ -46,8 +46,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'university_app.metrics.metrics_middleware',
+    'university_app.profiler.profiler_middleware',
+    'university_app.nplusone.nplusone_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'university_app.replicas.replica_middleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -61,7 +65,7 @@ ROOT_URLCONF = 'university.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'university_app.profiler.ProfiledTemplates',
         'DIRS': [path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,7 +81,6 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'university.wsgi.application'
 
-
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
@@ -99,6 +102,82 @@ DATABASES = {
     }
 }
 
+# read replicas for safe-method requests: PG_REPLICA_HOSTS=host[:port],...
+# Locally, pointing it at PG_HOST gives a primary and a replica alias on one
+# server; tests mirror every replica to the default database.
+PG_REPLICA_HOSTS = [host for host in getenv('PG_REPLICA_HOSTS', '').split(',') if host]
+REPLICA_DATABASES = []
+for number, replica in enumerate(PG_REPLICA_HOSTS, start=1):
+    replica_host, _, replica_port = replica.partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or PG_PORT,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{number}')
+DATABASE_ROUTERS = ['university_app.replicas.ReplicaRouter']
+
+
+# ASYNC_VIEWS=1 serves pages through the async ORM (async_views.py). It only
+# makes sense under ASGI and is off there too: on Django 4.1 the async ORM runs
+# every query on one thread-sensitive executor, and benchmark_servers measured
+# ASGI below WSGI. Measure a deployment before enabling it.
+ASYNC_VIEWS = getenv('ASYNC_VIEWS') == '1'
+
+
+# Metrics served at /metrics: prefork servers give every worker the same
+# METRICS_DIR to report totals across processes; with METRICS_TOKEN set
+# scrapers send it as a bearer token
+
+METRICS_DIR = getenv('METRICS_DIR', '')
+METRICS_TOKEN = getenv('METRICS_TOKEN', '')
+
+
+# Request profiling: the share of requests profiled (0 to 1), reported in a
+# Server-Timing header and as JSON lines on the university_app.profiler logger
+
+PROFILER_SAMPLE_RATE = float(getenv('PROFILER_SAMPLE_RATE', '0'))
+PROFILER_SERVER_TIMING = getenv('PROFILER_SERVER_TIMING', '1') == '1'
+
+# N+1 detection: a request running one SQL shape NPLUSONE_THRESHOLD times is
+# reported on the university_app.nplusone logger ('log'), fails ('raise') or
+# goes unchecked ('off'); tests.runner raises unless NPLUSONE_MODE is set
+
+NPLUSONE_MODE = getenv('NPLUSONE_MODE', 'log')
+NPLUSONE_THRESHOLD = int(getenv('NPLUSONE_THRESHOLD', '3'))
+
+TEST_RUNNER = 'tests.runner.NPlusOneRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'university_app.profiler': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'university_app.nplusone': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.1/ref/settings/#caches
+# 'pages' holds entity and catalog pages and takes any backend, e.g.
+# PAGE_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# PAGE_CACHE_LOCATION=/var/tmp/university_pages
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': getenv('PAGE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('PAGE_CACHE_LOCATION', 'university-pages'),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
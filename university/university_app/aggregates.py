@@ -0,0 +1,191 @@
+"""Incrementally maintained grade aggregates per (student, subject)."""
+from collections import defaultdict
+from math import sqrt
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from .models import Lesson, Mark, GradeAggregate
+from . import config, versions
+
+HISTOGRAM = tuple(f'count_{mark}' for mark in range(1, 6))
+COUNTERS = ('count', 'total', 'total_squares') + HISTOGRAM + ('absences',)
+# fields whose queryset updates move marks between or within aggregates
+AGGREGATED_FIELDS = {
+    Mark: {'mark', 'presence', 'student', 'student_id', 'lesson', 'lesson_id'},
+    Lesson: {'subject', 'subject_id'},
+}
+
+
+def contribution(mark, presence) -> dict:
+    deltas = dict.fromkeys(COUNTERS, 0)
+    if mark in config.MARKS:
+        deltas.update(count=1, total=mark, total_squares=mark * mark)
+        deltas[f'count_{mark}'] = 1
+    if presence == config.ABSENT:
+        deltas['absences'] = 1
+    return deltas
+
+
+def collect(changes) -> dict:
+    """Sum (student_id, subject_id, mark, presence, sign) changes per aggregate key."""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for student_id, subject_id, mark, presence, sign in changes:
+        if student_id is None or subject_id is None:
+            continue
+        for counter, delta in contribution(mark, presence).items():
+            totals[student_id, subject_id][counter] += sign * delta
+    return {key: deltas for key, deltas in totals.items() if any(deltas.values())}
+
+
+def apply(changes) -> None:
+    """Apply changes with one locking read, one bulk update and one bulk insert."""
+    totals = collect(changes)
+    if not totals:
+        return
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                apply_totals(totals)
+            return
+        except IntegrityError:
+            # a concurrent writer created one of our rows; the retry updates it
+            if attempt:
+                raise
+
+
+def keys_filter(keys, prefix: str = '') -> Q:
+    found = Q()
+    for student_id, subject_id in keys:
+        found |= Q(**{'student_id': student_id, f'{prefix}subject_id': subject_id})
+    return found
+
+
+def apply_totals(totals: dict) -> None:
+    existing = {
+        (row.student_id, row.subject_id): row
+        for row in GradeAggregate.objects.select_for_update().filter(keys_filter(totals))
+    }
+    created = []
+    for key, deltas in totals.items():
+        row = existing.get(key)
+        if row is None:
+            if not any(delta > 0 for delta in deltas.values()):
+                # nothing to subtract from, e.g. the row went with a cascade delete
+                continue
+            row = GradeAggregate(student_id=key[0], subject_id=key[1])
+            created.append(row)
+        for counter, delta in deltas.items():
+            setattr(row, counter, getattr(row, counter) + delta)
+    # a row left without marks, e.g. after its lesson moved subject, goes
+    empty = {row.pk for row in existing.values() if not any(getattr(row, counter) for counter in COUNTERS)}
+    if empty:
+        GradeAggregate.objects.filter(pk__in=empty).delete()
+    kept = [row for row in existing.values() if row.pk not in empty]
+    if kept:
+        GradeAggregate.objects.bulk_update(kept, COUNTERS)
+    if created:
+        GradeAggregate.objects.bulk_create(created)
+    # the aggregate managers send no signals, so conditional GETs learn of it here
+    versions.bump(GradeAggregate)
+
+
+def lesson_subjects(lesson_ids) -> dict:
+    return dict(Lesson.objects.filter(id__in=set(lesson_ids)).values_list('id', 'subject_id'))
+
+
+def marks_changes(marks, sign: int = 1) -> list:
+    subjects = {mark.lesson_id: mark.lesson.subject_id
+                for mark in marks if Mark.lesson.is_cached(mark)}
+    missing = {mark.lesson_id for mark in marks} - set(subjects)
+    if missing:
+        subjects.update(lesson_subjects(missing))
+    return [(mark.student_id, subjects.get(mark.lesson_id), mark.mark, mark.presence, sign)
+            for mark in marks]
+
+
+def lesson_changes(lesson_id, subject_id, sign: int) -> list:
+    """Changes adding (1) or removing (-1) all marks of a lesson under subject_id."""
+    return [(student_id, subject_id, mark, presence, sign) for student_id, mark, presence in
+            Mark.objects.filter(lesson_id=lesson_id).values_list('student_id', 'mark', 'presence')]
+
+
+def move_lesson(lesson_id, previous_subject_id, subject_id) -> None:
+    """Move a lesson's marks to the aggregates of its new subject."""
+    removed = lesson_changes(lesson_id, previous_subject_id, -1)
+    apply(removed + [(student_id, subject_id, mark, presence, 1)
+                     for student_id, _, mark, presence, _ in removed])
+
+
+def updated_marks(cls_model, queryset):
+    """Marks a queryset update of Mark or Lesson is about to change."""
+    ids = list(queryset.values_list('pk', flat=True))
+    if cls_model is Mark:
+        return Mark.objects.filter(pk__in=ids)
+    return Mark.objects.filter(lesson_id__in=ids)
+
+
+def marks_keys(marks) -> set:
+    return set(marks.values_list('student_id', 'lesson__subject_id').distinct())
+
+
+def previous_change(mark: Mark):
+    """The contribution a saved mark currently holds, to subtract before an update."""
+    previous = Mark.objects.filter(pk=mark.pk).values_list(
+        'student_id', 'lesson__subject_id', 'mark', 'presence').first()
+    if previous:
+        return (*previous, -1)
+
+
+def grouped(marks):
+    """Aggregate rows of marks, one grouped query."""
+    histogram = {counter: Count('id', filter=Q(mark=number))
+                 for number, counter in enumerate(HISTOGRAM, start=1)}
+    rows = marks.order_by().values('student_id', 'lesson__subject_id').annotate(
+        count=Count('mark'),
+        total=Sum('mark', default=0),
+        total_squares=Sum(F('mark') * F('mark'), default=0),
+        absences=Count('id', filter=Q(presence=config.ABSENT)),
+        **histogram,
+    )
+    return (GradeAggregate(student_id=row.pop('student_id'), subject_id=row.pop('lesson__subject_id'), **row)
+            for row in rows.iterator(chunk_size=config.EXPORT_CHUNK_SIZE))
+
+
+def recompute(keys) -> None:
+    """Recompute the aggregates of (student_id, subject_id) keys from their marks."""
+    keys = {key for key in keys if None not in key}
+    if not keys:
+        return
+    with transaction.atomic():
+        GradeAggregate.objects.filter(keys_filter(keys)).delete()
+        GradeAggregate.objects.bulk_create(grouped(Mark.objects.filter(keys_filter(keys, 'lesson__'))))
+        versions.bump(GradeAggregate)
+
+
+def rebuild() -> int:
+    """Recompute every aggregate from the mark table in one grouped query."""
+    with transaction.atomic():
+        GradeAggregate.objects.all().delete()
+        GradeAggregate.objects.bulk_create(grouped(Mark.objects.all()), batch_size=config.EXPORT_CHUNK_SIZE)
+        versions.bump(GradeAggregate)
+    return GradeAggregate.objects.count()
+
+
+def summary(row: dict) -> dict:
+    """Mean, standard deviation and histogram from summed counters."""
+    count = row['count']
+    mean = row['total'] / count if count else None
+    deviation = sqrt(max(row['total_squares'] / count - mean * mean, 0)) if count else None
+    return {
+        'count': count,
+        'mean': mean,
+        'deviation': deviation,
+        'histogram': [row[counter] for counter in HISTOGRAM],
+        'absences': row['absences'],
+    }
+
+
+def rollup(queryset, **keys) -> list:
+    """Sum aggregate rows per keys, e.g. group='student__group_id', subject='subject_id'."""
+    rows = queryset.order_by().values(*keys.values()).annotate(
+        **{counter: Sum(counter) for counter in COUNTERS})
+    return [{**{name: row[path] for name, path in keys.items()}, **summary(row)} for row in rows]
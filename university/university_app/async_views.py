@@ -0,0 +1,126 @@
+"""Async read path for the homepage, catalog and entity pages under ASGI."""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import models
+from django.shortcuts import render
+from .conditional import CONDITIONAL_METHODS
+from .models import Faculty, Group, Teacher, Lesson, Mark, Hometask
+from .pagination import UncountedPage, UncountedPaginator
+from .roles import get_role
+from . import conditional, config, counters, pagecache, scopes, versions, views
+
+render_async = sync_to_async(render)
+# get_role loads request.user, which may query the session and user tables
+get_role_async = sync_to_async(get_role)
+# the sync views skip the caches while this thread's transaction wrote the tables
+pending_async = sync_to_async(versions.pending)
+
+
+async def custom_main(request):
+    return await render_async(request, config.TEMPLATE_MAIN, context=await counters.aget_counts())
+
+
+async def fetch_page(queryset, number: int, per_page: int) -> list:
+    bottom = (number - 1) * per_page
+    return [obj async for obj in queryset[bottom:bottom + per_page + 1]]
+
+
+def page_number(value) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+async def catalog_page(queryset, number: int, exact_count: bool) -> Page:
+    """A page like the sync catalogs', with the same count and fallback to the last page."""
+    per_page = config.PAGINATE_THRESHOLD
+    if not exact_count:
+        paginator = UncountedPaginator(queryset, per_page)
+        rows = await fetch_page(queryset, number, per_page)
+        return UncountedPage(rows[:per_page], number, paginator, len(rows) > per_page)
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()
+    try:
+        paginator.validate_number(number)
+    except InvalidPage:
+        # past the end falls back to the last page, as Paginator.get_page does
+        number = paginator.num_pages
+    rows = await fetch_page(queryset, number, per_page)
+    return Page(rows[:per_page], number, paginator)
+
+
+def catalog_view(cls_model: models.Model, order_field: str, page_name: str, template: str,
+                 sync_view, exact_count: bool = True):
+    tables = pagecache.catalog_tables(cls_model)
+
+    async def view(request):
+        if request.method not in CONDITIONAL_METHODS or await pending_async(tables):
+            return await sync_to_async(sync_view)(request)
+        role = await get_role_async(request)
+        key, response = await sync_to_async(pagecache.lookup)(request, page_name, tables)
+        if response is not None:
+            return response
+        queryset = views.with_catalog_related(scopes.role_queryset(role, cls_model).order_by(order_field))
+        page = await catalog_page(queryset, page_number(request.GET.get('page')), exact_count)
+        response = await render_async(request, template, context={
+            'paginator': page.paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            page_name: page.object_list,
+            f'{page_name}_list': page,
+        })
+        return await sync_to_async(pagecache.store)(request, key, response)
+    return view
+
+
+def entity_view(cls_model: models.Model, name: str, template: str, sync_view):
+    tables = conditional.entity_tables(cls_model)
+
+    async def page(request, role):
+        target_obj = await views.with_entity_related(cls_model.objects.all()).aget(id=request.GET.get('id', ''))
+        context = {name: target_obj}
+        context[f'user_{cls_model}'.lower()] = await scopes.acan_view(target_obj, role)
+        if cls_model is Lesson:
+            context['marks'] = [mark async for mark in Mark.objects.filter(
+                lesson=target_obj).select_related('student')]
+        return await render_async(request, template, context=context)
+
+    async def view(request):
+        if request.method not in CONDITIONAL_METHODS or await pending_async(tables):
+            return await sync_to_async(sync_view)(request)
+        role = await get_role_async(request)
+        if cls_model is Lesson and (role.is_superuser or role.teacher):
+            # the page carries the mark form
+            return await sync_to_async(sync_view)(request)
+        etag, last_modified, response = await sync_to_async(conditional.check)(request, tables)
+        if response is None:
+            key, response = await sync_to_async(pagecache.lookup)(request, name, tables)
+            if response is None:
+                response = await sync_to_async(pagecache.store)(
+                    request, key, await page(request, role))
+        return conditional.with_validators(response, etag, last_modified)
+    return view
+
+
+faculties_view = catalog_view(
+    Faculty, 'title', 'faculties', config.FACULTIES_CATALOG, views.FacultyListView.as_view())
+teachers_view = catalog_view(
+    Teacher, 'full_name', 'teachers', config.TEACHERS_CATALOG, views.TeacherListView.as_view())
+groups_view = catalog_view(
+    Group, 'faculty', 'groups', config.GROUPS_CATALOG, views.GroupListView.as_view())
+lessons_view = catalog_view(
+    Lesson, 'day', 'lessons', config.LESSONS_CATALOG, views.LessonListView.as_view(), exact_count=False)
+marks_view = catalog_view(
+    Mark, 'lesson', 'marks', config.MARKS_CATALOG, views.MarkListView.as_view(), exact_count=False)
+hometasks_view = catalog_view(
+    Hometask, 'lesson', 'hometasks', config.HOMETASKS_CATALOG, views.HometaskListView.as_view(),
+    exact_count=False)
+
+faculty_view = entity_view(Faculty, 'faculty', config.FACULTY_ENTITY, views.faculty_view)
+group_view = entity_view(Group, 'group', config.GROUP_ENTITY, views.group_view)
+teacher_view = entity_view(Teacher, 'teacher', config.TEACHER_ENTITY, views.teacher_view)
+lesson_view = entity_view(Lesson, 'lesson', config.LESSON_ENTITY, views.lesson_view)
+mark_view = entity_view(Mark, 'mark', config.MARK_ENTITY, views.mark_view)
+hometask_view = entity_view(Hometask, 'hometask', config.HOMETASK_ENTITY, views.hometask_view)
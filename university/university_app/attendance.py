@@ -0,0 +1,116 @@
+"""Vectorized attendance analytics over Mark.presence."""
+from array import array
+from datetime import date
+import numpy as np
+from .export import EXPORT_FILTERS
+from .models import Group, Mark, Student
+from . import config
+
+
+class Attendance:
+    """One mark per position: student code, lesson day ordinal and absence flag.
+
+    Students and groups are coded as positions in student_ids and group_ids,
+    so every group-by below is a bincount over small integer arrays.
+    """
+
+    def __init__(self, student_ids, group_ids, student_group, student, day, absent):
+        self.student_ids = student_ids
+        self.group_ids = group_ids
+        self.student_group = student_group
+        self.student = student
+        self.day = day
+        self.absent = absent
+
+    @classmethod
+    def load(cls, params):
+        """Read (student, group, day, presence) for the filtered marks in one query."""
+        queryset = EXPORT_FILTERS.filter_queryset(Mark.objects.order_by(), params)
+        rows = queryset.values_list(
+            'student_id', 'student__group_id', 'lesson__day', 'presence',
+        ).iterator(chunk_size=config.EXPORT_CHUNK_SIZE)
+        students, groups, student_group = {}, {}, array('q')
+        student, day, absent = array('q'), array('q'), bytearray()
+        for student_id, group_id, lesson_day, presence in rows:
+            code = students.get(student_id)
+            if code is None:
+                code = students[student_id] = len(students)
+                student_group.append(groups.setdefault(group_id, len(groups)))
+            student.append(code)
+            day.append(lesson_day.toordinal())
+            absent.append(presence == config.ABSENT)
+        return cls(
+            list(students), list(groups),
+            np.frombuffer(student_group, dtype=np.int64),
+            np.frombuffer(student, dtype=np.int64),
+            np.frombuffer(day, dtype=np.int64),
+            np.frombuffer(absent, dtype=np.bool_),
+        )
+
+    def rates(self, codes, size: int):
+        """(lessons, absences, absence rate) per code in range(size)."""
+        lessons = np.bincount(codes, minlength=size)
+        absences = np.bincount(codes[self.absent], minlength=size)
+        rate = np.divide(absences, lessons, out=np.zeros(size), where=lessons > 0)
+        return lessons, absences, rate
+
+    def student_rows(self, codes) -> list:
+        lessons, absences, rate = self.rates(self.student, len(self.student_ids))
+        names = dict(Student.objects.filter(
+            id__in=[self.student_ids[code] for code in codes]).values_list('id', 'full_name'))
+        return [{
+            'student': self.student_ids[code],
+            'full_name': names.get(self.student_ids[code]),
+            'group': self.group_ids[self.student_group[code]],
+            'lessons': int(lessons[code]),
+            'absences': int(absences[code]),
+            'rate': float(rate[code]),
+        } for code in codes]
+
+    def by_student(self) -> list:
+        return self.student_rows(range(len(self.student_ids)))
+
+    def by_group(self) -> list:
+        lessons, absences, rate = self.rates(
+            self.student_group[self.student], len(self.group_ids))
+        titles = dict(Group.objects.filter(
+            id__in=self.group_ids).values_list('id', 'title'))
+        return [{
+            'group': group_id,
+            'title': titles.get(group_id),
+            'lessons': int(lessons[code]),
+            'absences': int(absences[code]),
+            'rate': float(rate[code]),
+        } for code, group_id in enumerate(self.group_ids)]
+
+    def by_week(self) -> list:
+        # ordinal 1 (0001-01-01) is a Monday, so this is each day's Monday
+        mondays = self.day - (self.day - 1) % 7
+        weeks, codes = np.unique(mondays, return_inverse=True)
+        lessons, absences, rate = self.rates(codes.ravel(), len(weeks))
+        return [{
+            'week': date.fromordinal(int(monday)),
+            'lessons': int(lessons[code]),
+            'absences': int(absences[code]),
+            'rate': float(rate[code]),
+        } for code, monday in enumerate(weeks)]
+
+    def above(self, threshold: float) -> list:
+        """Students whose absence rate exceeds threshold, worst first."""
+        _, _, rate = self.rates(self.student, len(self.student_ids))
+        codes = np.flatnonzero(rate > threshold)
+        return self.student_rows(codes[np.argsort(-rate[codes], kind='stable')])
+
+
+REPORTS = {
+    'student': Attendance.by_student,
+    'group': Attendance.by_group,
+    'week': Attendance.by_week,
+}
+
+
+def report(params, by: str = 'student', above: float = None) -> list:
+    attendance = Attendance.load(params)
+    if above is not None:
+        return attendance.above(above)
+    return REPORTS[by](attendance)
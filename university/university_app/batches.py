@@ -0,0 +1,44 @@
+"""Work that writes queue up and a transaction applies once, after it commits."""
+from django.db import transaction
+
+
+class Batch:
+    """on_commit callback merging what every write of a transaction adds."""
+
+    def __init__(self):
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.apply()
+
+    def merge(self, *args):
+        raise NotImplementedError
+
+    def apply(self):
+        raise NotImplementedError
+
+    @classmethod
+    def pending(cls) -> list:
+        """Batches of this transaction not applied yet."""
+        connection = transaction.get_connection()
+        return [callback for _, callback, *_ in connection.run_on_commit
+                if type(callback) is cls and not callback.done]
+
+    @classmethod
+    def add(cls, *args):
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            batch = cls()
+            batch.merge(*args)
+            return batch()
+        # one batch per savepoint, so rolling one back drops exactly its work;
+        # atomic(savepoint=False) blocks, e.g. of deletes, record None and roll back with their outer block
+        savepoints = set(connection.savepoint_ids) - {None}
+        for sids, callback, *_ in connection.run_on_commit:
+            if type(callback) is cls and sids - {None} == savepoints and not callback.done:
+                break
+        else:
+            callback = cls()
+            transaction.on_commit(callback)
+        callback.merge(*args)
@@ -0,0 +1,157 @@
+"""Per-route latency, query and row counts over a seeded database."""
+from statistics import median, quantiles
+from time import perf_counter
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from .models import Teacher, Lesson, Student, Mark, Hometask, GradeAggregate
+from .queries import QueryLog
+from .roles import SUPERUSER, STUDENT, TEACHER
+from . import pagecache, seeding
+
+SCALES = {
+    'small': {'faculties': 2, 'groups_per_faculty': 3, 'students_per_group': 15, 'weeks': 4},
+    'medium': {'faculties': 4, 'groups_per_faculty': 6, 'students_per_group': 25, 'weeks': 16},
+    'large': {'faculties': 12, 'groups_per_faculty': 10, 'students_per_group': 30, 'weeks': 34},
+}
+ROLES = (SUPERUSER, STUDENT, TEACHER)
+PAGES = ('homepage', 'profile', 'about', 'contacts',
+         'faculties', 'teachers', 'groups', 'lessons', 'marks', 'hometasks')
+# samples named other than their model
+DETAIL_SAMPLES = {GradeAggregate: 'grades'}
+# measured values that must not grow, and latency, which may grow within a tolerance
+COUNTED = ('queries', 'rows')
+LATENCY = 'p95_ms'
+
+
+def samples() -> dict:
+    """Objects for entity and detail routes: a lesson of the first teacher and its surroundings."""
+    lesson = Lesson.objects.select_related('subject', 'teacher__faculty').filter(
+        groups__isnull=False).order_by('teacher__full_name', 'day', 'id').first()
+    group = lesson.groups.select_related('faculty').first()
+    student = Student.objects.filter(group=group).order_by('full_name', 'id').first()
+    return {
+        'faculty': group.faculty, 'group': group, 'subject': lesson.subject, 'teacher': lesson.teacher,
+        'lesson': lesson, 'student': student,
+        'mark': Mark.objects.filter(lesson__groups=group).order_by('id').first(),
+        'hometask': Hometask.objects.filter(lesson__groups=group).order_by('id').first(),
+        'grades': GradeAggregate.objects.filter(student=student, subject=lesson.subject).first(),
+    }
+
+
+def users(sample: dict) -> dict:
+    """Log-in users per role, the student and teacher ones linked to the samples."""
+    found = {
+        SUPERUSER: User.objects.create_superuser('benchmark_superuser', 'superuser@example.com', None),
+        STUDENT: User.objects.create_user('benchmark_student'),
+        TEACHER: User.objects.create_user('benchmark_teacher'),
+    }
+    Student.objects.filter(pk=sample['student'].pk).update(user=found[STUDENT])
+    Teacher.objects.filter(pk=sample['teacher'].pk).update(user=found[TEACHER])
+    return found
+
+
+def routes(sample: dict) -> list:
+    """(route name, path) for every GET route; entity routes open the samples."""
+    from .urls import router
+    found = [(name, reverse(name)) for name in PAGES]
+    for name in ('faculty', 'group', 'teacher', 'lesson', 'mark', 'hometask'):
+        if sample[name] is not None:
+            found.append((name, f'{reverse(name)}?id={sample[name].pk}'))
+    lesson, group = sample['lesson'], sample['group']
+    found += [
+        ('grade_lesson', f'{reverse("grade_lesson")}?id={lesson.pk}'),
+        ('gradebook', f'{reverse("gradebook")}?group={group.pk}&subject={lesson.subject_id}&start={lesson.day}'),
+        ('export_marks', f'{reverse("export_marks")}?group={group.pk}'),
+        ('attendance', f'{reverse("attendance")}?group={group.pk}'),
+    ]
+    for _, viewset, basename in router.registry:
+        cls_model = viewset.queryset.model
+        found.append((f'rest/{basename}-list', reverse(f'{basename}-list')))
+        found.extend((f'rest/{basename}-{action.url_name}', reverse(f'{basename}-{action.url_name}'))
+                     for action in viewset.get_extra_actions() if not action.detail)
+        obj = sample.get(DETAIL_SAMPLES.get(cls_model, cls_model._meta.model_name))
+        if obj is not None:
+            found.append((f'rest/{basename}-detail', reverse(f'{basename}-detail', args=(obj.pk,))))
+    return found
+
+
+def percentile(values: list, percent: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def measure(client: Client, path: str, repeat: int, warm: bool = False) -> dict:
+    """Latency percentiles over repeat requests after a warm-up one, with the queries of the last."""
+    latencies = []
+    for _ in range(repeat + 1):
+        if not warm:
+            pagecache.get_cache().clear()
+        with QueryLog(rows=True) as log:
+            start = perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            latencies.append((perf_counter() - start) * 1000)
+    latencies = latencies[1:]
+    return {
+        'status': response.status_code,
+        'p50_ms': round(median(latencies), 3),
+        LATENCY: round(percentile(latencies, 95), 3),
+        'queries': len(log),
+        'rows': log.rows,
+        'db_ms': round(log.duration * 1000, 3),
+    }
+
+
+def prepare(sizes: dict, seed: int = 0, rates: dict = None) -> tuple:
+    """Empty and reseed the database: (samples, users by role)."""
+    call_command('flush', interactive=False, verbosity=0)
+    cache.clear()
+    seeding.seed(sizes, rates, seed=seed)
+    sample = samples()
+    return sample, users(sample)
+
+
+def run(scale: str, sizes: dict, repeat: int = 20, roles=ROLES, warm: bool = False, seed: int = 0) -> list:
+    """Reseed the database at sizes and measure every route for every role."""
+    sample, logins = prepare(sizes, seed)
+    results = []
+    for role in roles:
+        client = Client()
+        client.force_login(logins[role])
+        for route, path in routes(sample):
+            results.append({'scale': scale, 'role': role, 'route': route, 'path': path,
+                            **measure(client, path, repeat, warm)})
+    return results
+
+
+def result_key(result: dict) -> tuple:
+    return result['scale'], result['role'], result['route']
+
+
+def compare(results: list, baseline: list, latency_tolerance: float = 0.25, latency_floor: float = 2.0) -> list:
+    """Regressions of results against baseline, as human-readable lines.
+
+    Status changes and any growth in queries or rows count; latency counts
+    once p95 exceeds the baseline by latency_tolerance and latency_floor ms.
+    """
+    previous = {result_key(result): result for result in baseline}
+    found = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        name = '{} {} {}'.format(*result_key(result))
+        if result['status'] != before['status']:
+            found.append(f'{name}: status {before["status"]} -> {result["status"]}')
+        for measured in COUNTED:
+            if result[measured] > before[measured]:
+                found.append(f'{name}: {measured} {before[measured]} -> {result[measured]}')
+        allowed = max(before[LATENCY] * (1 + latency_tolerance), before[LATENCY] + latency_floor)
+        if result[LATENCY] > allowed:
+            found.append(f'{name}: {LATENCY} {before[LATENCY]} -> {result[LATENCY]}')
+    return found
@@ -0,0 +1,92 @@
+"""Conditional GET (ETag / Last-Modified) from per-table versions."""
+from functools import wraps
+from hashlib import blake2b
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from .models import Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask, \
+    LessonToGroup, SubjectToGroup, SubjectToTeacher
+from . import versions
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+VARY_HEADERS = ('Accept', 'Cookie', 'Authorization')
+
+# role scopes read these, so role-dependent responses depend on them as well
+SCOPE_MODELS = (Student, Teacher, LessonToGroup, SubjectToGroup, SubjectToTeacher)
+ENTITY_MODELS = {
+    Faculty: (Faculty,),
+    Group: (Group, Faculty, Subject, SubjectToGroup),
+    Teacher: (Teacher, Faculty, Subject, SubjectToTeacher),
+    Lesson: (Lesson, Subject, Teacher, Group, Faculty, LessonToGroup, Mark, Student),
+    Mark: (Mark, Student, Lesson, Subject),
+    Hometask: (Hometask, Lesson, Subject),
+}
+
+
+def current_versions(request, tables: tuple) -> tuple:
+    """versions.current from every table's version, read once per request."""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_table_versions'):
+        request._table_versions = versions.rows()
+    return versions.current(tables, request._table_versions)
+
+
+def validators(request, tables: tuple) -> tuple:
+    """(ETag, Last-Modified timestamp or None) for a response reading tables."""
+    table_versions, modified = current_versions(request, tables)
+    user = request.user
+    key = '|'.join(str(part) for part in (
+        user.pk, user.is_superuser, request.get_full_path(),
+        request.headers.get('Accept', ''), *tables, *table_versions,
+    ))
+    etag = quote_etag(blake2b(key.encode(), digest_size=16).hexdigest())
+    return etag, int(modified.timestamp()) if modified else None
+
+
+def with_validators(response, etag: str, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def check(request, tables: tuple) -> tuple:
+    """(ETag, Last-Modified, 304 response if the client's copy is fresh else None)."""
+    etag, last_modified = validators(request, tables)
+    return etag, last_modified, get_conditional_response(request, etag, last_modified)
+
+
+def respond(request, tables: tuple, handler, *args, **kwargs):
+    """Answer 304 if the client's copy is fresh, otherwise call handler."""
+    if request.method not in CONDITIONAL_METHODS or versions.pending(tables):
+        return handler(request, *args, **kwargs)
+    etag, last_modified, response = check(request, tables)
+    if response is None:
+        response = handler(request, *args, **kwargs)
+    return with_validators(response, etag, last_modified)
+
+
+def condition(tables: tuple):
+    """View decorator: conditional GET over tables."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return respond(request, tables, view, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def entity_tables(cls_model) -> tuple:
+    return versions.tables(ENTITY_MODELS.get(cls_model, (cls_model,)) + SCOPE_MODELS)
+
+
+class ConditionalMixin:
+    """list and retrieve answer 304 while none of conditional_tables changed."""
+    conditional_tables = ()
+
+    def list(self, request, *args, **kwargs):
+        return respond(request, self.conditional_tables, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return respond(request, self.conditional_tables, super().retrieve, *args, **kwargs)
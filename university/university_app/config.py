@@ -24,8 +24,11 @@ TEACHER_ENTITY = join(ENTITIES, 'teacher.html')
 LESSON_ENTITY = join(ENTITIES, 'lesson.html')
 MARK_ENTITY = join(ENTITIES, 'mark.html')
 HOMETASK_ENTITY = join(ENTITIES, 'hometask.html')
+GRADE_LESSON_ENTITY = join(ENTITIES, 'grade_lesson.html')
+GRADEBOOK_ENTITY = join(ENTITIES, 'gradebook.html')
 
 PAGINATE_THRESHOLD = 20
+CURSOR_QUERY_PARAM = 'cursor'
 
 SAFE_METHODS = 'GET', 'HEAD', 'OPTIONS', 'PATCH'
 UNSAFE_METHODS = 'POST', 'PUT', 'DELETE'
@@ -40,3 +43,34 @@ DECIMAL_MAX_DIGITS = 10
 
 MARK_CHOICES = [('', ''), (1, 1), (2, 2), (3, 3), (4, 4), (5, 5)]
 PRESENCE_CHOICES = [('', ''), ('Н', 'Н')]
+MARKS = range(1, 6)
+ABSENT = 'Н'
+
+ROLE_CACHE_PREFIX = 'university_role'
+ROLE_CACHE_TIMEOUT = 300
+
+DASHBOARD_ID = 1
+DASHBOARD_CACHE_KEY = 'university_dashboard'
+DASHBOARD_CACHE_TIMEOUT = 5
+
+EXPORT_CHUNK_SIZE = 2000
+
+SEED_BATCH_SIZE = 5000
+SEED_WEEKDAYS = 5
+SEED_LESSON_TIMES = ('09:00', '10:45', '12:30', '14:15', '16:00')
+
+REPLICA_PIN_KEY = 'replica_pinned_until'
+REPLICA_PIN_SECONDS = 10
+REPLICA_RETRY_SECONDS = 30
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_PREFIX = 'university_page'
+PAGE_CACHE_TIMEOUT = 600
+
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_QUERY_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+METRICS_FLUSH_SECONDS = 5
+METRICS_UNMATCHED_ROUTE = 'unmatched'
+
+GRADEBOOK_WINDOW_DAYS = 31
+GRADEBOOK_MAX_DAYS = 366
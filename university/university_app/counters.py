@@ -0,0 +1,89 @@
+"""Maintained record counts for the homepage."""
+from collections import Counter
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from .models import Faculty, Group, Teacher, Student, Dashboard
+from .batches import Batch
+from . import config, metrics
+
+COUNTED_MODELS = {
+    Faculty: 'faculties',
+    Group: 'groups',
+    Teacher: 'teachers',
+    Student: 'students',
+}
+
+
+def invalidate():
+    # deleting before the commit would let a reader cache the old counts again
+    transaction.on_commit(lambda: cache.delete(config.DASHBOARD_CACHE_KEY))
+
+
+class Adjustments(Batch):
+    def __init__(self):
+        super().__init__()
+        self.deltas = Counter()
+        self.recounted = set()
+
+    def merge(self, cls_model, delta):
+        if delta is None:
+            self.recounted.add(cls_model)
+        else:
+            self.deltas[COUNTED_MODELS[cls_model]] += delta
+
+    def apply(self):
+        counts = {field: F(field) + delta for field, delta in self.deltas.items() if delta}
+        # a count taken after the commit already holds the deltas
+        counts.update({COUNTED_MODELS[cls_model]: cls_model.objects.count() for cls_model in self.recounted})
+        if counts:
+            Dashboard.objects.filter(pk=config.DASHBOARD_ID).update(**counts)
+            cache.delete(config.DASHBOARD_CACHE_KEY)
+
+
+def adjust(cls_model, delta: int):
+    """Move a count by delta in the one Dashboard update of the writing transaction."""
+    Adjustments.add(cls_model, delta)
+
+
+def recount(cls_model):
+    """Count a table again, when how many rows a write added is unknown."""
+    Adjustments.add(cls_model, None)
+
+
+def reconcile() -> dict:
+    counts = {field: cls_model.objects.count()
+              for cls_model, field in COUNTED_MODELS.items()}
+    Dashboard.objects.update_or_create(pk=config.DASHBOARD_ID, defaults=counts)
+    invalidate()
+    return counts
+
+
+def get_counts() -> dict:
+    counts = cache.get(config.DASHBOARD_CACHE_KEY)
+    metrics.cache_lookup('dashboard', counts is not None)
+    if counts is None:
+        counts = Dashboard.objects.filter(pk=config.DASHBOARD_ID).values(
+            *COUNTED_MODELS.values()).first() or reconcile()
+        cache.set(config.DASHBOARD_CACHE_KEY, counts,
+                  config.DASHBOARD_CACHE_TIMEOUT)
+    return counts
+
+
+async def areconcile() -> dict:
+    counts = {field: await cls_model.objects.acount()
+              for cls_model, field in COUNTED_MODELS.items()}
+    await Dashboard.objects.aupdate_or_create(pk=config.DASHBOARD_ID, defaults=counts)
+    await cache.adelete(config.DASHBOARD_CACHE_KEY)
+    return counts
+
+
+async def aget_counts() -> dict:
+    counts = await cache.aget(config.DASHBOARD_CACHE_KEY)
+    metrics.cache_lookup('dashboard', counts is not None)
+    if counts is None:
+        counts = await Dashboard.objects.filter(pk=config.DASHBOARD_ID).values(
+            *COUNTED_MODELS.values()).afirst() or await areconcile()
+        await cache.aset(config.DASHBOARD_CACHE_KEY, counts,
+                         config.DASHBOARD_CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,85 @@
+"""Streaming export of marks and attendance."""
+from io import StringIO
+from itertools import islice
+import csv
+import json
+from .filters import Filter, FilterSet, IN, WINDOW
+from .models import Mark
+from . import config
+
+COLUMNS = (
+    ('id', 'id'),
+    ('student_id', 'student_id'),
+    ('student', 'student__full_name'),
+    ('group', 'student__group__title'),
+    ('faculty', 'student__group__faculty__title'),
+    ('subject', 'lesson__subject__title'),
+    ('teacher', 'lesson__teacher__full_name'),
+    ('day', 'lesson__day'),
+    ('time', 'lesson__precise_time'),
+    ('mark', 'mark'),
+    ('presence', 'presence'),
+    ('created', 'created'),
+    ('modified', 'modified'),
+)
+HEADER = tuple(name for name, _ in COLUMNS)
+
+EXPORT_FILTERS = FilterSet(
+    Mark,
+    Filter('student__group__faculty', IN, name='faculty'),
+    Filter('student__group', IN, name='group'),
+    Filter('lesson__subject', IN, name='subject'),
+    Filter('lesson__day', WINDOW, name='day'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(params):
+    """Flat value tuples for the filtered marks, read through a server-side cursor."""
+    queryset = EXPORT_FILTERS.filter_queryset(Mark.objects.order_by(), params)
+    return queryset.values_list(*(path for _, path in COLUMNS)).iterator(
+        chunk_size=config.EXPORT_CHUNK_SIZE)
+
+
+def batches(rows):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, config.EXPORT_CHUNK_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def csv_chunks(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    for batch in batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(rows):
+    for batch in batches(rows):
+        yield ''.join(
+            json.dumps(dict(zip(HEADER, row)), default=str, ensure_ascii=False) + '\n'
+            for row in batch
+        )
+
+
+FORMATS = {
+    'csv': csv_chunks,
+    'ndjson': ndjson_chunks,
+}
+
+
+def export_chunks(params, export_format: str = 'csv'):
+    return FORMATS[export_format](export_rows(params))
@@ -0,0 +1,124 @@
+"""Typed query-string filters for the university_app REST API."""
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import models
+from rest_framework.exceptions import ValidationError
+from .models import Faculty, Group, Teacher, Lesson, Mark, Hometask, GradeAggregate
+
+EXACT = ('exact',)
+IN = ('exact', 'in')
+RANGE = ('exact', 'in', 'gte', 'lte', 'gt', 'lt')
+WINDOW = ('gte', 'lte', 'gt', 'lt')
+LIST_SEPARATOR = ','
+
+
+def resolve_field(cls_model: models.Model, path: str):
+    """Return (model field, crosses a to-many relation) for a lookup path like 'lesson__day'."""
+    many = False
+    field = None
+    for name in path.split('__'):
+        field = cls_model._meta.get_field(name)
+        if field.is_relation:
+            many = many or field.many_to_many or field.one_to_many
+            cls_model = field.related_model
+    return field, many
+
+
+class Filter:
+    def __init__(self, path: str, lookups: tuple = EXACT, name: str = None):
+        self.path = path
+        self.lookups = lookups
+        self.name = name or path
+
+    def bind(self, cls_model: models.Model):
+        field, self.many = resolve_field(cls_model, self.path)
+        if field.is_relation:
+            field = field.related_model._meta.pk
+        self.model_field = field
+        return self
+
+    def params(self):
+        for lookup in self.lookups:
+            yield (self.name if lookup == 'exact' else f'{self.name}__{lookup}'), lookup
+
+    def parse(self, param: str, raw: str, lookup: str):
+        values = raw.split(LIST_SEPARATOR) if lookup == 'in' else [raw]
+        try:
+            parsed = [self.model_field.to_python(value.strip()) for value in values]
+        except DjangoValidationError as error:
+            raise ValidationError({param: error.messages})
+        if any(value is None for value in parsed):
+            raise ValidationError({param: [f'Invalid value: {raw}']})
+        return parsed if lookup == 'in' else parsed[0]
+
+
+class FilterSet:
+    def __init__(self, cls_model: models.Model, *filters: Filter):
+        self.cls_model = cls_model
+        self.params = {}
+        for query_filter in filters:
+            query_filter.bind(cls_model)
+            for param, lookup in query_filter.params():
+                self.params[param] = query_filter, lookup
+
+    @classmethod
+    def for_serializer(cls, serializer, *filters: Filter):
+        """Exact filters on every serializer field, extended by the declared filters."""
+        cls_model = serializer.Meta.model
+        declared = {query_filter.path for query_filter in filters}
+        exact = []
+        for name in serializer.Meta.fields:
+            if name in declared:
+                continue
+            try:
+                cls_model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            exact.append(Filter(name))
+        return cls(cls_model, *exact, *filters)
+
+    def filter_queryset(self, queryset: models.QuerySet, query_params) -> models.QuerySet:
+        for param, raw in query_params.items():
+            if param not in self.params or raw == '':
+                continue
+            query_filter, lookup = self.params[param]
+            condition = {f'{query_filter.path}__{lookup}': query_filter.parse(
+                param, raw, lookup)}
+            if query_filter.many:
+                # to-many joins would duplicate rows, so filter through a subquery
+                matching = self.cls_model.objects.filter(**condition).values('pk')
+                queryset = queryset.filter(pk__in=matching)
+            else:
+                queryset = queryset.filter(**condition)
+        return queryset
+
+
+FILTERS = {
+    Faculty: (),
+    Group: (Filter('faculty', IN),),
+    Teacher: (Filter('faculty', IN), Filter('subjects', IN)),
+    Lesson: (
+        Filter('day', RANGE),
+        Filter('teacher', IN),
+        Filter('subject', IN),
+        Filter('groups', IN),
+    ),
+    Mark: (
+        Filter('mark', RANGE),
+        Filter('student', IN),
+        Filter('lesson', IN),
+        Filter('created', WINDOW),
+        Filter('modified', WINDOW),
+        Filter('lesson__day', RANGE),
+    ),
+    Hometask: (
+        Filter('lesson', IN),
+        Filter('created', WINDOW),
+        Filter('lesson__day', RANGE),
+    ),
+    GradeAggregate: (
+        Filter('student', IN),
+        Filter('subject', IN),
+        Filter('student__group', IN, name='group'),
+        Filter('student__group__faculty', IN, name='faculty'),
+    ),
+}
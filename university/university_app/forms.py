@@ -1,5 +1,7 @@
-from django.forms import ModelForm, Select
+from django.forms import ChoiceField, DateField, Form, IntegerField, ModelForm, Select, UUIDField
+from django.core.exceptions import ValidationError
 from .models import Mark, Lesson, Student
+from . import config, grading
 
 
 class AddMarkForm(ModelForm):
@@ -20,3 +22,46 @@ class AddMarkForm(ModelForm):
             'student': Select(attrs={'class': 'form-control'}),
             'lesson': Select(attrs={'class': 'form-control'})
         }
+
+
+class GradeLessonForm(Form):
+    def __init__(self, lesson, *args, **kwargs):
+        super(GradeLessonForm, self).__init__(*args, **kwargs)
+        self.lesson = lesson
+        self.students = list(grading.lesson_students(lesson).order_by('full_name'))
+        for student in self.students:
+            self.fields[f'mark_{student.id}'] = ChoiceField(
+                label=student.full_name, choices=config.MARK_CHOICES, required=False,
+                widget=Select(attrs={'class': 'form-control'}))
+            self.fields[f'presence_{student.id}'] = ChoiceField(
+                label='', choices=config.PRESENCE_CHOICES, required=False,
+                widget=Select(attrs={'class': 'form-control'}))
+
+    def rows(self):
+        for student in self.students:
+            yield student, self[f'mark_{student.id}'], self[f'presence_{student.id}']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        entries = []
+        for student in self.students:
+            mark = cleaned_data.get(f'mark_{student.id}')
+            presence = cleaned_data.get(f'presence_{student.id}')
+            if mark or presence:
+                entries.append({'student_id': student.id,
+                               'mark': int(mark) if mark else None, 'presence': presence})
+        try:
+            self.marks = grading.build_marks(self.lesson, entries)
+        except ValidationError as error:
+            raise ValidationError(error.messages)
+        return cleaned_data
+
+    def save(self):
+        return grading.save_marks(self.marks)
+
+
+class GradebookForm(Form):
+    group = UUIDField()
+    subject = UUIDField()
+    start = DateField(required=False)
+    days = IntegerField(required=False, min_value=1, max_value=config.GRADEBOOK_MAX_DAYS)
@@ -0,0 +1,85 @@
+"""Journal grid of a group and subject: students by lessons."""
+from array import array
+from datetime import timedelta
+import numpy as np
+from .models import Lesson, Student, Mark, SubjectToGroup, SubjectToTeacher
+from .roles import Role
+from . import config
+
+LABELS = np.array([''] + [str(mark) for mark in config.MARKS])
+ABSENT_LABELS = np.array([config.ABSENT] + [f'{mark} {config.ABSENT}' for mark in config.MARKS])
+
+
+def can_open(role: Role, group_id, subject_id) -> bool:
+    """Superusers, and teachers of the subject when the group studies it."""
+    if role.is_superuser:
+        return True
+    if not role.teacher:
+        return False
+    taught = SubjectToTeacher.objects.filter(teacher_id=role.teacher.id).values('subject_id')
+    return SubjectToGroup.objects.filter(
+        group_id=group_id, subject_id=subject_id, subject_id__in=taught).exists()
+
+
+class Gradebook:
+    """Dense marks (0 for none) and absence matrices, students down, lessons across."""
+
+    def __init__(self, students: list, lessons: list, marks, absent, start, end):
+        self.students = students
+        self.lessons = lessons
+        self.marks = marks
+        self.absent = absent
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def build(cls, group_id, subject_id, start, days: int = config.GRADEBOOK_WINDOW_DAYS):
+        end = start + timedelta(days=days - 1)
+        students = list(Student.objects.filter(group_id=group_id).order_by(
+            'full_name', 'id').values_list('id', 'full_name'))
+        lessons = list(Lesson.objects.filter(
+            groups=group_id, subject_id=subject_id, day__range=(start, end),
+        ).order_by('day', 'precise_time', 'id').values_list('id', 'day', 'precise_time'))
+        shape = (len(students), len(lessons))
+        marks, absent = np.zeros(shape, dtype=np.int8), np.zeros(shape, dtype=np.bool_)
+        if students and lessons:
+            rows = {student_id: row for row, (student_id, _) in enumerate(students)}
+            columns = {lesson_id: column for column, (lesson_id, _, _) in enumerate(lessons)}
+            cell_rows, cell_columns, cell_marks, cell_absent = array('q'), array('q'), array('b'), bytearray()
+            for student_id, lesson_id, mark, presence in Mark.objects.filter(
+                    lesson_id__in=columns, student_id__in=rows,
+            ).values_list('student_id', 'lesson_id', 'mark', 'presence'):
+                cell_rows.append(rows[student_id])
+                cell_columns.append(columns[lesson_id])
+                cell_marks.append(mark if mark in config.MARKS else 0)
+                cell_absent.append(presence == config.ABSENT)
+            cell_rows = np.frombuffer(cell_rows, dtype=np.int64)
+            cell_columns = np.frombuffer(cell_columns, dtype=np.int64)
+            marks[cell_rows, cell_columns] = np.frombuffer(cell_marks, dtype=np.int8)
+            absent[cell_rows, cell_columns] = np.frombuffer(cell_absent, dtype=np.bool_)
+        return cls(students, lessons, marks, absent, start, end)
+
+    def labels(self) -> list:
+        """Cell texts as nested lists, so templates only print strings."""
+        return np.where(self.absent, ABSENT_LABELS[self.marks], LABELS[self.marks]).tolist()
+
+    def rows(self) -> list:
+        return [(full_name, cells) for (_, full_name), cells in zip(self.students, self.labels())]
+
+    def previous_start(self):
+        return self.start - (self.end - self.start + timedelta(days=1))
+
+    def next_start(self):
+        return self.end + timedelta(days=1)
+
+    def as_dict(self) -> dict:
+        return {
+            'from': self.start,
+            'to': self.end,
+            'students': [{'id': student_id, 'full_name': full_name}
+                         for student_id, full_name in self.students],
+            'lessons': [{'id': lesson_id, 'day': day, 'time': precise_time}
+                        for lesson_id, day, precise_time in self.lessons],
+            'marks': self.marks.tolist(),
+            'absent': self.absent.tolist(),
+        }
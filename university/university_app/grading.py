@@ -0,0 +1,67 @@
+"""Bulk grading of a whole lesson."""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .models import Lesson, Student, Mark, LessonToGroup, validate_mark, validate_presence
+from .validators import validate_marks
+
+
+def lesson_students(lesson: Lesson):
+    group_ids = LessonToGroup.objects.filter(lesson=lesson).values('group_id')
+    return Student.objects.filter(group_id__in=group_ids)
+
+
+def build_marks(lesson: Lesson, entries) -> list:
+    """Validate entries (dicts with student_id, mark, presence) against lesson."""
+    errors, marks, seen = [], [], set()
+    for entry in entries:
+        student_id, mark, presence = entry['student_id'], entry.get('mark'), entry.get('presence')
+        if student_id in seen:
+            errors.append(ValidationError(
+                f'The student {student_id} is graded twice'
+            ))
+            continue
+        seen.add(student_id)
+        try:
+            if mark:
+                validate_mark(mark)
+            validate_presence(presence)
+        except ValidationError as error:
+            errors.append(error)
+            continue
+        marks.append(Mark(lesson=lesson, student_id=student_id,
+                     mark=mark or None, presence=presence or None))
+    try:
+        validate_marks(marks)
+    except ValidationError as error:
+        errors.extend(error.error_list)
+    if errors:
+        raise ValidationError(errors)
+    return marks
+
+
+def check_unmarked(marks: list) -> list:
+    """Errors for students who already have a mark in the lesson, e.g. on a resubmitted form."""
+    if not marks:
+        return []
+    marked = {(lesson_id, student_id): name for lesson_id, student_id, name in Mark.objects.filter(
+        lesson_id__in={mark.lesson_id for mark in marks},
+        student_id__in={mark.student_id for mark in marks},
+    ).values_list('lesson_id', 'student_id', 'student__full_name')}
+    return [ValidationError(f'The student {marked[key]} is already marked for this lesson')
+            for key in ((mark.lesson_id, mark.student_id) for mark in marks) if key in marked]
+
+
+def save_marks(marks: list) -> list:
+    """Insert marks; concurrent submissions for one lesson are checked one at a time."""
+    with transaction.atomic():
+        # the lesson row lock serializes graders between the check and the insert
+        list(Lesson.objects.select_for_update().filter(
+            id__in={mark.lesson_id for mark in marks}).order_by('id').values_list('id'))
+        errors = check_unmarked(marks)
+        if errors:
+            raise ValidationError(errors)
+        return Mark.objects.bulk_create(marks)
+
+
+def grade_lesson(lesson: Lesson, entries) -> list:
+    return save_marks(build_marks(lesson, entries))
@@ -0,0 +1,63 @@
+from collections import defaultdict
+from time import perf_counter
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ValidationError
+from university_app import attendance, config
+from university_app.export import EXPORT_FILTERS
+from university_app.models import Mark
+
+
+def naive_rates(params) -> dict:
+    """Per-student absence rates from a plain loop over Mark instances."""
+    lessons, absences = defaultdict(int), defaultdict(int)
+    for mark in EXPORT_FILTERS.filter_queryset(Mark.objects.all(), params):
+        lessons[mark.student_id] += 1
+        if mark.presence == config.ABSENT:
+            absences[mark.student_id] += 1
+    return {student_id: absences[student_id] / count for student_id, count in lessons.items()}
+
+
+class Command(BaseCommand):
+    help = 'Absence rates per student, group or week as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', choices=tuple(attendance.REPORTS), default='student')
+        parser.add_argument('--above', type=float,
+                            help='only students whose absence rate exceeds this fraction')
+        parser.add_argument('--faculty', help='faculty id(s), comma separated')
+        parser.add_argument('--group', help='group id(s), comma separated')
+        parser.add_argument('--subject', help='subject id(s), comma separated')
+        parser.add_argument('--from', dest='day__gte', help='first lesson day, YYYY-MM-DD')
+        parser.add_argument('--to', dest='day__lte', help='last lesson day, YYYY-MM-DD')
+        parser.add_argument('--benchmark', action='store_true',
+                            help='time the vectorized report against a naive ORM loop')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in ('faculty', 'group', 'subject', 'day__gte', 'day__lte')
+                  if options[name]}
+        try:
+            if options['benchmark']:
+                self.benchmark(params)
+                return
+            rows = attendance.report(params, options['by'], options['above'])
+        except ValidationError as error:
+            raise CommandError(error.detail)
+        for row in rows:
+            self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+    def benchmark(self, params):
+        start = perf_counter()
+        expected = naive_rates(params)
+        naive = perf_counter() - start
+        start = perf_counter()
+        frame = attendance.Attendance.load(params)
+        loaded = perf_counter() - start
+        rows = frame.by_student()
+        vectorized = perf_counter() - start
+        if {row['student']: row['rate'] for row in rows} != expected:
+            raise CommandError('Vectorized rates differ from the ORM loop')
+        self.stdout.write(f'marks: {len(frame.student)}, students: {len(rows)}')
+        self.stdout.write(f'naive ORM loop: {naive:.3f}s')
+        self.stdout.write(f'vectorized: {vectorized:.3f}s (loading {loaded:.3f}s)')
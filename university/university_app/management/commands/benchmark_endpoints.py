@@ -0,0 +1,62 @@
+import json
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment
+from university_app import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database at each scale and measure p50/p95 latency, '
+            'queries and rows of every route for every role')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', dest='scales', choices=tuple(benchmark.SCALES),
+                            help='scale to seed, repeatable (default: small and medium)')
+        parser.add_argument('--role', action='append', dest='roles', choices=benchmark.ROLES,
+                            help='role to request as, repeatable (default: all)')
+        parser.add_argument('--repeat', type=int, default=20, help='measured requests per route')
+        parser.add_argument('--warm', action='store_true', help='keep the page cache between requests')
+        parser.add_argument('--seed', type=int, default=0, help='random seed of the dataset')
+        parser.add_argument('--output', help='write the results to this JSON file instead of stdout')
+        parser.add_argument('--compare', help='baseline JSON file to check the results against')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                            help='allowed relative p95 growth over the baseline')
+        parser.add_argument('--latency-floor', type=float, default=2.0,
+                            help='p95 growth in ms always allowed, for noise on fast routes')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+        results = []
+        # 403s and 404s are measured like any other answer
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for scale in options['scales'] or ('small', 'medium'):
+                results += benchmark.run(scale, benchmark.SCALES[scale], options['repeat'],
+                                         options['roles'] or benchmark.ROLES, options['warm'], options['seed'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        report = json.dumps({'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+            for result in results:
+                self.stdout.write('{scale:<7}{role:<11}{route:<32}{status:>4}{p50_ms:>10.1f}{p95_ms:>10.1f}'
+                                  '{queries:>6}{rows:>8}'.format(**result))
+        else:
+            self.stdout.write(report)
+        if baseline is not None:
+            regressions = benchmark.compare(
+                results, baseline, options['latency_tolerance'], options['latency_floor'])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
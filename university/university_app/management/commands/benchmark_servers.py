@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+import os
+import shlex
+import subprocess
+import sys
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+# (command, ASYNC_VIEWS)
+SERVERS = {
+    'asgi': ('{python} -m uvicorn university.asgi:application --port {port} '
+             '--workers {workers} --log-level warning', '1'),
+    'wsgi': ('{python} -m uvicorn university.wsgi:application --interface wsgi --port {port} '
+             '--workers {workers} --log-level warning', '0'),
+}
+DEFAULT_PATHS = ('/', '/faculties/', '/teachers/')
+
+
+def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            sleep(0.2)
+    raise CommandError(f'No server answered at {url}')
+
+
+def hammer(base_url: str, paths, duration: float, concurrency: int, cookies: dict) -> tuple:
+    """(requests done, non-200 answers) from concurrency clients over duration seconds."""
+    deadline = monotonic() + duration
+
+    def client(offset: int):
+        done = failed = 0
+        with requests.Session() as session:
+            session.cookies.update(cookies)
+            while monotonic() < deadline:
+                path = paths[(offset + done) % len(paths)]
+                failed += session.get(base_url + path).status_code != 200
+                done += 1
+        return done, failed
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    return sum(done for done, _ in results), sum(failed for _, failed in results)
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/sec of the ASGI (async views) and WSGI entry points under uvicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths',
+                            help=f'path to request, repeatable (default: {", ".join(DEFAULT_PATHS)})')
+        parser.add_argument('--duration', type=float, default=10, help='seconds per server')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--sessionid', help='session cookie, for pages behind login')
+        parser.add_argument('--server', action='append', dest='servers', choices=tuple(SERVERS),
+                            help='server to run, repeatable (default: both)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        cookies = {'sessionid': options['sessionid']} if options['sessionid'] else {}
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        for name in options['servers'] or SERVERS:
+            command, async_views = SERVERS[name]
+            command = command.format(python=sys.executable, port=options['port'], workers=options['workers'])
+            server = subprocess.Popen(shlex.split(command), env={**os.environ, 'ASYNC_VIEWS': async_views})
+            try:
+                wait_until_up(base_url + paths[0])
+                done, failed = hammer(base_url, paths, options['duration'], options['concurrency'], cookies)
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write(
+                f'{name}: {done / options["duration"]:.1f} requests/sec, {done} requests, {failed} not 200')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from university_app import export
+
+
+class Command(BaseCommand):
+    help = 'Stream marks and attendance as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=tuple(export.FORMATS), default='csv')
+        parser.add_argument('--faculty', help='faculty id(s), comma separated')
+        parser.add_argument('--group', help='group id(s), comma separated')
+        parser.add_argument('--subject', help='subject id(s), comma separated')
+        parser.add_argument('--from', dest='day__gte', help='first lesson day, YYYY-MM-DD')
+        parser.add_argument('--to', dest='day__lte', help='last lesson day, YYYY-MM-DD')
+        parser.add_argument('--output', help='file to write, stdout by default')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in ('faculty', 'group', 'subject', 'day__gte', 'day__lte')
+                  if options[name]}
+        try:
+            chunks = export.export_chunks(params, options['format'])
+            if options['output']:
+                with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                    output.writelines(chunks)
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
+        except ValidationError as error:
+            raise CommandError(error.detail)
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from university_app import aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute per student and subject grade aggregates from the marks table'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'grade aggregates: {aggregates.rebuild()}')
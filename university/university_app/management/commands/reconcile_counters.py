@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from university_app import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount faculties, groups, teachers and students for the homepage counters'
+
+    def handle(self, *args, **options):
+        for field, value in counters.reconcile().items():
+            self.stdout.write(f'{field}: {value}')
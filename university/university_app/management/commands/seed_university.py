@@ -0,0 +1,37 @@
+from datetime import date
+from time import perf_counter
+from django.core.management.base import BaseCommand, CommandError
+from university_app import seeding
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a synthetic university of configurable size'
+
+    def add_arguments(self, parser):
+        for name, default in seeding.DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', dest=name, type=int, default=default)
+        for name, default in seeding.DEFAULT_RATES.items():
+            parser.add_argument(f'--{name}-rate', dest=name, type=float, default=default)
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='first week of lessons, YYYY-MM-DD (default: weeks ago)')
+        parser.add_argument('--seed', type=int, default=0, help='random seed')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='processes generating lessons and marks (needs a database server)')
+        parser.add_argument('--batch-size', type=int, default=seeding.config.SEED_BATCH_SIZE)
+        parser.add_argument('--validate', action='store_true',
+                            help='run the lesson and mark validators over every batch')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        try:
+            created = seeding.seed(
+                sizes={name: options[name] for name in seeding.DEFAULT_SIZES},
+                rates={name: options[name] for name in seeding.DEFAULT_RATES},
+                start=options['start'], seed=options['seed'], workers=options['workers'],
+                batch_size=options['batch_size'], validate=options['validate'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for cls_model, count in created.items():
+            self.stdout.write(f'{cls_model._meta.db_table}: {count}')
+        self.stdout.write(f'seeded in {perf_counter() - started:.1f}s')
@@ -0,0 +1,258 @@
+"""In-process request metrics, served in the Prometheus text format."""
+from asyncio import iscoroutinefunction
+from bisect import bisect_left
+from contextlib import suppress
+from contextvars import ContextVar
+from os import getpid, path, register_at_fork, remove, replace
+from tempfile import NamedTemporaryFile
+from time import monotonic, perf_counter
+import atexit
+import glob
+import json
+import logging
+import threading
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+from . import config
+
+logger = logging.getLogger(__name__)
+COUNTER, HISTOGRAM = 'counter', 'histogram'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REQUESTS = 'university_requests_total'
+DURATION = 'university_request_duration_seconds'
+QUERIES = 'university_request_queries'
+CACHE_LOOKUPS = 'university_cache_lookups_total'
+query_count = ContextVar('request_query_count', default=None)
+
+
+class Registry:
+    """Counters and histograms keyed by name and label pairs."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.local = threading.local()
+        # reentrant: flush() collects while holding it
+        self.lock = threading.RLock()
+        self.shards = []
+        self.retired = {}
+        self.next_flush = 0
+
+    def counter(self, name: str, description: str):
+        self.metrics[name] = (COUNTER, description, ())
+
+    def histogram(self, name: str, description: str, buckets: tuple):
+        self.metrics[name] = (HISTOGRAM, description, tuple(buckets))
+
+    def shard(self) -> dict:
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append((threading.current_thread(), shard))
+            return shard
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        shard = self.shard()
+        values = shard.get((name, labels))
+        if values is None:
+            values = shard[name, labels] = [0]
+        values[0] += value
+
+    def observe(self, name: str, value: float, labels: tuple = ()) -> None:
+        """Count value in its bucket; the last two slots are +Inf and the sum."""
+        buckets = self.metrics[name][2]
+        shard = self.shard()
+        values = shard.get((name, labels))
+        if values is None:
+            values = shard[name, labels] = [0] * (len(buckets) + 2)
+        values[bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def collect(self) -> dict:
+        """Totals of all threads of this process: {(name, labels): values}."""
+        with self.lock:
+            # a finished thread writes no more: fold its shard in for good
+            for thread, shard in [entry for entry in self.shards if not entry[0].is_alive()]:
+                merge(self.retired, shard)
+            self.shards = [entry for entry in self.shards if entry[0].is_alive()]
+            totals = merge({}, self.retired)
+            for _, shard in self.shards:
+                # dict.copy() runs under the GIL, safe against the owner adding keys
+                merge(totals, shard.copy())
+        return totals
+
+    def reset(self) -> None:
+        self.local = threading.local()
+        self.lock = threading.RLock()
+        self.shards, self.retired = [], {}
+
+    def flush(self, directory: str) -> None:
+        """Write this process's totals to directory/<pid>.json; metrics never fail a request."""
+        target = path.join(directory, f'{getpid()}.json')
+        with self.lock:
+            data = [[name, labels, values] for (name, labels), values in self.collect().items()]
+            temporary = None
+            try:
+                with NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as file:
+                    temporary = file.name
+                    json.dump(data, file)
+                replace(temporary, target)
+            except OSError:
+                logger.warning('Cannot write metrics to %s', target, exc_info=True)
+                if temporary:
+                    with suppress(OSError):
+                        remove(temporary)
+
+    def maybe_flush(self) -> None:
+        directory = getattr(settings, 'METRICS_DIR', '')
+        if not directory:
+            return
+        with self.lock:
+            if monotonic() >= self.next_flush:
+                self.next_flush = monotonic() + config.METRICS_FLUSH_SECONDS
+                self.flush(directory)
+
+    def gather(self) -> dict:
+        """Totals of every process writing to METRICS_DIR, or of this one."""
+        directory = getattr(settings, 'METRICS_DIR', '')
+        if not directory:
+            return self.collect()
+        self.flush(directory)
+        totals = {}
+        # files of exited workers stay, so counters never go back: empty the directory when deploying
+        for filename in glob.glob(path.join(directory, '*.json')):
+            try:
+                with open(filename) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            merge(totals, {(name, tuple(map(tuple, labels))): values for name, labels, values in data})
+        return totals
+
+    def render(self, totals: dict) -> str:
+        lines = []
+        for name, (kind, description, buckets) in self.metrics.items():
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+            for (metric, labels), values in sorted(totals.items()):
+                if metric != name:
+                    continue
+                if kind == COUNTER:
+                    lines.append(f'{name}{format_labels(labels)} {number(values[0])}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", number(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {number(values[-1])}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def merge(totals: dict, values_by_key: dict) -> dict:
+    for key, values in values_by_key.items():
+        found = totals.get(key)
+        if found is None:
+            totals[key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                found[index] += value
+    return totals
+
+
+def number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+registry = Registry()
+registry.counter(REQUESTS, 'Requests handled, by route, method and status.')
+registry.histogram(DURATION, 'Request latency in seconds, by route.', config.METRICS_LATENCY_BUCKETS)
+registry.histogram(QUERIES, 'Database queries per request, by route.', config.METRICS_QUERY_BUCKETS)
+registry.counter(CACHE_LOOKUPS, 'Cache lookups, by cache and result (hit or miss).')
+# a forked worker starts from zero instead of counting its parent's requests again
+register_at_fork(after_in_child=registry.reset)
+
+
+@atexit.register
+def flush_on_exit():
+    if settings.configured and getattr(settings, 'METRICS_DIR', ''):
+        registry.flush(settings.METRICS_DIR)
+
+
+def cache_lookup(cache_name: str, hit: bool) -> None:
+    registry.inc(CACHE_LOOKUPS, (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+def count_query(execute, sql, params, many, context):
+    counter = query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def attach_query_counter(sender, connection, **kwargs):
+    # the wrapper list outlives reconnects of the same connection object
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def route_label(request) -> str:
+    """The URL name, rest/<name> for REST routes; one label for every unknown path."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return config.METRICS_UNMATCHED_ROUTE
+    return f'rest/{match.view_name}' if match.route.startswith('rest/') else match.view_name
+
+
+def record(request, response, started: float, queries: int) -> None:
+    route = route_label(request)
+    registry.inc(REQUESTS, (('route', route), ('method', request.method), ('status', str(response.status_code))))
+    registry.observe(DURATION, perf_counter() - started, (('route', route),))
+    registry.observe(QUERIES, queries, (('route', route),))
+    registry.maybe_flush()
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started, counter = perf_counter(), [0]
+            # sync_to_async copies the context: ORM threads count into this list
+            token = query_count.set(counter)
+            try:
+                response = await get_response(request)
+            finally:
+                query_count.reset(token)
+            record(request, response, started, counter[0])
+            return response
+    else:
+        def middleware(request):
+            started, counter = perf_counter(), [0]
+            token = query_count.set(counter)
+            try:
+                response = get_response(request)
+            finally:
+                query_count.reset(token)
+            record(request, response, started, counter[0])
+            return response
+    return middleware
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(registry.gather()), content_type=CONTENT_TYPE)
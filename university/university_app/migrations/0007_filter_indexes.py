@@ -0,0 +1,41 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0006_alter_mark_mark'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hometask',
+            index=models.Index(fields=['lesson', 'created'], name='hometask_lesson_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['teacher', 'day'], name='lesson_teacher_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['subject', 'day'], name='lesson_subject_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['day', 'id'], name='lesson_day_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mark',
+            index=models.Index(fields=['student', 'lesson'], name='mark_student_lesson_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mark',
+            index=models.Index(fields=['lesson', 'mark'], name='mark_lesson_mark_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mark',
+            index=models.Index(fields=['created'], name='mark_created_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+def populate_dashboard(apps, schema_editor):
+    Dashboard = apps.get_model('university_app', 'Dashboard')
+    Dashboard.objects.create(
+        id=1,
+        faculties=apps.get_model('university_app', 'Faculty').objects.count(),
+        groups=apps.get_model('university_app', 'Group').objects.count(),
+        teachers=apps.get_model('university_app', 'Teacher').objects.count(),
+        students=apps.get_model('university_app', 'Student').objects.count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0007_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dashboard',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('faculties', models.IntegerField(default=0, verbose_name='faculties')),
+                ('groups', models.IntegerField(default=0, verbose_name='groups')),
+                ('teachers', models.IntegerField(default=0, verbose_name='teachers')),
+                ('students', models.IntegerField(default=0, verbose_name='students')),
+            ],
+            options={
+                'verbose_name': 'dashboard',
+                'verbose_name_plural': 'dashboards',
+                'db_table': 'dashboard',
+            },
+        ),
+        migrations.RunPython(populate_dashboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0008_dashboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeAggregate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0, verbose_name='marks count')),
+                ('total', models.IntegerField(default=0, verbose_name='marks sum')),
+                ('total_squares', models.IntegerField(default=0, verbose_name='marks sum of squares')),
+                ('count_1', models.IntegerField(default=0, verbose_name='ones')),
+                ('count_2', models.IntegerField(default=0, verbose_name='twos')),
+                ('count_3', models.IntegerField(default=0, verbose_name='threes')),
+                ('count_4', models.IntegerField(default=0, verbose_name='fours')),
+                ('count_5', models.IntegerField(default=0, verbose_name='fives')),
+                ('absences', models.IntegerField(default=0, verbose_name='absences')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='university_app.student', verbose_name='student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='university_app.subject', verbose_name='subject')),
+            ],
+            options={
+                'verbose_name': 'grade aggregate',
+                'verbose_name_plural': 'grade aggregates',
+                'db_table': 'grade_aggregate',
+                'ordering': ['student', 'subject'],
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:38
+
+from django.db import migrations, models
+import university_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0009_grade_aggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('table', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='table')),
+                ('version', models.BigIntegerField(default=0, verbose_name='version')),
+                ('modified', models.DateTimeField(default=university_app.models.get_datetime, verbose_name='modified')),
+            ],
+            options={
+                'verbose_name': 'table version',
+                'verbose_name_plural': 'table versions',
+                'db_table': 'table_version',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# tables versions.bump() moves, so that bumps only ever update
+TABLES = (
+    'faculty', 'class', 'subject', 'teacher', 'lesson', 'student', 'mark', 'hometask',
+    'lesson_to_class', 'subject_to_class', 'subject_to_teacher', 'grade_aggregate',
+)
+
+
+def seed_table_versions(apps, schema_editor):
+    TableVersion = apps.get_model('university_app', 'TableVersion')
+    TableVersion.objects.using(schema_editor.connection.alias).bulk_create(
+        [TableVersion(table=table) for table in TABLES], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0010_table_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_table_versions, migrations.RunPython.noop),
+    ]
@@ -6,12 +6,38 @@ from . import config
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
 from django.conf.global_settings import AUTH_USER_MODEL
+from django.dispatch import Signal
+
+# sent after QuerySet.bulk_create, which skips post_save; with conflicts=True
+# some instances may not have been inserted
+bulk_created = Signal()
+# sent before and after QuerySet.update, which bulk_update uses too; both skip
+# pre_save and post_save. Receivers get the queryset, its filter may no longer
+# match the updated rows afterwards
+bulk_updating = Signal()
+bulk_updated = Signal()
 
 
 def get_datetime():
     return datetime.now(timezone.utc)
 
 
+class BulkSignalQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            conflicts = bool(kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'))
+            bulk_created.send(sender=self.model, instances=objs, conflicts=conflicts)
+        return objs
+
+    def update(self, **kwargs):
+        bulk_updating.send(sender=self.model, queryset=self, fields=set(kwargs))
+        rows = super().update(**kwargs)
+        if rows:
+            bulk_updated.send(sender=self.model, queryset=self, fields=set(kwargs), rows=rows)
+        return rows
+
+
 class UUIDMixin(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
 
@@ -44,6 +70,7 @@ class ModifiedMixin(models.Model):
 
 
 class Faculty(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     title = models.CharField(_('faculty'), max_length=config.CHARS_DEFAULT)
     description = models.TextField(_('description'), blank=True, null=True)
 
@@ -58,6 +85,7 @@ class Faculty(UUIDMixin):
 
 
 class Group(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     title = models.CharField(_('group'), max_length=config.CHARS_DEFAULT)
     faculty = models.ForeignKey(Faculty, verbose_name=_(
         'faculty'), on_delete=models.CASCADE)
@@ -67,12 +95,8 @@ class Group(UUIDMixin):
         'Subject', verbose_name=_('subjects'), through='SubjectToGroup')
 
     def clean(self):
-        # lesson-subject validation
-        for lesson in self.lessons.all():
-            if lesson.subject not in self.subjects.all():
-                raise ValidationError(
-                    f"The lesson {lesson} is not in the group's subjects"
-                )
+        from .validators import validate_groups
+        validate_groups([self])
 
     def __str__(self):
         return f'{self.title} ({self.faculty})'
@@ -85,6 +109,7 @@ class Group(UUIDMixin):
 
 
 class Subject(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     title = models.CharField(_('title'), max_length=config.CHARS_DEFAULT)
     groups = models.ManyToManyField(
         Group, verbose_name=_('groups'), through='SubjectToGroup')
@@ -102,6 +127,7 @@ class Subject(UUIDMixin):
 
 
 class Teacher(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     user = models.OneToOneField(
         AUTH_USER_MODEL, null=True, on_delete=models.CASCADE)
     full_name = models.CharField(
@@ -122,6 +148,7 @@ class Teacher(UUIDMixin):
 
 
 class Lesson(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     day = models.DateField(_('day'))
     precise_time = models.TimeField(_('precise time'))
     subject = models.ForeignKey(Subject, verbose_name=_(
@@ -132,18 +159,8 @@ class Lesson(UUIDMixin):
         Group, verbose_name=_('groups'), through='LessonToGroup')
 
     def clean(self):
-        # subject-teacher validation
-        teachers = Teacher.objects.filter(subject__id=self.subject_id)
-        if self.teacher not in teachers:
-            raise ValidationError(
-                f'The teacher {self.teacher} does not teach subject {self.subject}'
-            )
-        # subject-groups validation
-        for group in self.groups.all():
-            if self.subject not in group.subjects.all():
-                raise ValidationError(
-                    f"The group {group} does not have subject {self.subject}"
-                )
+        from .validators import validate_lessons
+        validate_lessons([self])
 
     def __str__(self):
         return f'{self.day} {self.precise_time}, {self.subject}'
@@ -153,9 +170,15 @@ class Lesson(UUIDMixin):
         verbose_name = _('lesson')
         verbose_name_plural = _('lessons')
         db_table = 'lesson'
+        indexes = [
+            models.Index(fields=['teacher', 'day'], name='lesson_teacher_day_idx'),
+            models.Index(fields=['subject', 'day'], name='lesson_subject_day_idx'),
+            models.Index(fields=['day', 'id'], name='lesson_day_id_idx'),
+        ]
 
 
 class Student(UUIDMixin, CreatedMixin):
+    objects = BulkSignalQuerySet.as_manager()
     user = models.OneToOneField(
         AUTH_USER_MODEL,  null=True, on_delete=models.CASCADE)
     full_name = models.CharField(verbose_name=_(
@@ -191,6 +214,7 @@ def validate_presence(presence: str):
 
 
 class Mark(UUIDMixin, CreatedMixin, ModifiedMixin):
+    objects = BulkSignalQuerySet.as_manager()
     mark = models.IntegerField(_('mark'), choices=config.MARK_CHOICES,
                                blank=True, null=True, validators=[validate_mark])
     presence = models.CharField(_('presence'), max_length=config.CHARS_DEFAULT, blank=True,
@@ -201,17 +225,8 @@ class Mark(UUIDMixin, CreatedMixin, ModifiedMixin):
         'lesson'), on_delete=models.CASCADE)
 
     def clean(self):
-        # student-lesson validation
-        groups = Group.objects.filter(lesson__id=self.lesson_id)
-        if self.student.group not in groups:
-            raise ValidationError(
-                f'The student {self.student} is not in the group that had a lesson on {self.lesson}'
-            )
-        # mark-or-presence-added validation
-        if not self.mark and not self.presence:
-            raise ValidationError(
-                'Mark and presence cannot be both empty'
-            )
+        from .validators import validate_marks
+        validate_marks([self])
 
     def __str__(self):
         if self.mark:
@@ -225,9 +240,15 @@ class Mark(UUIDMixin, CreatedMixin, ModifiedMixin):
         verbose_name = _('mark')
         verbose_name_plural = _('marks')
         db_table = 'mark'
+        indexes = [
+            models.Index(fields=['student', 'lesson'], name='mark_student_lesson_idx'),
+            models.Index(fields=['lesson', 'mark'], name='mark_lesson_mark_idx'),
+            models.Index(fields=['created'], name='mark_created_idx'),
+        ]
 
 
 class Hometask(UUIDMixin, CreatedMixin):
+    objects = BulkSignalQuerySet.as_manager()
     task = models.TextField(_('task'))
     lesson = models.ForeignKey(Lesson, verbose_name=_(
         'lesson'), on_delete=models.CASCADE)
@@ -240,9 +261,13 @@ class Hometask(UUIDMixin, CreatedMixin):
         verbose_name = _('hometask')
         verbose_name_plural = _('hometasks')
         db_table = 'hometask'
+        indexes = [
+            models.Index(fields=['lesson', 'created'], name='hometask_lesson_created_idx'),
+        ]
 
 
 class LessonToGroup(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     group = models.ForeignKey(
         Group, on_delete=models.CASCADE, db_column='class_id')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
@@ -252,6 +277,7 @@ class LessonToGroup(UUIDMixin):
 
 
 class SubjectToGroup(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     group = models.ForeignKey(
         Group, on_delete=models.CASCADE, db_column='class_id')
@@ -262,9 +288,67 @@ class SubjectToGroup(UUIDMixin):
 
 
 class SubjectToTeacher(UUIDMixin):
+    objects = BulkSignalQuerySet.as_manager()
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
 
     class Meta:
         db_table = 'subject_to_teacher'
         unique_together = (('subject', 'teacher'),)
+
+
+class GradeAggregate(UUIDMixin):
+    student = models.ForeignKey(Student, verbose_name=_(
+        'student'), on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, verbose_name=_(
+        'subject'), on_delete=models.CASCADE)
+    count = models.IntegerField(_('marks count'), default=0)
+    total = models.IntegerField(_('marks sum'), default=0)
+    total_squares = models.IntegerField(_('marks sum of squares'), default=0)
+    count_1 = models.IntegerField(_('ones'), default=0)
+    count_2 = models.IntegerField(_('twos'), default=0)
+    count_3 = models.IntegerField(_('threes'), default=0)
+    count_4 = models.IntegerField(_('fours'), default=0)
+    count_5 = models.IntegerField(_('fives'), default=0)
+    absences = models.IntegerField(_('absences'), default=0)
+
+    def __str__(self):
+        return f'{self.student}, {self.subject}: {self.count}'
+
+    class Meta:
+        ordering = ['student', 'subject']
+        verbose_name = _('grade aggregate')
+        verbose_name_plural = _('grade aggregates')
+        db_table = 'grade_aggregate'
+        unique_together = (('student', 'subject'),)
+
+
+class Dashboard(models.Model):
+    id = models.PositiveSmallIntegerField(
+        primary_key=True, default=config.DASHBOARD_ID, editable=False)
+    faculties = models.IntegerField(_('faculties'), default=0)
+    groups = models.IntegerField(_('groups'), default=0)
+    teachers = models.IntegerField(_('teachers'), default=0)
+    students = models.IntegerField(_('students'), default=0)
+
+    def __str__(self):
+        return f'{self.faculties} / {self.groups} / {self.teachers} / {self.students}'
+
+    class Meta:
+        verbose_name = _('dashboard')
+        verbose_name_plural = _('dashboards')
+        db_table = 'dashboard'
+
+
+class TableVersion(models.Model):
+    table = models.CharField(_('table'), max_length=64, primary_key=True)
+    version = models.BigIntegerField(_('version'), default=0)
+    modified = models.DateTimeField(_('modified'), default=get_datetime)
+
+    def __str__(self):
+        return f'{self.table}: {self.version}'
+
+    class Meta:
+        verbose_name = _('table version')
+        verbose_name_plural = _('table versions')
+        db_table = 'table_version'
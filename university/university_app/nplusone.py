@@ -0,0 +1,156 @@
+"""Runtime N+1 detection: one SQL shape run again and again in a request."""
+from asyncio import iscoroutinefunction
+from collections import Counter
+from os import path
+import logging
+import re
+import sys
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models.query import BaseIterable
+from django.template.base import Node
+from django.utils.decorators import sync_and_async_middleware
+from .queries import shape, wrap_connections
+
+logger = logging.getLogger(__name__)
+LOG, RAISE, OFF = 'log', 'raise', 'off'
+SELECT = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+# frames of these files are the detector's own, never call sites
+OWN_FILES = tuple(path.join(path.dirname(__file__), name)
+                  for name in ('nplusone.py', 'queries.py', 'profiler.py', 'metrics.py'))
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+def project_file(filename: str) -> bool:
+    return (filename.startswith(str(settings.BASE_DIR)) and 'site-packages' not in filename
+            and not filename.startswith(OWN_FILES))
+
+
+def relation(queryset) -> tuple:
+    """(model, accessor, related model, lookup) of a lazy relation load, or Nones."""
+    instance = queryset._hints.get('instance') if queryset is not None else None
+    if instance is None:
+        return None, None, None, None
+    cls_model = type(instance)
+    for field in cls_model._meta.get_fields():
+        if field.is_relation and field.related_model is queryset.model:
+            accessor = field.name if field.concrete else field.get_accessor_name()
+            lookup = 'select_related' if field.many_to_one or field.one_to_one else 'prefetch_related'
+            return cls_model, accessor, queryset.model, lookup
+    return None, None, None, None
+
+
+class Detection:
+    def __init__(self, sql: str, frame):
+        self.sql = sql
+        self.count = 0
+        self.site = self.template = None
+        queryset = None
+        while frame is not None:
+            owner = frame.f_locals.get('self')
+            if queryset is None and isinstance(owner, BaseIterable):
+                queryset = owner.queryset
+            if self.site is None and project_file(frame.f_code.co_filename):
+                self.site = f'{path.relpath(frame.f_code.co_filename, settings.BASE_DIR)}:{frame.f_lineno} ' \
+                            f'in {frame.f_code.co_name}'
+            if isinstance(owner, Node) and getattr(owner, 'token', None) is not None:
+                self.template = f'{owner.origin.template_name}:{owner.token.lineno}'
+                break
+            frame = frame.f_back
+        self.model, self.accessor, self.related_model, self.lookup = relation(queryset)
+
+    def suggestion(self, detections) -> str:
+        if self.model is None:
+            return 'fetch these rows in one query'
+        root, lookup_path, lookup = self.model, self.accessor, self.lookup
+        parents = {(other.related_model, other.lookup): other for other in detections if other is not self}
+        seen = {self}
+        # climb while the rows holding this relation were loaded lazily themselves
+        parent = parents.get((root, 'select_related'))
+        while parent is not None and parent not in seen:
+            seen.add(parent)
+            root, lookup_path = parent.model, f'{parent.accessor}__{lookup_path}'
+            parent = parents.get((root, 'select_related'))
+        return f"{self.model.__name__}.{self.accessor} is loaded per row: " \
+               f"{lookup}('{lookup_path}') on the {root.__name__} queryset"
+
+    def message(self, detections) -> str:
+        where = ', '.join(filter(None, (self.site, self.template))) or 'unknown call site'
+        return f'N+1: {self.count} x {self.sql}\n  at {where}\n  {self.suggestion(detections)}'
+
+
+class Detector:
+    """Context manager counting query shapes on every connection of the thread."""
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.found = {}
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not SELECT.match(sql):
+            return execute(sql, params, many, context)
+        key = shape(sql)
+        self.counts[key] += 1
+        if self.counts[key] == self.threshold:
+            self.found[key] = Detection(key, sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = wrap_connections(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    def detections(self) -> list:
+        for key, detection in self.found.items():
+            detection.count = self.counts[key]
+        return list(self.found.values())
+
+    def report(self, mode: str, label: str = '') -> None:
+        detections = self.detections()
+        messages = [detection.message(detections) for detection in detections]
+        if not messages:
+            return
+        if mode == RAISE:
+            raise NPlusOneDetected('\n'.join(filter(None, [label] + messages)))
+        for message in messages:
+            logger.warning('%s %s', label, message)
+
+
+def mode() -> str:
+    return getattr(settings, 'NPLUSONE_MODE', OFF)
+
+
+def detector() -> Detector:
+    return Detector(getattr(settings, 'NPLUSONE_THRESHOLD', 3))
+
+
+@sync_and_async_middleware
+def nplusone_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if mode() == OFF:
+                return await get_response(request)
+            detecting = detector()
+            await sync_to_async(detecting.__enter__)()
+            try:
+                response = await get_response(request)
+            finally:
+                await sync_to_async(detecting.__exit__)(None, None, None)
+            detecting.report(mode(), f'{request.method} {request.get_full_path()}')
+            return response
+    else:
+        def middleware(request):
+            if mode() == OFF:
+                return get_response(request)
+            with detector() as detecting:
+                response = get_response(request)
+            detecting.report(mode(), f'{request.method} {request.get_full_path()}')
+            return response
+    return middleware
@@ -0,0 +1,87 @@
+"""Page cache for entity and catalog views, keyed by the versions of the tables a page reads."""
+from functools import wraps
+from hashlib import blake2b
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.http import HttpResponse
+from .conditional import CONDITIONAL_METHODS, SCOPE_MODELS, current_versions
+from .models import Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask
+from .roles import get_role
+from . import config, metrics, versions
+
+CATALOG_MODELS = {
+    Faculty: (Faculty,),
+    Group: (Group, Faculty),
+    Teacher: (Teacher,),
+    Lesson: (Lesson, Subject),
+    Mark: (Mark, Student, Lesson, Subject),
+    Hometask: (Hometask, Lesson, Subject),
+}
+
+
+def get_cache():
+    alias = config.PAGE_CACHE_ALIAS
+    return caches[alias if alias in settings.CACHES else DEFAULT_CACHE_ALIAS]
+
+
+def page_key(request, name: str, tables: tuple) -> str:
+    """Cache key per page, role and table versions: users with one role share pages."""
+    role = get_role(request)
+    owner = role.obj.pk if role.obj is not None else None
+    # the modification time keeps keys apart if versions restart, e.g. after a restore
+    table_versions, modified = current_versions(request, tables)
+    parts = (
+        request.get_full_path(), request.user.is_authenticated, role.name, owner,
+        getattr(request, 'LANGUAGE_CODE', ''), modified, *tables, *table_versions,
+    )
+    digest = blake2b('|'.join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'{config.PAGE_CACHE_PREFIX}:{name}:{digest}'
+
+
+def cacheable(request, response) -> bool:
+    # a page holding a CSRF token or setting cookies belongs to one browser
+    return (response.status_code == 200 and not response.cookies
+            and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+def lookup(request, name: str, tables: tuple) -> tuple:
+    """(cache key, cached response or None)."""
+    key = page_key(request, name, tables)
+    page = get_cache().get(key)
+    metrics.cache_lookup('pages', page is not None)
+    if page is None:
+        return key, None
+    content, content_type = page
+    return key, HttpResponse(content, content_type=content_type)
+
+
+def store(request, key: str, response):
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    if cacheable(request, response):
+        get_cache().set(key, (response.content, response['Content-Type']), config.PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def respond(request, name: str, tables: tuple, handler, *args, **kwargs):
+    # before its writes commit, this transaction reads pages no key describes
+    if request.method not in CONDITIONAL_METHODS or versions.pending(tables):
+        return handler(request, *args, **kwargs)
+    key, response = lookup(request, name, tables)
+    if response is None:
+        response = store(request, key, handler(request, *args, **kwargs))
+    return response
+
+
+def cached_page(name: str, tables: tuple):
+    """View decorator: serve the page from cache while tables are unchanged."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return respond(request, name, tables, view, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def catalog_tables(cls_model) -> tuple:
+    return versions.tables(CATALOG_MODELS.get(cls_model, (cls_model,)) + SCOPE_MODELS)
@@ -0,0 +1,154 @@
+"""Pagination classes for university_app catalogs and the REST API."""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from . import config
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Limit/offset pagination with an opt-in keyset mode.
+
+    Passing ``?cursor=`` switches to keyset pagination over the view's
+    ``keyset_field`` plus ``id``: pages are selected with a WHERE on the
+    composite key instead of OFFSET, and no COUNT query is run.
+    """
+    cursor_query_param = config.CURSOR_QUERY_PARAM
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request) or config.PAGINATE_THRESHOLD
+        self.field = getattr(view, 'keyset_field', 'id')
+        position = self.decode_cursor(
+            request.query_params[self.cursor_query_param], queryset.model)
+        reverse = bool(position and position[2])
+        keys = (self.field, 'id') if self.field != 'id' else ('id',)
+        queryset = queryset.order_by(
+            *(f'-{key}' if reverse else key for key in keys))
+        if position:
+            value, pk, _ = position
+            lookup = 'lt' if reverse else 'gt'
+            if len(keys) == 1:
+                queryset = queryset.filter(**{f'id__{lookup}': pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}': value}) |
+                    Q(**{self.field: value, f'id__{lookup}': pk})
+                )
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def encode_cursor(self, row, reverse: bool):
+        position = [str(getattr(row, self.field)), str(row.pk), int(reverse)]
+        cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(
+            remove_query_param(self.request.build_absolute_uri(), self.offset_query_param),
+            self.cursor_query_param, cursor)
+
+    def decode_cursor(self, cursor: str, cls_model):
+        """(keyset value, pk, reverse) of a cursor, checked against the model fields."""
+        if not cursor:
+            return None
+        try:
+            value, pk, reverse = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(value, str) or not isinstance(pk, str) or reverse not in (0, 1):
+                raise ValueError(cursor)
+            # a malformed UUID or date would otherwise fail in the database
+            value = cls_model._meta.get_field(self.field).to_python(value)
+            pk = cls_model._meta.pk.to_python(pk)
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, reverse
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_next: bool):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+
+class UncountedPaginator(Paginator):
+    """Paginator that never runs COUNT.
+
+    Each page fetches ``per_page + 1`` rows; the extra row only tells whether a
+    next page exists. ``count`` and ``num_pages`` are unknown (None).
+    """
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_page(self, number):
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            number = 1
+        return self.page(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return UncountedPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+    @property
+    def page_range(self):
+        return None
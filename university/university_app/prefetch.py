@@ -0,0 +1,43 @@
+"""select_related/prefetch_related planning for nested serializers."""
+from django.db.models import QuerySet
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def walk_serializer(serializer, prefix: str, in_prefetch: bool, select_related: list, prefetch_related: list):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = prefix + '__'.join(field.source_attrs)
+        if isinstance(field, ListSerializer):
+            prefetch_related.append(path)
+            walk_serializer(field.child, f'{path}__', True,
+                            select_related, prefetch_related)
+        elif isinstance(field, BaseSerializer):
+            (prefetch_related if in_prefetch else select_related).append(path)
+            walk_serializer(field, f'{path}__', in_prefetch,
+                            select_related, prefetch_related)
+        elif isinstance(field, ManyRelatedField):
+            prefetch_related.append(path)
+        elif isinstance(field, RelatedField) and not field.use_pk_only_optimization():
+            (prefetch_related if in_prefetch else select_related).append(path)
+        elif len(field.source_attrs) > 1:
+            parent = prefix + '__'.join(field.source_attrs[:-1])
+            (prefetch_related if in_prefetch else select_related).append(parent)
+
+
+def serializer_plan(serializer_class) -> tuple:
+    """Return (select_related, prefetch_related) lookups needed to serialize serializer_class."""
+    select_related, prefetch_related = [], []
+    walk_serializer(serializer_class(), '', False,
+                    select_related, prefetch_related)
+    return tuple(dict.fromkeys(select_related)), tuple(dict.fromkeys(prefetch_related))
+
+
+def apply_plan(queryset: QuerySet, plan: tuple) -> QuerySet:
+    select_related, prefetch_related = plan
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
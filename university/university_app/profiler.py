@@ -0,0 +1,143 @@
+"""Sampled per-request profiles: queries, DB, template and serializer time."""
+from asyncio import iscoroutinefunction
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from random import random
+from time import perf_counter
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.utils.decorators import sync_and_async_middleware
+from .queries import QueryLog
+
+logger = logging.getLogger(__name__)
+current = ContextVar('request_profile', default=None)
+# Server-Timing metric names in header order
+TIMINGS = ('template', 'serializer')
+
+
+def route_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else ''
+
+
+class Profile:
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = QueryLog()
+        self.timings = defaultdict(float)
+        self.running = set()
+
+    @contextmanager
+    def timer(self, name: str):
+        # nested serializers and templates count once
+        if name in self.running:
+            yield
+            return
+        self.running.add(name)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += perf_counter() - start
+            self.running.discard(name)
+
+    def summary(self, request, response) -> dict:
+        return {
+            'method': request.method,
+            'path': request.path,
+            'route': route_name(request),
+            'status': response.status_code,
+            'total_ms': round((perf_counter() - self.started) * 1000, 3),
+            'queries': len(self.queries),
+            'db_ms': round(self.queries.duration * 1000, 3),
+            **{f'{name}_ms': round(self.timings[name] * 1000, 3) for name in TIMINGS},
+        }
+
+    def server_timing(self, summary: dict) -> str:
+        metrics = [f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"']
+        metrics += [f'{name};dur={summary[f"{name}_ms"]}' for name in TIMINGS if name in self.timings]
+        metrics.append(f'total;dur={summary["total_ms"]}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed(name: str):
+    """Add the block's duration to the current request's profile, if sampled."""
+    profile = current.get()
+    if profile is None:
+        yield
+        return
+    with profile.timer(name):
+        yield
+
+
+def sampled() -> bool:
+    rate = getattr(settings, 'PROFILER_SAMPLE_RATE', 0)
+    return rate > 0 and random() < rate
+
+
+def report(profile: Profile, request, response) -> None:
+    summary = profile.summary(request, response)
+    if getattr(settings, 'PROFILER_SERVER_TIMING', True):
+        timing = profile.server_timing(summary)
+        response['Server-Timing'] = f'{response["Server-Timing"]}, {timing}' \
+            if response.has_header('Server-Timing') else timing
+    logger.info(json.dumps(summary), extra={'profile': summary})
+
+
+@sync_and_async_middleware
+def profiler_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not sampled():
+                return await get_response(request)
+            profile = Profile()
+            token = current.set(profile)
+            await sync_to_async(profile.queries.__enter__)()
+            try:
+                response = await get_response(request)
+            finally:
+                await sync_to_async(profile.queries.__exit__)(None, None, None)
+                current.reset(token)
+            report(profile, request, response)
+            return response
+    else:
+        def middleware(request):
+            if not sampled():
+                return get_response(request)
+            profile = Profile()
+            token = current.set(profile)
+            try:
+                with profile.queries:
+                    response = get_response(request)
+            finally:
+                current.reset(token)
+            report(profile, request, response)
+            return response
+    return middleware
+
+
+class ProfiledTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return self.template.render(context, request)
+
+
+class ProfiledTemplates(DjangoTemplates):
+    """DjangoTemplates counting render time in the request profile."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
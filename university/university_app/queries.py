@@ -0,0 +1,190 @@
+"""Recording of the SQL run while a block executes, on every connection."""
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+from time import perf_counter
+import re
+from django.db import connections
+
+# literals and placeholders, then IN lists of any length, then whitespace
+SHAPE_RULES = (
+    (re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?"), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def wrap_connections(wrapper) -> ExitStack:
+    """Install wrapper on every connection of the current thread until the returned stack closes.
+
+    Connections belong to their thread, so async code calls this through
+    sync_to_async, in the thread the ORM runs in.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+class Query:
+    __slots__ = ('alias', 'sql', 'duration', 'rows')
+
+    def __init__(self, alias: str, sql: str, duration: float):
+        self.alias = alias
+        self.sql = sql
+        self.duration = duration
+        self.rows = 0
+
+    def __repr__(self):
+        return f'Query({self.alias!r}, {self.sql!r})'
+
+
+class RowCountingCursor:
+    """Cursor proxy adding fetched rows to the query it last executed."""
+
+    def __init__(self, cursor, log):
+        self.cursor = cursor
+        self.log = log
+        self.query = None
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.__exit__(*exc_info)
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.count(1)
+            yield row
+
+    def count(self, rows: int) -> None:
+        if self.query is not None:
+            self.query.rows += rows
+
+    def execute(self, *args, **kwargs):
+        result = self.cursor.execute(*args, **kwargs)
+        self.query = self.log.queries[-1] if self.log.queries else None
+        return result
+
+    def executemany(self, *args, **kwargs):
+        result = self.cursor.executemany(*args, **kwargs)
+        self.query = None
+        return result
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        self.count(row is not None)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self.cursor.fetchmany(*args, **kwargs)
+        self.count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.count(len(rows))
+        return rows
+
+
+class QueryLog:
+    """Context manager collecting Query records; len() is the query count."""
+
+    def __init__(self, rows: bool = False):
+        self.count_rows = rows
+        self.queries = []
+        self.stack = None
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(query.duration for query in self.queries)
+
+    @property
+    def rows(self) -> int:
+        return sum(query.rows for query in self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(Query(context['connection'].alias, sql, perf_counter() - start))
+
+    def prepare_cursor(self, connection):
+        previous = connection.__dict__.get('_prepare_cursor')
+        prepare = connection._prepare_cursor
+
+        def wrapper(cursor):
+            return RowCountingCursor(prepare(cursor), self)
+
+        def restore():
+            if previous is None:
+                # uncover the class method again
+                del connection._prepare_cursor
+            else:
+                connection._prepare_cursor = previous
+        connection._prepare_cursor = wrapper
+        self.stack.callback(restore)
+
+    def __enter__(self):
+        self.stack = wrap_connections(self)
+        if self.count_rows:
+            for connection in connections.all():
+                self.prepare_cursor(connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+def shape(sql: str) -> str:
+    """The SQL with literals, parameters and IN list lengths normalized away."""
+    for pattern, replacement in SHAPE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def repeated(queries, times: int = 2) -> list:
+    """(count, shape) of shapes run at least times, most repeated first."""
+    counts = Counter(shape(query.sql) for query in queries)
+    return [(count, sql) for sql, count in counts.most_common() if count >= times]
+
+
+def report(queries, limit: int = 5) -> str:
+    return '\n'.join(f'{count} x {sql}' for count, sql in repeated(queries)[:limit])
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """Fail the block or function if it runs more than limit queries.
+
+    The failure lists the most repeated SQL shapes, where an N+1 shows up.
+    """
+
+    def __init__(self, limit: int, label: str = ''):
+        self.limit = limit
+        self.label = label
+        self.log = None
+
+    def __enter__(self):
+        self.log = QueryLog().__enter__()
+        return self.log
+
+    def __exit__(self, *exc_info):
+        self.log.__exit__(*exc_info)
+        if exc_info[0] is None and len(self.log) > self.limit:
+            label = f'{self.label}: ' if self.label else ''
+            raise QueryBudgetExceeded(
+                f'{label}{len(self.log)} queries, budget {self.limit}\n{report(self.log)}')
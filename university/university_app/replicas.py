@@ -0,0 +1,117 @@
+"""Read-replica routing for safe-method requests."""
+from contextvars import ContextVar
+from itertools import cycle
+from time import monotonic, time
+from asyncio import iscoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+from . import config
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# read from the primary whatever the request
+PRIMARY_APPS = ('sessions',)
+
+read_alias = ContextVar('read_alias', default=None)
+down_until = {}
+_rotation = {}
+
+
+def replica_aliases() -> tuple:
+    return tuple(getattr(settings, 'REPLICA_DATABASES', ()))
+
+
+def available(alias: str) -> bool:
+    if down_until.get(alias, 0) > monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        down_until[alias] = monotonic() + config.REPLICA_RETRY_SECONDS
+        return False
+    down_until.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    """The next available replica in round-robin order, or None for the primary."""
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    rotation = _rotation.get(aliases)
+    if rotation is None:
+        rotation = _rotation[aliases] = cycle(aliases)
+    for _ in aliases:
+        alias = next(rotation)
+        if available(alias):
+            return alias
+    return None
+
+
+def pinned(request) -> bool:
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(config.REPLICA_PIN_KEY, 0) > time()
+
+
+def pin(request) -> None:
+    session = getattr(request, 'session', None)
+    # clients without a session (e.g. token auth) are not pinned
+    if session is not None and session.session_key:
+        session[config.REPLICA_PIN_KEY] = time() + config.REPLICA_PIN_SECONDS
+
+
+def request_alias(request):
+    """The replica serving this request's reads, or None for the primary."""
+    if request.method in SAFE_METHODS and not pinned(request):
+        return choose_replica()
+    return None
+
+
+def after_response(request, response) -> None:
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        pin(request)
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            # the session and the replica connection are loaded synchronously
+            token = read_alias.set(await sync_to_async(request_alias)(request))
+            try:
+                response = await get_response(request)
+            finally:
+                read_alias.reset(token)
+            after_response(request, response)
+            return response
+    else:
+        def middleware(request):
+            token = read_alias.set(request_alias(request))
+            try:
+                response = get_response(request)
+            finally:
+                read_alias.reset(token)
+            after_response(request, response)
+            return response
+    return middleware
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # a transaction may have written what it reads next
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
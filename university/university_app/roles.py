@@ -0,0 +1,79 @@
+"""Role resolution for university_app users."""
+from django.core.cache import cache
+from .models import Student, Teacher
+from .conditional import current_versions
+from . import config, metrics, versions
+
+SUPERUSER = 'superuser'
+STUDENT = 'student'
+TEACHER = 'teacher'
+OTHER = 'other'
+# keys carry these tables' versions, so a link written in one process
+# reaches the role caches of every other
+ROLE_TABLES = versions.tables((Student, Teacher))
+
+
+class Role:
+    def __init__(self, name: str, obj=None):
+        self.name = name
+        self.obj = obj
+
+    @property
+    def is_superuser(self):
+        return self.name == SUPERUSER
+
+    @property
+    def student(self):
+        return self.obj if self.name == STUDENT else None
+
+    @property
+    def teacher(self):
+        return self.obj if self.name == TEACHER else None
+
+    def __repr__(self):
+        return f'Role({self.name!r}, {self.obj!r})'
+
+
+def role_cache_key(user_id, table_versions: tuple):
+    return ':'.join(str(part) for part in (config.ROLE_CACHE_PREFIX, user_id, *table_versions))
+
+
+def lookup_role(user) -> Role:
+    student = Student.objects.filter(user=user).first()
+    if student:
+        return Role(STUDENT, student)
+    teacher = Teacher.objects.filter(user=user).first()
+    if teacher:
+        return Role(TEACHER, teacher)
+    return Role(OTHER)
+
+
+def resolve_role(user, request=None) -> Role:
+    if not user or not user.is_authenticated:
+        return Role(OTHER)
+    if user.is_superuser:
+        return Role(SUPERUSER)
+    # a request reads the versions once for its roles, ETags and cached pages
+    found = current_versions(request, ROLE_TABLES) if request is not None else versions.current(ROLE_TABLES)
+    key = role_cache_key(user.pk, found[0])
+    cached = cache.get(key)
+    metrics.cache_lookup('roles', cached is not None)
+    if cached is None:
+        role = lookup_role(user)
+        cache.set(key, (role.name, role.obj), config.ROLE_CACHE_TIMEOUT)
+        return role
+    return Role(*cached)
+
+
+def get_role(request) -> Role:
+    user = getattr(request, 'user', None)
+    role, user_id = getattr(request, '_university_role', (None, None))
+    if role is None or user_id != getattr(user, 'pk', None):
+        role = resolve_role(user, request)
+        request._university_role = role, getattr(user, 'pk', None)
+    return role
+
+
+def invalidate_role(user_id):
+    if user_id is not None:
+        cache.delete(role_cache_key(user_id, versions.current(ROLE_TABLES)[0]))
@@ -0,0 +1,123 @@
+"""User-scoped querysets for university_app."""
+from django.db import models
+from .roles import Role, resolve_role
+from .models import Faculty, Group, Teacher, Lesson, Student, Mark, Hometask, GradeAggregate, LessonToGroup, SubjectToGroup, SubjectToTeacher
+
+
+def student_lesson_ids(student: Student):
+    return LessonToGroup.objects.filter(group_id=student.group_id).values('lesson_id')
+
+
+def student_groups(student: Student):
+    return Group.objects.filter(id=student.group_id)
+
+
+def student_lessons(student: Student):
+    return Lesson.objects.filter(id__in=student_lesson_ids(student))
+
+
+def student_marks(student: Student):
+    return Mark.objects.filter(student=student)
+
+
+def student_hometasks(student: Student):
+    return Hometask.objects.filter(lesson_id__in=student_lesson_ids(student))
+
+
+def student_grades(student: Student):
+    return GradeAggregate.objects.filter(student=student)
+
+
+STUDENT_SCOPES = {
+    Group: student_groups,
+    Lesson: student_lessons,
+    Mark: student_marks,
+    Hometask: student_hometasks,
+    GradeAggregate: student_grades,
+}
+
+
+def student_queryset(student: Student, cls_model: models.Model):
+    scope = STUDENT_SCOPES.get(cls_model)
+    if scope:
+        return scope(student)
+    return cls_model.objects.all()
+
+
+def teacher_group_ids(teacher: Teacher):
+    subject_ids = SubjectToTeacher.objects.filter(
+        teacher_id=teacher.id).values('subject_id')
+    return SubjectToGroup.objects.filter(subject_id__in=subject_ids).values('group_id')
+
+
+def teacher_groups(teacher: Teacher):
+    return Group.objects.filter(id__in=teacher_group_ids(teacher))
+
+
+def teacher_lessons(teacher: Teacher):
+    return Lesson.objects.filter(teacher=teacher)
+
+
+def teacher_marks(teacher: Teacher):
+    return Mark.objects.filter(lesson__teacher=teacher)
+
+
+def teacher_hometasks(teacher: Teacher):
+    return Hometask.objects.filter(lesson__teacher=teacher)
+
+
+def teacher_grades(teacher: Teacher):
+    subject_ids = SubjectToTeacher.objects.filter(
+        teacher_id=teacher.id).values('subject_id')
+    return GradeAggregate.objects.filter(subject_id__in=subject_ids)
+
+
+TEACHER_SCOPES = {
+    Group: teacher_groups,
+    Lesson: teacher_lessons,
+    Mark: teacher_marks,
+    Hometask: teacher_hometasks,
+    GradeAggregate: teacher_grades,
+}
+
+
+def teacher_queryset(teacher: Teacher, cls_model: models.Model):
+    scope = TEACHER_SCOPES.get(cls_model)
+    if scope:
+        return scope(teacher)
+    return cls_model.objects.all()
+
+
+PUBLIC_MODELS = (Faculty, Teacher)
+
+
+def role_queryset(role: Role, cls_model: models.Model):
+    if role.is_superuser:
+        return cls_model.objects.all()
+    if role.student:
+        return student_queryset(role.student, cls_model)
+    if role.teacher:
+        return teacher_queryset(role.teacher, cls_model)
+    if cls_model in PUBLIC_MODELS:
+        return cls_model.objects.all()
+    return cls_model.objects.none()
+
+
+def can_view(user, obj: models.Model, role: Role = None) -> bool:
+    role = role or resolve_role(user)
+    if role.is_superuser:
+        return True
+    queryset = role_queryset(role, type(obj))
+    if queryset.query.is_empty():
+        return False
+    return queryset.filter(pk=obj.pk).exists()
+
+
+async def acan_view(obj: models.Model, role: Role) -> bool:
+    """can_view for async views, with the role already resolved."""
+    if role.is_superuser:
+        return True
+    queryset = role_queryset(role, type(obj))
+    if queryset.query.is_empty():
+        return False
+    return await queryset.filter(pk=obj.pk).aexists()
@@ -0,0 +1,215 @@
+"""Synthetic university data for scale testing."""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+from multiprocessing import get_context
+from random import Random
+from django.db import connections, models, transaction
+from .models import Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask, \
+    LessonToGroup, SubjectToGroup, SubjectToTeacher
+from .validators import validate_lessons, validate_marks
+from . import aggregates, config, counters, versions
+
+DEFAULT_SIZES = {
+    'faculties': 4,
+    'groups_per_faculty': 6,
+    'students_per_group': 25,
+    'subjects': 40,
+    'subjects_per_group': 8,
+    'teachers_per_faculty': 10,
+    'subjects_per_teacher': 3,
+    'weeks': 16,
+    'lessons_per_week': 2,
+}
+# absence: mean share of a student's lessons missed; grade: chance a present
+# student is marked in a lesson; hometask: chance a lesson sets one
+DEFAULT_RATES = {'absence': 0.1, 'grade': 0.35, 'hometask': 0.5}
+# mark mean across students and spread of one student's marks
+MARK_MEAN, MARK_MEAN_SPREAD, MARK_SPREAD = 3.9, 0.5, 0.8
+
+FIELDS = ('Linguistics', 'Mathematics', 'Physics', 'Chemistry', 'Biology', 'History',
+          'Economics', 'Law', 'Philosophy', 'Computer Science', 'Medicine', 'Geography')
+SUBJECTS = ('English', 'Algebra', 'Geometry', 'Mechanics', 'Optics', 'Organic Chemistry',
+            'Genetics', 'World History', 'Microeconomics', 'Civil Law', 'Logic', 'Programming',
+            'Anatomy', 'Cartography', 'Statistics', 'German', 'Databases', 'Ethics')
+FIRST_NAMES = ('Steven', 'Dennis', 'Anna', 'Maria', 'James', 'Olga', 'Peter', 'Laura', 'Ivan',
+               'Sophia', 'Daniel', 'Emma', 'Michael', 'Alice', 'Paul', 'Nina')
+LAST_NAMES = ('Wright', 'Keller', 'Smith', 'Ivanova', 'Brown', 'Petrov', 'Miller', 'Novak',
+              'Garcia', 'Fischer', 'Turner', 'Sokolova', 'Walker', 'Klein', 'Young', 'Morozov')
+TASKS = ('Exercises {} to {}, page {}', 'Read pages {} to {}, answer question {}',
+         'Problems {} and {} from chapter {}')
+
+
+def titles(names: tuple, number: int) -> list:
+    """number titles cycling through names, numbered once names repeat."""
+    return [names[index % len(names)] + (f' {index // len(names) + 1}' if index >= len(names) else '')
+            for index in range(number)]
+
+
+def full_name(rng: Random) -> str:
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def insert(cls_model, objs: list, batch_size: int) -> int:
+    models.QuerySet(cls_model).bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def check(sizes: dict, rates: dict) -> None:
+    for name, value in sizes.items():
+        if value < 0:
+            raise ValueError(f'{name} cannot be negative')
+    for name, value in rates.items():
+        if not 0 <= value <= 1:
+            raise ValueError(f'the {name} rate must be between 0 and 1')
+    slots = config.SEED_WEEKDAYS * len(config.SEED_LESSON_TIMES)
+    if min(sizes['subjects_per_group'], sizes['subjects']) * sizes['lessons_per_week'] > slots:
+        raise ValueError(f'a group cannot have more than {slots} lessons a week')
+    if sizes['subjects'] and not sizes['teachers_per_faculty'] * sizes['faculties']:
+        raise ValueError('subjects need teachers')
+
+
+def timetable(rng: Random, group_id, subject_ids: list, teachers: dict, start, sizes: dict) -> list:
+    """Weekly recurring lessons of a group, one teacher per subject."""
+    slots = [(weekday, time.fromisoformat(at)) for weekday in range(config.SEED_WEEKDAYS)
+             for at in config.SEED_LESSON_TIMES]
+    slots = iter(rng.sample(slots, len(subject_ids) * sizes['lessons_per_week']))
+    lessons = []
+    for subject_id in subject_ids:
+        teacher_id = rng.choice(teachers[subject_id])
+        for weekday, at in [next(slots) for _ in range(sizes['lessons_per_week'])]:
+            lessons.extend(
+                Lesson(day=start + timedelta(weeks=week, days=weekday), precise_time=at,
+                       subject_id=subject_id, teacher_id=teacher_id)
+                for week in range(sizes['weeks']))
+    return lessons
+
+
+def absence_rate(rng: Random, mean: float) -> float:
+    """A student's absence rate: most attend, a few miss a lot."""
+    if mean in (0, 1):
+        return mean
+    return rng.betavariate(2, 2 * (1 - mean) / mean)
+
+
+def journal(rng: Random, lessons: list, student_ids: list, rates: dict) -> list:
+    """Marks of a group's students over its lessons."""
+    students = [(student_id, absence_rate(rng, rates['absence']),
+                 rng.gauss(MARK_MEAN, MARK_MEAN_SPREAD)) for student_id in student_ids]
+    marks = []
+    for lesson in lessons:
+        held = datetime.combine(lesson.day, lesson.precise_time, tzinfo=timezone.utc)
+        for student_id, absences, mean in students:
+            if rng.random() < absences:
+                marks.append(Mark(student_id=student_id, lesson_id=lesson.id, presence=config.ABSENT,
+                                  created=held, modified=held))
+            elif rng.random() < rates['grade']:
+                mark = min(max(round(rng.gauss(mean, MARK_SPREAD)), config.MARKS[0]), config.MARKS[-1])
+                marks.append(Mark(student_id=student_id, lesson_id=lesson.id, mark=mark,
+                                  created=held, modified=held))
+    return marks
+
+
+def hometasks(rng: Random, lessons: list, rate: float) -> list:
+    return [
+        Hometask(lesson_id=lesson.id, task=rng.choice(TASKS).format(*sorted(rng.sample(range(1, 100), 3))),
+                 created=datetime.combine(lesson.day, lesson.precise_time, tzinfo=timezone.utc))
+        for lesson in lessons if rng.random() < rate
+    ]
+
+
+def seed_groups(groups: list, teachers: dict, start, sizes: dict, rates: dict, seed,
+                batch_size: int = config.SEED_BATCH_SIZE, validate: bool = False) -> dict:
+    """Lessons, hometasks and marks for (group id, subject ids, student ids) triples."""
+    rng = Random(seed)
+    created = dict.fromkeys((Lesson, LessonToGroup, Hometask, Mark), 0)
+    for group_id, subject_ids, student_ids in groups:
+        with transaction.atomic():
+            lessons = timetable(rng, group_id, subject_ids, teachers, start, sizes)
+            created[Lesson] += insert(Lesson, lessons, batch_size)
+            created[LessonToGroup] += insert(LessonToGroup, [
+                LessonToGroup(lesson_id=lesson.id, group_id=group_id) for lesson in lessons], batch_size)
+            marks = journal(rng, lessons, student_ids, rates)
+            if validate:
+                validate_lessons(lessons)
+                for bottom in range(0, len(marks), batch_size):
+                    validate_marks(marks[bottom:bottom + batch_size])
+            created[Hometask] += insert(Hometask, hometasks(rng, lessons, rates['hometask']), batch_size)
+            created[Mark] += insert(Mark, marks, batch_size)
+    return created
+
+
+def seed_task(task: tuple) -> dict:
+    return seed_groups(*task)
+
+
+def skeleton(rng: Random, sizes: dict, batch_size: int) -> tuple:
+    """Create everything but the timetable: (created counts, groups, teachers by subject)."""
+    created = {}
+    faculties = [Faculty(title=f'Faculty of {title}') for title in titles(FIELDS, sizes['faculties'])]
+    subjects = [Subject(title=title) for title in titles(SUBJECTS, sizes['subjects'])]
+    teachers = [Teacher(full_name=full_name(rng), faculty_id=faculty.id)
+                for faculty in faculties for _ in range(sizes['teachers_per_faculty'])]
+    # every subject gets a teacher, then each teacher fills up to subjects_per_teacher
+    taught = [set() for _ in teachers]
+    for index in range(len(subjects)):
+        taught[index % len(teachers)].add(index)
+    for subjects_taught in taught:
+        while len(subjects_taught) < min(sizes['subjects_per_teacher'], len(subjects)):
+            subjects_taught.add(rng.randrange(len(subjects)))
+    teacher_links = [SubjectToTeacher(subject_id=subjects[index].id, teacher_id=teacher.id)
+                     for teacher, subjects_taught in zip(teachers, taught) for index in subjects_taught]
+    groups = [Group(title=f'{number}.{index}', faculty_id=faculty.id)
+              for number, faculty in enumerate(faculties, start=1)
+              for index in range(1, sizes['groups_per_faculty'] + 1)]
+    studied = [rng.sample(subjects, min(sizes['subjects_per_group'], len(subjects))) for _ in groups]
+    group_links = [SubjectToGroup(subject_id=subject.id, group_id=group.id)
+                   for group, group_subjects in zip(groups, studied) for subject in group_subjects]
+    students = [[Student(full_name=full_name(rng), group_id=group.id)
+                 for _ in range(sizes['students_per_group'])] for group in groups]
+    with transaction.atomic():
+        for cls_model, objs in ((Faculty, faculties), (Subject, subjects), (Teacher, teachers),
+                                (SubjectToTeacher, teacher_links), (Group, groups),
+                                (SubjectToGroup, group_links),
+                                (Student, [student for group in students for student in group])):
+            created[cls_model] = insert(cls_model, objs, batch_size)
+    teachers_by_subject = {}
+    for link in teacher_links:
+        teachers_by_subject.setdefault(link.subject_id, []).append(link.teacher_id)
+    groups = [(group.id, [subject.id for subject in group_subjects], [student.id for student in group_students])
+              for group, group_subjects, group_students in zip(groups, studied, students)]
+    return created, groups, teachers_by_subject
+
+
+def seed(sizes: dict = None, rates: dict = None, start=None, seed=0, workers: int = 1,
+         batch_size: int = config.SEED_BATCH_SIZE, validate: bool = False) -> dict:
+    """Create a university of the given sizes; returns the rows created per model.
+
+    The timetable starts on start (default: Monday sizes['weeks'] weeks ago).
+    With workers > 1 groups are generated by forked processes, each on its
+    own connection, which needs a database server rather than SQLite.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rates = {**DEFAULT_RATES, **(rates or {})}
+    check(sizes, rates)
+    if start is None:
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=today.weekday(), weeks=sizes['weeks'])
+    rng = Random(seed)
+    created, groups, teachers = skeleton(rng, sizes, batch_size)
+    chunks = max(workers, 1) * 4
+    tasks = [(groups[index::chunks], teachers, start, sizes, rates, f'{seed}:{index}', batch_size, validate)
+             for index in range(min(chunks, len(groups)))]
+    if workers > 1:
+        # children open their own connections instead of sharing the parent's socket
+        connections.close_all()
+        with ProcessPoolExecutor(workers, mp_context=get_context('fork')) as pool:
+            results = list(pool.map(seed_task, tasks))
+    else:
+        results = [seed_task(task) for task in tasks]
+    for result in results:
+        for cls_model, count in result.items():
+            created[cls_model] = created.get(cls_model, 0) + count
+    counters.reconcile()
+    aggregates.rebuild()
+    versions.bump(*versions.TRACKED_MODELS)
+    return created
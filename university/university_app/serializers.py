@@ -1,16 +1,26 @@
-from .models import Faculty, Group, Teacher, Lesson, Mark, Hometask, Subject, Student
-from rest_framework.serializers import ModelSerializer, PrimaryKeyRelatedField
+from .models import Faculty, Group, Teacher, Lesson, Mark, Hometask, Subject, Student, GradeAggregate
+from .aggregates import summary
+from rest_framework.serializers import ModelSerializer, PrimaryKeyRelatedField, UUIDField
 from django.contrib.auth.models import User
+from .profiler import timed
 
 
-class FacultySerializer(ModelSerializer):
+class ProfiledSerializer(ModelSerializer):
+    """Counts to_representation as serializer time in the request profile."""
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+class FacultySerializer(ProfiledSerializer):
 
     class Meta:
         model = Faculty
         fields = ('id', 'title', 'description')
 
 
-class GroupSerializer(ModelSerializer):
+class GroupSerializer(ProfiledSerializer):
     faculty = FacultySerializer()
 
     def create(self, validated_data: dict):
@@ -27,7 +37,7 @@ class GroupSerializer(ModelSerializer):
         fields = ('id', 'title', 'faculty', 'lessons', 'subjects')
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(ProfiledSerializer):
 
     class Meta:
         model = User
@@ -35,7 +45,7 @@ class UserSerializer(ModelSerializer):
                   'last_name', 'email', 'password', 'is_superuser']
 
 
-class TeacherSerializer(ModelSerializer):
+class TeacherSerializer(ProfiledSerializer):
     faculty = FacultySerializer()
 
     def create(self, validated_data: dict):
@@ -52,7 +62,7 @@ class TeacherSerializer(ModelSerializer):
         fields = ('id', 'full_name', 'subjects', 'faculty', 'user')
 
 
-class StudentSerializer(ModelSerializer):
+class StudentSerializer(ProfiledSerializer):
     group = GroupSerializer()
 
     def create(self, validated_data: dict):
@@ -71,14 +81,14 @@ class StudentSerializer(ModelSerializer):
         fields = ('id', 'full_name', 'group', 'user')
 
 
-class SubjectSerializer(ModelSerializer):
+class SubjectSerializer(ProfiledSerializer):
 
     class Meta:
         model = Subject
         fields = ('id', 'title', 'groups', 'teachers')
 
 
-class LessonSerializer(ModelSerializer):
+class LessonSerializer(ProfiledSerializer):
     subject = SubjectSerializer()
     teacher = TeacherSerializer()
 
@@ -102,7 +112,7 @@ class LessonSerializer(ModelSerializer):
         fields = ('id', 'day', 'precise_time', 'subject', 'teacher', 'groups')
 
 
-class MarkSerializer(ModelSerializer):
+class MarkSerializer(ProfiledSerializer):
     student = StudentSerializer()
     lesson = LessonSerializer()
 
@@ -138,7 +148,7 @@ class MarkSerializer(ModelSerializer):
                   'modified', 'student', 'lesson')
 
 
-class HometaskSerializer(ModelSerializer):
+class HometaskSerializer(ProfiledSerializer):
     lesson = LessonSerializer()
 
     def create(self, validated_data: dict):
@@ -161,3 +171,23 @@ class HometaskSerializer(ModelSerializer):
     class Meta:
         model = Hometask
         fields = ('id', 'task', 'created', 'lesson')
+
+
+class GradeEntrySerializer(ProfiledSerializer):
+    student = UUIDField(source='student_id')
+
+    class Meta:
+        model = Mark
+        fields = ('id', 'student', 'mark', 'presence')
+        read_only_fields = ('id',)
+
+
+class GradeAggregateSerializer(ProfiledSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(summary(instance.__dict__))
+        return data
+
+    class Meta:
+        model = GradeAggregate
+        fields = ('id', 'student', 'subject')
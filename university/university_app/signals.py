@@ -0,0 +1,141 @@
+"""Signal receivers for university_app."""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import Faculty, Group, Student, Teacher, Lesson, Mark, bulk_created, bulk_updated, bulk_updating
+from .roles import invalidate_role
+from . import aggregates, counters, versions
+
+
+@receiver(pre_save, sender=Student)
+@receiver(pre_save, sender=Teacher)
+def unlink_previous_role(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    previous_user = sender.objects.filter(
+        pk=instance.pk).values_list('user_id', flat=True).first()
+    if previous_user != instance.user_id:
+        invalidate_role(previous_user)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Teacher)
+def invalidate_linked_role(sender, instance, **kwargs):
+    invalidate_role(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user_role(sender, instance, created=False, **kwargs):
+    # user ids can be reused (e.g. after a rollback), so start from a clean entry
+    if created:
+        invalidate_role(instance.pk)
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Student)
+def count_created(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust(sender, 1)
+
+
+@receiver(post_delete, sender=Faculty)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Student)
+def count_deleted(sender, instance, **kwargs):
+    counters.adjust(sender, -1)
+
+
+@receiver(bulk_created, sender=Faculty)
+@receiver(bulk_created, sender=Group)
+@receiver(bulk_created, sender=Teacher)
+@receiver(bulk_created, sender=Student)
+def count_bulk_created(sender, instances, conflicts=False, **kwargs):
+    if conflicts:
+        counters.recount(sender)
+    else:
+        counters.adjust(sender, len(instances))
+
+
+@receiver(pre_save, sender=Mark)
+def remember_previous_mark(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous_grade = aggregates.previous_change(instance)
+
+
+@receiver(post_save, sender=Mark)
+def aggregate_saved_mark(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_grade', None)
+    instance._previous_grade = None
+    aggregates.apply(([previous] if previous else []) + aggregates.marks_changes([instance]))
+
+
+@receiver(post_delete, sender=Mark)
+def aggregate_deleted_mark(sender, instance, origin=None, **kwargs):
+    # marks only cascade through a lesson or a student, whose receivers
+    # account for all of them at once
+    if origin is not None and getattr(origin, 'model', type(origin)) is not Mark:
+        return
+    aggregates.apply(aggregates.marks_changes([instance], -1))
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_previous_subject(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_subject_id = None
+    if raw or instance._state.adding or (update_fields is not None and 'subject' not in update_fields):
+        return
+    instance._previous_subject_id = sender.objects.filter(
+        pk=instance.pk).values_list('subject_id', flat=True).first()
+
+
+@receiver(post_save, sender=Lesson)
+def move_lesson_marks(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_subject_id', None)
+    instance._previous_subject_id = None
+    if not raw and previous is not None and previous != instance.subject_id:
+        aggregates.move_lesson(instance.pk, previous, instance.subject_id)
+
+
+@receiver(pre_delete, sender=Lesson)
+def aggregate_cascaded_marks(sender, instance, **kwargs):
+    # a student's aggregates cascade with it; a lesson's marks leave theirs
+    aggregates.apply(aggregates.lesson_changes(instance.pk, instance.subject_id, -1))
+
+
+@receiver(bulk_updating, sender=Mark)
+@receiver(bulk_updating, sender=Lesson)
+def remember_updated_marks(sender, queryset, fields, **kwargs):
+    queryset._updated_marks = queryset._previous_keys = None
+    if fields & aggregates.AGGREGATED_FIELDS[sender]:
+        queryset._updated_marks = aggregates.updated_marks(sender, queryset)
+        queryset._previous_keys = aggregates.marks_keys(queryset._updated_marks)
+
+
+@receiver(bulk_updated, sender=Mark)
+@receiver(bulk_updated, sender=Lesson)
+def aggregate_updated_marks(sender, queryset, **kwargs):
+    marks = getattr(queryset, '_updated_marks', None)
+    if marks is not None:
+        aggregates.recompute(queryset._previous_keys | aggregates.marks_keys(marks))
+
+
+@receiver(bulk_created, sender=Mark)
+def aggregate_bulk_created_marks(sender, instances, **kwargs):
+    aggregates.apply(aggregates.marks_changes(instances))
+
+
+def bump_version(sender, raw=False, **kwargs):
+    if not raw:
+        versions.bump(sender)
+
+
+# every tracked model has BulkSignalQuerySet, through models included: m2m
+# add() bulk creates their rows and remove() and clear() delete them
+for cls_model in versions.TRACKED_MODELS:
+    receiver([post_save, post_delete, bulk_created, bulk_updated], sender=cls_model)(bump_version)
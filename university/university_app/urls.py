@@ -1,7 +1,8 @@
 """library_app URL Configuration."""
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
-from . import views
+from . import metrics, views
 
 router = routers.DefaultRouter()
 # register our REST views in router object
@@ -11,27 +12,54 @@ router.register(r'lesson', views.LessonViewSet)
 router.register(r'mark', views.MarkViewSet)
 router.register(r'hometask', views.HometaskViewSet)
 router.register(r'group', views.GroupViewSet)
+router.register(r'grades', views.GradeAggregateViewSet)
+
+if settings.ASYNC_VIEWS:
+    # ASGI deployments read pages through the async ORM
+    from . import async_views
+    main_view = async_views.custom_main
+    catalog_views = (
+        async_views.faculties_view, async_views.teachers_view, async_views.groups_view,
+        async_views.lessons_view, async_views.marks_view, async_views.hometasks_view,
+    )
+    entity_views = async_views
+else:
+    main_view = views.custom_main
+    catalog_views = tuple(view.as_view() for view in (
+        views.FacultyListView, views.TeacherListView, views.GroupListView,
+        views.LessonListView, views.MarkListView, views.HometaskListView,
+    ))
+    entity_views = views
+faculties_view, teachers_view, groups_view, lessons_view, marks_view, hometasks_view = catalog_views
 
 
 urlpatterns = [
-    path('', views.custom_main, name='homepage'),
+    path('', main_view, name='homepage'),
     path('profile/', views.profile_page, name='profile'),
     path('about/', views.about_page, name='about'),
     path('contacts/', views.contacts_page, name='contacts'),
     # CATALOG
-    path('faculties/', views.FacultyListView.as_view(), name='faculties'),
-    path('teachers/', views.TeacherListView.as_view(), name='teachers'),
-    path('groups/', views.GroupListView.as_view(), name='groups'),
-    path('lessons/', views.LessonListView.as_view(), name='lessons'),
-    path('marks/', views.MarkListView.as_view(), name='marks'),
-    path('hometasks/', views.HometaskListView.as_view(), name='hometasks'),
+    path('faculties/', faculties_view, name='faculties'),
+    path('teachers/', teachers_view, name='teachers'),
+    path('groups/', groups_view, name='groups'),
+    path('lessons/', lessons_view, name='lessons'),
+    path('marks/', marks_view, name='marks'),
+    path('hometasks/', hometasks_view, name='hometasks'),
     # ENTITIES
-    path('faculty/', views.faculty_view, name='faculty'),
-    path('teacher/', views.teacher_view, name='teacher'),
-    path('lesson/', views.lesson_view, name='lesson'),
-    path('mark/', views.mark_view, name='mark'),
-    path('hometask/', views.hometask_view, name='hometask'),
-    path('group/', views.group_view, name='group'),
+    path('faculty/', entity_views.faculty_view, name='faculty'),
+    path('teacher/', entity_views.teacher_view, name='teacher'),
+    path('lesson/', entity_views.lesson_view, name='lesson'),
+    path('lesson/grade/', views.grade_lesson_view, name='grade_lesson'),
+    path('mark/', entity_views.mark_view, name='mark'),
+    path('hometask/', entity_views.hometask_view, name='hometask'),
+    path('group/', entity_views.group_view, name='group'),
+    path('gradebook/', views.gradebook_view, name='gradebook'),
+    # EXPORT
+    path('export/marks/', views.export_marks_view, name='export_marks'),
+    # ANALYTICS
+    path('attendance/', views.attendance_view, name='attendance'),
+    # METRICS
+    path('metrics', metrics.metrics_view, name='metrics'),
     # REST
     path('rest/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
@@ -0,0 +1,127 @@
+"""Set-based validation of cross-model invariants.
+
+Each validator takes a batch of candidate objects and decides the whole batch
+with a fixed number of queries, so model clean(), forms and imports validate
+in constant round trips.
+"""
+from django.core.exceptions import ValidationError
+from .models import Subject, Teacher, Lesson, Student, Mark, LessonToGroup, SubjectToGroup, SubjectToTeacher
+
+# relations str() reads, loaded with the labels
+LABEL_RELATED = {Lesson: ('subject',)}
+
+
+def labels(cls_model, ids) -> dict:
+    """str() of objects by id in one query, for the messages of failing objects."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    return {obj.pk: str(obj) for obj in cls_model.objects.filter(id__in=ids).select_related(
+        *LABEL_RELATED.get(cls_model, ()))}
+
+
+def validate_lessons(lessons) -> None:
+    """Teachers must teach the lesson's subject; the lesson's groups must have it."""
+    lessons = [lesson for lesson in lessons if lesson.subject_id and lesson.teacher_id]
+    if not lessons:
+        return
+    errors = []
+    taught = set(SubjectToTeacher.objects.filter(
+        subject_id__in={lesson.subject_id for lesson in lessons},
+        teacher_id__in={lesson.teacher_id for lesson in lessons},
+    ).values_list('subject_id', 'teacher_id'))
+    failing = [lesson for lesson in lessons if (lesson.subject_id, lesson.teacher_id) not in taught]
+    if failing:
+        teachers = labels(Teacher, (lesson.teacher_id for lesson in failing))
+        subjects = labels(Subject, (lesson.subject_id for lesson in failing))
+        errors.extend(
+            ValidationError(f'The teacher {teachers.get(lesson.teacher_id, lesson.teacher_id)} '
+                            f'does not teach subject {subjects.get(lesson.subject_id, lesson.subject_id)}')
+            for lesson in failing)
+    by_id = {lesson.pk: lesson for lesson in lessons}
+    lesson_groups = LessonToGroup.objects.filter(
+        lesson_id__in=by_id).select_related('group__faculty')
+    lesson_groups = [(by_id[link.lesson_id], link.group) for link in lesson_groups]
+    errors.extend(check_group_subjects(lesson_groups))
+    if errors:
+        raise ValidationError(errors)
+
+
+def check_group_subjects(lesson_groups) -> list:
+    """Return errors for (lesson, group) pairs whose group lacks the lesson's subject."""
+    if not lesson_groups:
+        return []
+    studied = set(SubjectToGroup.objects.filter(
+        group_id__in={group.pk for _, group in lesson_groups},
+        subject_id__in={lesson.subject_id for lesson, _ in lesson_groups},
+    ).values_list('group_id', 'subject_id'))
+    failing = [(lesson, group) for lesson, group in lesson_groups
+               if (group.pk, lesson.subject_id) not in studied]
+    subjects = labels(Subject, (lesson.subject_id for lesson, _ in failing))
+    return [
+        ValidationError(
+            f'The group {group} does not have subject {subjects.get(lesson.subject_id, lesson.subject_id)}')
+        for lesson, group in failing
+    ]
+
+
+def validate_lesson_groups(lesson_groups) -> None:
+    """Validate candidate (lesson, group) links before they are saved."""
+    errors = check_group_subjects(list(lesson_groups))
+    if errors:
+        raise ValidationError(errors)
+
+
+def validate_groups(groups) -> None:
+    """Every lesson of a group must be on one of the group's subjects."""
+    group_ids = {group.pk for group in groups}
+    if not group_ids:
+        return
+    links = list(LessonToGroup.objects.filter(group_id__in=group_ids).values_list(
+        'group_id', 'lesson_id', 'lesson__subject_id'))
+    studied = set(SubjectToGroup.objects.filter(
+        group_id__in=group_ids).values_list('group_id', 'subject_id'))
+    failing = {lesson_id for group_id, lesson_id, subject_id in links
+               if (group_id, subject_id) not in studied}
+    if failing:
+        raise ValidationError([
+            ValidationError(f"The lesson {lesson} is not in the group's subjects")
+            for lesson in Lesson.objects.filter(id__in=failing).select_related('subject')
+        ])
+
+
+def validate_marks(marks) -> None:
+    """Students must belong to a group of the lesson; mark or presence must be set."""
+    errors = []
+    marks = list(marks)
+    graded = [mark for mark in marks if mark.student_id and mark.lesson_id]
+    # (group id, name) per student, from the instances or one query
+    students = {}
+    for mark in graded:
+        if Mark.student.is_cached(mark):
+            students[mark.student_id] = mark.student.group_id, mark.student.full_name
+    missing = {mark.student_id for mark in graded} - set(students)
+    if missing:
+        students.update((pk, (group_id, name)) for pk, group_id, name in Student.objects.filter(
+            id__in=missing).values_list('id', 'group_id', 'full_name'))
+    lesson_groups = set(LessonToGroup.objects.filter(
+        lesson_id__in={mark.lesson_id for mark in graded},
+    ).values_list('lesson_id', 'group_id')) if graded else set()
+    outside = []
+    for mark in graded:
+        if mark.student_id not in students:
+            errors.append(ValidationError(f'The student {mark.student_id} does not exist'))
+        elif (mark.lesson_id, students[mark.student_id][0]) not in lesson_groups:
+            outside.append(mark)
+    lessons = labels(Lesson, (mark.lesson_id for mark in outside))
+    errors.extend(
+        ValidationError(f'The student {students[mark.student_id][1]} is not in the group that had '
+                        f'a lesson on {lessons.get(mark.lesson_id, mark.lesson_id)}')
+        for mark in outside)
+    for mark in marks:
+        if not mark.mark and not mark.presence:
+            errors.append(ValidationError(
+                'Mark and presence cannot be both empty'
+            ))
+    if errors:
+        raise ValidationError(errors)
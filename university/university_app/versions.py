@@ -0,0 +1,80 @@
+"""Per-table version counters, bumped once per transaction writing a tracked table."""
+from django.db.models import F
+from .models import Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask, \
+    LessonToGroup, SubjectToGroup, SubjectToTeacher, TableVersion, get_datetime
+from .batches import Batch
+
+TRACKED_MODELS = (
+    Faculty, Group, Subject, Teacher, Lesson, Student, Mark, Hometask,
+    LessonToGroup, SubjectToGroup, SubjectToTeacher,
+)
+
+
+def tables(cls_models) -> tuple:
+    return tuple(sorted({cls_model._meta.db_table for cls_model in cls_models}))
+
+
+def increment(names: tuple) -> int:
+    return TableVersion.objects.filter(table__in=names).update(
+        version=F('version') + 1, modified=get_datetime())
+
+
+class Bumps(Batch):
+    def __init__(self):
+        super().__init__()
+        self.names = set()
+
+    def merge(self, names):
+        self.names.update(names)
+
+    def apply(self):
+        increment_or_create(tuple(sorted(self.names)))
+
+
+def increment_or_create(names: tuple) -> None:
+    if increment(names) < len(names):
+        # a row the data migration did not create, e.g. after a flush: make it
+        # exist, then increment, so concurrent first writers each move it
+        TableVersion.objects.bulk_create([TableVersion(table=name) for name in names], ignore_conflicts=True)
+        increment(names)
+
+
+def bump(*cls_models) -> None:
+    """Move the models' table versions once, after the writing transaction commits."""
+    Bumps.add(tables(cls_models))
+
+
+def pending(names: tuple) -> bool:
+    """Whether this transaction wrote one of the tables: their versions move on commit."""
+    return any(bumps.names.intersection(names) for bumps in Bumps.pending())
+
+
+def rows(names: tuple = None) -> dict:
+    """{table: (version, modified)} of names, or of every table, in one query."""
+    found = TableVersion.objects.all() if names is None else TableVersion.objects.filter(table__in=names)
+    return {table: (version, modified) for table, version, modified in
+            found.values_list('table', 'version', 'modified')}
+
+
+def current(names: tuple, found: dict = None) -> tuple:
+    """(versions in names order, latest modification or None), from found rows or one query."""
+    found = rows(names) if found is None else found
+    versions = tuple(found.get(name, (0, None))[0] for name in names)
+    modified = [found[name][1] for name in names if name in found]
+    return versions, max(modified) if modified else None
+
+
+def plan_models(cls_model, plan: tuple) -> set:
+    """Models a serializer plan reads: related models and m2m through tables."""
+    found = {cls_model}
+    select_related, prefetch_related = plan
+    for path in select_related + prefetch_related:
+        current_model = cls_model
+        for name in path.split('__'):
+            field = current_model._meta.get_field(name)
+            through = getattr(field, 'through', None) or getattr(field.remote_field, 'through', None)
+            if field.many_to_many and through:
+                found.add(through)
+            current_model = field.related_model
+            found.add(current_model)
+    return found
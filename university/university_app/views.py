@@ -1,15 +1,25 @@
 from typing import Any
-from .models import Faculty, Group, Teacher, Lesson, Student, Mark, Hometask
+from datetime import date, timedelta
+from .models import Faculty, Group, Teacher, Lesson, Student, Mark, Hometask, Subject, GradeAggregate
 from .serializers import *
 from rest_framework import viewsets
 from django.db import models
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.views.generic import ListView
 from django.core.paginator import Paginator
-from . import config
-from rest_framework import permissions, viewsets
+from . import aggregates, attendance, conditional, config, counters, export, gradebook, grading, pagecache, scopes, versions
+from rest_framework import exceptions, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django.db import models
-from .forms import AddMarkForm
+from .forms import AddMarkForm, GradebookForm, GradeLessonForm
+from .roles import get_role
+from .prefetch import serializer_plan, apply_plan
+from .pagination import KeysetPagination, UncountedPaginator
+from .filters import FilterSet, FILTERS
 from django.contrib.auth import decorators as auth_decorators
 
 
@@ -49,85 +59,77 @@ def custom_main(request):
     return render(
         request,
         config.TEMPLATE_MAIN,
-        context={
-            'faculties': Faculty.objects.all().count(),
-            'groups': Group.objects.all().count(),
-            'teachers': Teacher.objects.all().count(),
-            'students': Student.objects.all().count(),
-        },
+        context=counters.get_counts(),
     )
 
 
 def student_objects(student: Student, cls_model: models.Model, order_field: str):
-    lessons = []
-    for lesson in Lesson.objects.all():
-        if student.group in lesson.groups.all():
-            lessons.append(lesson)
-    if cls_model is Group:
-        return [student.group,]
-    elif cls_model is Lesson:
-        return lessons
-    elif cls_model is Mark:
-        return Mark.objects.filter(student=student).order_by(order_field)
-    elif cls_model is Hometask:
-        return Hometask.objects.filter(lesson__in=lessons).order_by(order_field)
-    return cls_model.objects.order_by(order_field)
+    return scopes.student_queryset(student, cls_model).order_by(order_field)
 
 
 def teacher_objects(teacher: Teacher, cls_model: models.Model, order_field: str):
-    lessons = Lesson.objects.filter(teacher=teacher).order_by('day')
-    if cls_model is Group:
-        groups = []
-        for group in Group.objects.all():
-            for subject in group.subjects.all():
-                if subject in teacher.subjects.all():
-                    groups.append(group)
-        return groups
-    elif cls_model is Lesson:
-        return lessons
-    elif cls_model is Mark:
-        return Mark.objects.filter(lesson__in=Lesson.objects.filter(teacher=teacher)).order_by(order_field)
-    elif cls_model is Hometask:
-        return Hometask.objects.filter(lesson__in=lessons).order_by(order_field)
-    return cls_model.objects.order_by(order_field)
+    return scopes.teacher_queryset(teacher, cls_model).order_by(order_field)
 
 
 def get_objects_for_user(request, cls_model: models.Model, order_field: str):
-    user = request.user
-    if user.is_superuser:
-        return cls_model.objects.order_by(order_field)
-    try:
-        student = Student.objects.get(user=user)
-    except Exception:
-        student = None
-    if student:
-        return student_objects(student, cls_model, order_field)
-    try:
-        teacher = Teacher.objects.get(user=user)
-    except Exception:
-        teacher = None
-    if teacher:
-        return teacher_objects(teacher, cls_model, order_field)
-    if cls_model in (Faculty, Teacher):
-        return cls_model.objects.order_by(order_field)
-    return []
+    return scopes.role_queryset(get_role(request), cls_model).order_by(order_field)
+
+
+# relations the catalog templates print for every row
+CATALOG_RELATED = {
+    Group: ('faculty',),
+    Lesson: ('subject',),
+    Mark: ('student', 'lesson__subject'),
+    Hometask: ('lesson__subject',),
+}
+
+
+def with_catalog_related(queryset):
+    related = CATALOG_RELATED.get(queryset.model, ())
+    # select_related() without fields would follow every foreign key
+    return queryset.select_related(*related) if related else queryset
 
 
-def catalog_view(cls_model: models.Model, order_field: str, page_name: str, template: str):
+# (select_related, prefetch_related) of what entity templates show of a row
+ENTITY_RELATED = {
+    Group: (('faculty',), ()),
+    Teacher: (('faculty',), ()),
+    Lesson: (('subject', 'teacher'), ('groups__faculty',)),
+    Mark: (('student', 'lesson__subject'), ()),
+    Hometask: (('lesson__subject',), ()),
+}
+
+
+def with_entity_related(queryset):
+    select, prefetch = ENTITY_RELATED.get(queryset.model, ((), ()))
+    if select:
+        queryset = queryset.select_related(*select)
+    return queryset.prefetch_related(*prefetch)
+
+
+def catalog_view(cls_model: models.Model, order_field: str, page_name: str, template: str, exact_count: bool = True):
     class CustomListView(ListView):
         model = cls_model
         template_name = template
         context_object_name = page_name
         paginate_by = config.PAGINATE_THRESHOLD
+        paginator_class = Paginator if exact_count else UncountedPaginator
+        cache_tables = pagecache.catalog_tables(cls_model)
+
+        def dispatch(self, request, *args, **kwargs):
+            return pagecache.respond(request, page_name, self.cache_tables, super().dispatch, *args, **kwargs)
+
+        def get_queryset(self):
+            return with_catalog_related(get_objects_for_user(self.request, cls_model, order_field))
+
+        def paginate_queryset(self, queryset, page_size):
+            paginator = self.get_paginator(queryset, page_size)
+            page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+            return paginator, page, page.object_list, page.has_other_pages()
 
         def get_context_data(self, **kwargs: Any):
             context = super().get_context_data(**kwargs)
-            instances = get_objects_for_user(
-                self.request, cls_model, order_field)
-            paginator = Paginator(instances, config.PAGINATE_THRESHOLD)
-            page = self.request.GET.get('page')
-            page_obj = paginator.get_page(page)
-            context[f'{page_name}_list'] = page_obj
+            context[f'{page_name}_list'] = context['page_obj']
             return context
     return CustomListView
 
@@ -137,27 +139,26 @@ FacultyListView = catalog_view(
 TeacherListView = catalog_view(
     Teacher, 'full_name', 'teachers', config.TEACHERS_CATALOG)
 GroupListView = catalog_view(Group, 'faculty', 'groups', config.GROUPS_CATALOG)
-LessonListView = catalog_view(Lesson, 'day', 'lessons', config.LESSONS_CATALOG)
-MarkListView = catalog_view(Mark, 'lesson', 'marks', config.MARKS_CATALOG)
+LessonListView = catalog_view(
+    Lesson, 'day', 'lessons', config.LESSONS_CATALOG, exact_count=False)
+MarkListView = catalog_view(
+    Mark, 'lesson', 'marks', config.MARKS_CATALOG, exact_count=False)
 HometaskListView = catalog_view(
-    Hometask, 'lesson', 'hometasks', config.HOMETASKS_CATALOG)
+    Hometask, 'lesson', 'hometasks', config.HOMETASKS_CATALOG, exact_count=False)
 
 
 def entity_view(cls_model: models.Model, order_field: str, name: str, template: str):
     def view(request):
-        target_obj = cls_model.objects.get(id=request.GET.get('id', ''))
+        target_obj = with_entity_related(cls_model.objects.all()).get(id=request.GET.get('id', ''))
         context = {name: target_obj}
 
-        instances = get_objects_for_user(request, cls_model, order_field)
-        context[f'user_{cls_model}'.lower()] = target_obj in instances
+        role = get_role(request)
+        context[f'user_{cls_model}'.lower()] = scopes.can_view(
+            request.user, target_obj, role)
 
-        try:
-            teacher = Teacher.objects.get(user=request.user)
-        except Exception:
-            teacher = None
         if cls_model is Lesson:
-            context['marks'] = Mark.objects.filter(lesson=target_obj)
-            if request.user.is_superuser or teacher:
+            context['marks'] = Mark.objects.filter(lesson=target_obj).select_related('student')
+            if role.is_superuser or role.teacher:
                 if request.method == "POST":
                     form = AddMarkForm(target_obj, request.POST)
                     if form.is_valid():
@@ -168,7 +169,56 @@ def entity_view(cls_model: models.Model, order_field: str, name: str, template:
                 context['lesson'] = target_obj
                 context['form_errors'] = form.errors
         return render(request, template, context=context)
-    return view
+    tables = conditional.entity_tables(cls_model)
+    return conditional.condition(tables)(pagecache.cached_page(name, tables)(view))
+
+
+def grade_lesson_view(request):
+    lesson = Lesson.objects.select_related('subject').get(id=request.GET.get('id', ''))
+    role = get_role(request)
+    if not (role.is_superuser or role.teacher):
+        raise PermissionDenied
+    if request.method == "POST":
+        form = GradeLessonForm(lesson, request.POST)
+        if form.is_valid():
+            try:
+                form.save()
+            except ValidationError as error:
+                # another grader marked some of the students meanwhile
+                form.add_error(None, error)
+            else:
+                return redirect(f"{reverse('lesson')}?id={lesson.id}")
+    else:
+        form = GradeLessonForm(lesson)
+    return render(
+        request,
+        config.GRADE_LESSON_ENTITY,
+        context={
+            'lesson': lesson,
+            'form': form,
+            'form_errors': form.non_field_errors(),
+        },
+    )
+
+
+def gradebook_view(request):
+    form = GradebookForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse(form.errors, status=400)
+    group = get_object_or_404(Group, id=form.cleaned_data['group'])
+    subject = get_object_or_404(Subject, id=form.cleaned_data['subject'])
+    if not gradebook.can_open(get_role(request), group.id, subject.id):
+        raise PermissionDenied
+    days = form.cleaned_data['days'] or config.GRADEBOOK_WINDOW_DAYS
+    start = form.cleaned_data['start'] or date.today() - timedelta(days=days - 1)
+    book = gradebook.Gradebook.build(group.id, subject.id, start, days)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(book.as_dict())
+    return render(
+        request,
+        config.GRADEBOOK_ENTITY,
+        context={'gradebook': book, 'group': group, 'subject': subject, 'days': days},
+    )
 
 
 faculty_view = entity_view(Faculty, 'title', 'faculty', config.FACULTY_ENTITY)
@@ -181,39 +231,79 @@ hometask_view = entity_view(
     Hometask, 'lesson', 'hometask', config.HOMETASK_ENTITY)
 
 
+def export_marks_view(request):
+    if not (request.user.is_staff or get_role(request).is_superuser):
+        raise PermissionDenied
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.FORMATS:
+        return JsonResponse({'format': [f'Unknown format: {export_format}']}, status=400)
+    try:
+        chunks = export.export_chunks(request.GET, export_format)
+    except exceptions.ValidationError as error:
+        return JsonResponse(error.detail, status=400)
+    response = StreamingHttpResponse(
+        chunks, content_type=export.CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="marks.{export_format}"'
+    return response
+
+
+def attendance_view(request):
+    if not (request.user.is_staff or get_role(request).is_superuser):
+        raise PermissionDenied
+    by = request.GET.get('by', 'student')
+    if by not in attendance.REPORTS:
+        return JsonResponse({'by': [f'Unknown report: {by}']}, status=400)
+    above = request.GET.get('above')
+    try:
+        above = float(above) if above else None
+    except ValueError:
+        return JsonResponse({'above': [f'Invalid value: {above}']}, status=400)
+    try:
+        rows = attendance.report(request.GET, by, above)
+    except exceptions.ValidationError as error:
+        return JsonResponse(error.detail, status=400)
+    return JsonResponse({'results': rows})
+
+
 class Permission(permissions.BasePermission):
     def has_permission(self, request, _):
         if request.method in config.SAFE_METHODS:
             return bool(request.user and request.user.is_authenticated)
         elif request.method in config.UNSAFE_METHODS:
-            try:
-                teacher = Teacher.objects.get(user=request.user)
-            except Exception:
-                teacher = None
-            return bool(request.user and (request.user.is_superuser or teacher))
+            role = get_role(request)
+            return bool(role.is_superuser or role.teacher)
         return False
 
 
-def query_from_request(request, serializer=None):
-    if serializer:
-        query = {}
-        for attr in serializer.Meta.fields:
-            attr_value = request.GET.get(attr, '')
-            if attr_value:
-                query[attr] = attr_value
-        return query
-    return request.GET
+@action(detail=True, methods=['post'], url_path='grade')
+def grade(self, request, pk=None):
+    """Grade a whole lesson: a list of {student, mark, presence} entries."""
+    lesson = get_object_or_404(Lesson, pk=pk)
+    self.check_object_permissions(request, lesson)
+    entries = GradeEntrySerializer(data=request.data, many=True)
+    entries.is_valid(raise_exception=True)
+    try:
+        marks = grading.grade_lesson(lesson, entries.validated_data)
+    except ValidationError as error:
+        raise exceptions.ValidationError(error.messages)
+    return Response(GradeEntrySerializer(marks, many=True).data, status=status.HTTP_201_CREATED)
 
 
-def create_viewset(cls_model: models.Model, serializer, order_field: str):
+def create_viewset(cls_model: models.Model, serializer, order_field: str, **extra):
     class_name = f"{cls_model.__name__}ViewSet"
     doc = f"API endpoint that allows users to be viewed or edited for {cls_model.__name__}"
-    CustomViewSet = type(class_name, (viewsets.ModelViewSet,), {
+    plan = serializer_plan(serializer)
+    filterset = FilterSet.for_serializer(serializer, *FILTERS.get(cls_model, ()))
+    CustomViewSet = type(class_name, (conditional.ConditionalMixin, viewsets.ModelViewSet), {
         "__doc__": doc,
         "serializer_class": serializer,
         "queryset": cls_model.objects.all().order_by(order_field),
-        "permission classes": [Permission],
-        "get_queryset": lambda self, *args, **kwargs: cls_model.objects.filter(**query_from_request(self.request, serializer)).order_by(order_field)}
+        "permission_classes": [Permission],
+        "pagination_class": KeysetPagination,
+        "keyset_field": cls_model._meta.get_field(order_field).attname,
+        "conditional_tables": versions.tables(versions.plan_models(cls_model, plan)),
+        "get_queryset": lambda self, *args, **kwargs: apply_plan(filterset.filter_queryset(cls_model.objects.order_by(order_field), self.request.query_params), plan),
+        **extra}
     )
 
     return CustomViewSet
@@ -221,7 +311,34 @@ def create_viewset(cls_model: models.Model, serializer, order_field: str):
 
 FacultyViewSet = create_viewset(Faculty, FacultySerializer, 'title')
 TeacherViewSet = create_viewset(Teacher, TeacherSerializer, 'full_name')
-LessonViewSet = create_viewset(Lesson, LessonSerializer, 'day')
+LessonViewSet = create_viewset(
+    Lesson, LessonSerializer, 'day', grade=grade)
 MarkViewSet = create_viewset(Mark, MarkSerializer, 'lesson')
 HometaskViewSet = create_viewset(Hometask, HometaskSerializer, 'task')
 GroupViewSet = create_viewset(Group, GroupSerializer, 'title')
+
+
+class GradeAggregateViewSet(conditional.ConditionalMixin, viewsets.ReadOnlyModelViewSet):
+    """Per student and subject mark statistics, maintained as marks change."""
+    serializer_class = GradeAggregateSerializer
+    queryset = GradeAggregate.objects.all()
+    permission_classes = [Permission]
+    pagination_class = KeysetPagination
+    filterset = FilterSet(GradeAggregate, *FILTERS[GradeAggregate])
+    # aggregates change with marks; the role scope reads students and teachers
+    conditional_tables = versions.tables(
+        (GradeAggregate, Mark, Group) + conditional.SCOPE_MODELS)
+
+    def get_queryset(self):
+        queryset = scopes.role_queryset(get_role(self.request), GradeAggregate)
+        return self.filterset.filter_queryset(queryset.order_by('id'), self.request.query_params)
+
+    @action(detail=False)
+    def groups(self, request):
+        return Response(aggregates.rollup(
+            self.get_queryset(), group='student__group_id', subject='subject_id'))
+
+    @action(detail=False)
+    def faculties(self, request):
+        return Response(aggregates.rollup(
+            self.get_queryset(), faculty='student__group__faculty_id', subject='subject_id'))